@@ -0,0 +1,221 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Context, Decimal, MAX_EMAX, MAX_PREC, MIN_EMIN
+from fractions import Fraction
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.calculation import Calculation
+
+# Sums are kept exact so removing a value undoes adding it; the digits a sum
+# needs grow with the spread of exponents, not with the number of values
+_EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+# Fractional results of exact mode, rounded the same way whenever seen
+_ROUNDED = Context(prec=34)
+
+BucketKey = Tuple[str, datetime]
+
+
+def result_value(calculation: Calculation) -> Decimal:
+    result = calculation.result
+    if isinstance(result, Fraction):
+        return _ROUNDED.divide(Decimal(result.numerator), Decimal(result.denominator))
+    return result
+
+
+class Totals(NamedTuple):
+    """Aggregates of a group of calculation results"""
+    count: int
+    total: Decimal  # Sum of the finite results
+    minimum: Optional[Decimal]
+    maximum: Optional[Decimal]
+    non_finite: int = 0
+
+    @property
+    def mean(self) -> Optional[Decimal]:
+        finite = self.count - self.non_finite
+        return self.total / finite if finite else None
+
+
+class Aggregate:
+    """
+    Count, sum, min and max of the results in one bucket, all reversible.
+    Results are also counted by value, so removing the minimum or maximum
+    finds the next one among the bucket's distinct values, when next asked.
+    """
+
+    __slots__ = ('count', 'total', 'non_finite', 'values', '_min', '_max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = Decimal(0)
+        self.non_finite = 0
+        self.values: Counter = Counter()
+        self._min: Optional[Decimal] = None
+        self._max: Optional[Decimal] = None
+
+    def add(self, value: Decimal) -> None:
+        self.count += 1
+        if value.is_finite():
+            self.total = _EXACT.add(self.total, value)
+        else:
+            self.non_finite += 1
+        self.values[value] += 1
+        if self._min is not None and value < self._min:
+            self._min = value
+        if self._max is not None and value > self._max:
+            self._max = value
+        if self.count == 1:
+            self._min = self._max = value
+
+    def remove(self, value: Decimal) -> None:
+        self.count -= 1
+        if value.is_finite():
+            self.total = _EXACT.subtract(self.total, value)
+        else:
+            self.non_finite -= 1
+        remaining = self.values[value] - 1
+        if remaining:
+            self.values[value] = remaining
+            return
+        del self.values[value]
+        if value == self._min:
+            self._min = None
+        if value == self._max:
+            self._max = None
+
+    @property
+    def minimum(self) -> Optional[Decimal]:
+        if self._min is None and self.values:
+            self._min = min(self.values)
+        return self._min
+
+    @property
+    def maximum(self) -> Optional[Decimal]:
+        if self._max is None and self.values:
+            self._max = max(self.values)
+        return self._max
+
+    def totals(self) -> Totals:
+        return Totals(self.count, self.total, self.minimum, self.maximum, self.non_finite)
+
+
+class AggregateIndex:
+    """
+    Aggregates of calculation results by operation and time bucket, kept in
+    step with the history: calculations are added as they are appended and
+    removed again when an undo, redo, clear, load or jump drops them. A query
+    touches each matching bucket once, however many calculations it holds.
+    """
+
+    def __init__(self, bucket_minutes: int = 60):
+        self.bucket_minutes = bucket_minutes
+        self.buckets: Dict[BucketKey, Aggregate] = {}
+
+    def bucket_start(self, timestamp: datetime) -> datetime:
+        """Start of the time bucket holding ``timestamp``"""
+        minutes = timestamp.hour * 60 + timestamp.minute
+        day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day + timedelta(minutes=minutes - minutes % self.bucket_minutes)
+
+    def add(self, calculation: Calculation) -> None:
+        key = (calculation.operation, self.bucket_start(calculation.timestamp))
+        aggregate = self.buckets.get(key)
+        if aggregate is None:
+            aggregate = self.buckets[key] = Aggregate()
+        aggregate.add(result_value(calculation))
+
+    def remove(self, calculation: Calculation) -> None:
+        key = (calculation.operation, self.bucket_start(calculation.timestamp))
+        aggregate = self.buckets[key]
+        aggregate.remove(result_value(calculation))
+        if not aggregate.count:
+            del self.buckets[key]
+
+    def extend(self, calculations: Iterable[Calculation]) -> None:
+        for calculation in calculations:
+            self.add(calculation)
+
+    def replace(
+            self,
+            history: List[Calculation],
+            following: List[Calculation],
+            prefix_length: Optional[int] = None
+    ) -> None:
+        """
+        Update the index from ``history`` to ``following``: only the
+        calculations after the prefix both share are removed and added.
+        A known shared prefix length skips the scan for it.
+        """
+        if prefix_length is None:
+            prefix_length = 0
+            for mine, theirs in zip(history, following):
+                if mine is not theirs:
+                    break
+                prefix_length += 1
+        for calculation in history[prefix_length:]:
+            self.remove(calculation)
+        self.extend(following[prefix_length:])
+
+    def clear(self) -> None:
+        self.buckets.clear()
+
+    def _matching(
+            self,
+            operation: Optional[str],
+            start: Optional[datetime],
+            end: Optional[datetime]
+    ) -> Iterable[Tuple[BucketKey, Aggregate]]:
+        for key, aggregate in self.buckets.items():
+            name, bucket = key
+            if operation is not None and name != operation:
+                continue
+            if start is not None and bucket < self.bucket_start(start):
+                continue
+            if end is not None and bucket >= end:
+                continue
+            yield key, aggregate
+
+    def query(
+            self,
+            operation: Optional[str] = None,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None
+    ) -> Totals:
+        """
+        Totals of the calculations of ``operation`` (all if None) in the
+        buckets from the one holding ``start`` up to ``end`` (exclusive)
+        """
+        count = non_finite = 0
+        total = Decimal(0)
+        minimum = maximum = None
+        for _, aggregate in self._matching(operation, start, end):
+            count += aggregate.count
+            non_finite += aggregate.non_finite
+            total = _EXACT.add(total, aggregate.total)
+            if minimum is None or aggregate.minimum < minimum:
+                minimum = aggregate.minimum
+            if maximum is None or aggregate.maximum > maximum:
+                maximum = aggregate.maximum
+        return Totals(count, total, minimum, maximum, non_finite)
+
+    def by_operation(
+            self,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None
+    ) -> Dict[str, Totals]:
+        """Totals for each operation, as query gives them"""
+        operations = sorted({name for name, _ in self.buckets})
+        return {name: self.query(name, start, end) for name in operations}
+
+    def series(
+            self,
+            operation: Optional[str] = None,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None
+    ) -> List[Tuple[str, datetime, Totals]]:
+        """Totals of each matching bucket, oldest first, for dashboards"""
+        rows = [(name, bucket, aggregate.totals()) for (name, bucket), aggregate
+                in self._matching(operation, start, end)]
+        rows.sort(key=lambda row: (row[1], row[0]))
+        return rows
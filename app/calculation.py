@@ -3,11 +3,26 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from fractions import Fraction
 import logging
-from typing import Any, Dict
+import sys
+from typing import Any, Dict, Tuple, Union
 
+from app.decimal_context import format_decimal
 from app.exceptions import OperationError
+from app.interning import operand_table
 from app.operations import OperationFactory
+from app.rational import from_exact, to_decimal, to_exact
+
+
+def parse_operand(text: str) -> Union[Decimal, Fraction]:
+    """
+    Operand saved as text: a fraction such as ``1/3`` is an exact result
+    passed back in exact mode, anything else a Decimal
+    """
+    if type(text) is str and '/' in text:
+        return Fraction(text)
+    return operand_table.parse(text)
 
 
 @dataclass
@@ -17,10 +32,15 @@ class Calculation:
     """
 
     operation: str   
-    operand1: Decimal
+    operand1: Decimal  # A Fraction when an exact result was passed back in exact mode
     operand2: Decimal
-    result: Decimal = None
+    result: Decimal = None  # A Fraction for inexact results computed in exact mode
     timestamp: datetime = field(default_factory=datetime.now)
+    extra_operands: Tuple[Decimal, ...] = ()  # Operands after the second, for operations taking more
+
+    @property
+    def operands(self) -> Tuple[Decimal, ...]:
+        return (self.operand1, self.operand2) + self.extra_operands
 
     def __post_init__(self):
         """
@@ -37,7 +57,10 @@ class Calculation:
         try:
             # Use the OperationFactory to get the appropriate operation
             operation_instance = OperationFactory.create_operation(self.operation)
-            return operation_instance.execute(self.operand1, self.operand2)
+            if isinstance(self.operand1, Fraction):
+                # Recomputed exactly, as recorded, then rounded as saved
+                return to_decimal(from_exact(operation_instance.execute_exact(*map(to_exact, self.operands))))
+            return operation_instance.execute(*self.operands)
         except ValueError as e:
             # OperationFactory raises ValueError for unknown operations
             raise OperationError(str(e))
@@ -46,61 +69,83 @@ class Calculation:
         """
         Convert calculation to dictionary for serialization.
         """
-        return {
+        data = {
             'operation': self.operation,
             'operand1': str(self.operand1),
             'operand2': str(self.operand2),
-            'result': str(self.result),
+            'result': str(to_decimal(self.result)),
             'timestamp': self.timestamp.isoformat()
         }
+        if self.extra_operands:
+            data['extra_operands'] = ' '.join(str(operand) for operand in self.extra_operands)
+        return data
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Calculation':
         """
         Create calculation from dictionary.
         """
+        calc = Calculation.parse(data)
         try:
-            # Store the saved result for comparison
-            saved_result = Decimal(data['result'])
-            
-            # Create the calculation object with the saved result
-            calc = Calculation(
-                operation=data['operation'],
-                operand1=Decimal(data['operand1']),
-                operand2=Decimal(data['operand2']),
-                result=saved_result,
-                timestamp=datetime.fromisoformat(data['timestamp'])
+            # Compute what the result should be
+            computed_result = calc.recompute()
+        except (InvalidOperation, ValueError) as e:
+            raise OperationError(f"Invalid calculation data: {str(e)}")
+
+        # Verify the saved result matches the computed result
+        if calc.result != computed_result:
+            logging.warning(
+                f"Loaded calculation result {calc.result} "
+                f"differs from computed result {computed_result}"
             )
 
-            # Compute what the result should be
-            computed_result = calc._compute_result()
-            
-            # Verify the saved result matches the computed result
-            if saved_result != computed_result:
-                logging.warning(
-                    f"Loaded calculation result {saved_result} "
-                    f"differs from computed result {computed_result}"
-                )
-
-            return calc
-
-        except (KeyError, InvalidOperation, ValueError) as e:
+        return calc
+
+    @staticmethod
+    def parse(data: Dict[str, Any]) -> 'Calculation':
+        """
+        Create calculation from dictionary with its saved result, without
+        checking the result. Repeated operation names and values share one
+        object with every other calculation.
+        """
+        parse = operand_table.parse
+        try:
+            return Calculation(
+                operation=sys.intern(data['operation']),
+                operand1=parse_operand(data['operand1']),
+                operand2=parse(data['operand2']),
+                result=parse(data['result']),
+                timestamp=datetime.fromisoformat(data['timestamp']),
+                extra_operands=tuple(parse(x) for x in (data.get('extra_operands') or '').split())
+            )
+        except (KeyError, InvalidOperation, TypeError, ValueError) as e:
             raise OperationError(f"Invalid calculation data: {str(e)}")
 
+    def recompute(self) -> Decimal:
+        """
+        Result the operation gives for these operands, whatever result is stored
+        """
+        return self._compute_result()
+
     def __str__(self) -> str:
         """
         Return string representation of calculation.
         """
-        return f"{self.operation}({self.operand1}, {self.operand2}) = {self.result}"
+        operands = ', '.join(str(operand) for operand in self.operands)
+        return f"{self.operation}({operands}) = {to_decimal(self.result)}"
 
     def __repr__(self) -> str:
         """
         Return detailed string representation of calculation.
         """
+        extra = ''
+        if self.extra_operands:
+            extra = f"extra_operands=({', '.join(str(x) for x in self.extra_operands)}), "
         return (
             f"Calculation(operation='{self.operation}', "
             f"operand1={self.operand1}, "
             f"operand2={self.operand2}, "
+            f"{extra}"
             f"result={self.result}, "
             f"timestamp='{self.timestamp.isoformat()}')"
         )
@@ -115,6 +160,7 @@ class Calculation:
             self.operation == other.operation and
             self.operand1 == other.operand1 and
             self.operand2 == other.operand2 and
+            self.extra_operands == other.extra_operands and
             self.result == other.result
         )
 
@@ -122,10 +168,5 @@ class Calculation:
         """
         Format the calculation result with specified precision.
         """
-        try:
-            # Remove trailing zeros and format to specified precision
-            return str(self.result.normalize().quantize(
-                Decimal('0.' + '0' * precision)
-            ).normalize())
-        except InvalidOperation:  # pragma: no cover
-            return str(self.result)
\ No newline at end of file
+        # Round to the precision and remove trailing zeros
+        return format_decimal(to_decimal(self.result), precision)
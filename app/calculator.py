@@ -1,29 +1,93 @@
+import numpy as np
 import pandas as pd
-from decimal import Decimal
+from decimal import Decimal, DecimalException
+from fractions import Fraction
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from datetime import datetime
 import logging
+import time
 
+from app.aggregate_index import AggregateIndex
 from app.calculation import Calculation
 from app.calculator_config import CalculatorConfig
+from app.decimal_context import CalculatorContext
+from app.rational import from_exact, to_decimal, to_exact
 from app.input_validators import InputValidator
 from app.operations import Operation
 from app.exceptions import OperationError
 from app.history import HistoryObserver
-from app.calculator_memento import CalculatorMemento
+from app.calculator_memento import CalculatorMemento, DeltaMemento, Memento, UndoStore
+from app.file_lock import FileLock
+from app.metrics import Metrics
+from app.observer_dispatcher import ObserverDispatcher
+from app.history_versions import HistoryVersion, HistoryVersions, shared_prefix
+from app.write_ahead_log import WriteAheadLog
+from app.interning import operand_table
+from app.result_cache import ResultCache
+from app.history_segments import (
+    HISTORY_COLUMNS, HistorySegments, RowKey, merge_rows, read_rows, row_key, write_rows
+)
 
 Number = Union[int, float, Decimal]
 
+# Pipeline points where hooks can be registered with Calculator.add_hook
+HOOK_POINTS = (
+    'before_validate', 'after_validate',
+    'before_execute', 'after_execute',
+    'before_append', 'after_append',
+    'before_notify', 'after_notify',
+    'before_save', 'after_save',
+    'on_error',
+)
+
+Hook = Callable[[str, Dict[str, Any]], None]
+
+
 class Calculator:
-    def __init__(self, config: Optional[CalculatorConfig] = None):
+    def __init__(self, config: Optional[CalculatorConfig] = None, result_cache: Optional[ResultCache] = None):
         self.config = config or CalculatorConfig(base_dir=Path("."))
         self.history: List[Calculation] = []
-        self.undo_stack: List[CalculatorMemento] = []
-        self.redo_stack: List[CalculatorMemento] = []
+        self.undo_stack: List[Memento] = []
+        self.redo_stack: List[Memento] = []
         self.observers: List[HistoryObserver] = []
+        # Background dispatchers of asynchronous observers, by observer id
+        self._dispatchers: Dict[int, ObserverDispatcher] = {}
         self.operation_strategy: Optional[Operation] = None
 
+        # Rows known to be in the history file (loaded or written by this process)
+        self._saved_keys: Set[RowKey] = set()
+        self._saved_count = 0
+        self._last_saved: Optional[Calculation] = None
+        self._segments: Optional[HistorySegments] = None
+
+        # Precision, rounding and traps every operation runs under
+        self.decimal_context = CalculatorContext.from_config(self.config)
+
+        # Pipeline instrumentation; a disabled instance costs one check per stage
+        self.metrics = Metrics(enabled=self.config.metrics_enabled)
+
+        # Hook point -> callables; only points with registered hooks are present
+        self._hooks: Dict[str, List[Hook]] = {}
+
+        # Every state the history has been in, for jumping straight to one
+        self.versions = HistoryVersions(self.config.max_versions)
+
+        # Results of earlier operations, possibly shared with other calculators,
+        # kept apart from results computed under other arithmetic settings
+        self.result_cache = result_cache
+        self._cache_scope = (
+            self.config.decimal_precision, self.config.decimal_rounding,
+            tuple(self.config.decimal_traps), self.config.exact_mode
+        )
+
+        # Aggregates by operation and time bucket, built on first use
+        self._aggregates: Optional[AggregateIndex] = None
+
+        # Write-ahead log of changes since the last save, opened on first change
+        self._wal: Optional[WriteAheadLog] = None
+        self._replaying = False
+
         self.config.history_dir.mkdir(parents=True, exist_ok=True)
         
         logging.info("Calculator initialized with configuration")
@@ -33,107 +97,622 @@ class Calculator:
         except Exception as e:
             logging.warning(f"Could not load existing history: {e}")
 
+        try:
+            self.load_undo_state()
+        except Exception as e:
+            logging.warning(f"Could not load undo/redo state: {e}")
+
+        try:
+            self.recover()
+        except Exception as e:
+            logging.warning(f"Could not recover write-ahead logs: {e}")
+
+        if not self.versions:
+            self.versions.record(self.history)
+
     def set_operation(self, operation: Operation):
         self.operation_strategy = operation
         logging.info(f"Operation set: {operation}")
 
     def add_observer(self, observer: HistoryObserver):
         self.observers.append(observer)
+        if self.config.async_observers and getattr(observer, 'asynchronous', False):
+            self._dispatchers[id(observer)] = ObserverDispatcher(
+                observer,
+                max_queue=self.config.observer_queue_size,
+                batch_size=self.config.observer_batch_size,
+                policy=self.config.observer_backpressure
+            )
 
     def remove_observer(self, observer: HistoryObserver):
         self.observers.remove(observer)
+        dispatcher = self._dispatchers.pop(id(observer), None)
+        if dispatcher is not None:
+            dispatcher.close()
 
     def notify_observers(self, calculation: Calculation):
+        dispatchers = self._dispatchers
+        if not self.metrics.enabled:
+            for obs in self.observers:
+                if dispatchers and id(obs) in dispatchers:
+                    dispatchers[id(obs)].submit(calculation)
+                else:
+                    obs.update(calculation)
+            return
         for obs in self.observers:
-            obs.update(calculation)
+            start = time.perf_counter_ns()
+            if dispatchers and id(obs) in dispatchers:
+                dispatchers[id(obs)].submit(calculation)
+            else:
+                obs.update(calculation)
+            self.metrics.observe(f"observer.{type(obs).__name__}", time.perf_counter_ns() - start)
+
+    def flush_observers(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for asynchronous observers to receive every calculation so far.
+        Returns False if the timeout passed first.
+        """
+        return all([dispatcher.flush(timeout) for dispatcher in self._dispatchers.values()])
+
+    def add_hook(self, point: str, hook: Hook) -> None:
+        """
+        Register a callable run at a pipeline hook point (see HOOK_POINTS)
+        as ``hook(point, context)``, where context holds the operation,
+        operands, result, calculation or error known at that point.
+        """
+        if point not in HOOK_POINTS:
+            raise ValueError(f"Unknown hook point: {point}")
+        self._hooks.setdefault(point, []).append(hook)
+
+    def remove_hook(self, point: str, hook: Hook) -> None:
+        hooks = self._hooks.get(point, [])
+        if hook in hooks:
+            hooks.remove(hook)
+        if not hooks:
+            self._hooks.pop(point, None)
+
+    def _fire(self, point: str, **context: Any) -> None:
+        for hook in self._hooks.get(point, ()):
+            hook(point, context)
 
-    def perform_operation(self, a: Number, b: Number) -> Decimal:
+    def perform_operation(self, a: Number, b: Number, *rest: Number) -> Decimal:
+        """
+        Run the current operation on ``a``, ``b`` and, for operations taking
+        more than two operands (such as modpow or sum), the ``rest``. Passing
+        ``ans`` (the previous result) as ``a`` chains from it without
+        validating it again.
+        """
         if not self.operation_strategy:
             raise OperationError("No operation set")
+        arity = getattr(self.operation_strategy, 'arity', 2)
+        if arity is not None and len(rest) != arity - 2:
+            raise OperationError(f"{self.operation_strategy} takes {arity} operands")
 
-        validated_a = InputValidator.validate_number(a, self.config)
-        validated_b = InputValidator.validate_number(b, self.config)
+        metrics = self.metrics if self.metrics.enabled else None
+        if metrics is not None:
+            operation_name = str(self.operation_strategy)
+            started = stage = time.perf_counter_ns()
+        hooks = self._hooks
 
-        result = self.operation_strategy.execute(validated_a, validated_b)
+        try:
+            if hooks:
+                self._fire('before_validate', operation=self.operation_strategy, operands=(a, b) + rest)
+            history = self.history
+            if history and a is history[-1].result:
+                # The previous result passed back: already validated, and kept
+                # exact in exact mode instead of being rounded to a Decimal
+                chained = a
+                if type(a) is not Decimal:
+                    with self.decimal_context:
+                        a = to_decimal(a)
+                validated_a = a
+            else:
+                chained = None
+                validated_a = InputValidator.validate_number(a, self.config)
+            validated_b = InputValidator.validate_number(b, self.config)
+            extra = tuple(InputValidator.validate_many(rest, self.config)) if rest else ()
+            if metrics is not None:
+                stage = metrics.lap('validate', stage)
+            if hooks:
+                operands = (validated_a, validated_b) + extra
+                self._fire('after_validate', operation=self.operation_strategy, operands=operands)
+                self._fire('before_execute', operation=self.operation_strategy, operands=operands)
+
+            cached = key = None
+            if self.result_cache is not None and not isinstance(chained, Fraction):
+                # Keyed by the operands' text: equal Decimals such as 1.0 and 1 give differently written results
+                key = (self._cache_scope, str(self.operation_strategy)) + tuple(
+                    map(str, (validated_a, validated_b) + extra)
+                )
+                cached = self.result_cache.get(key)
+            if cached is not None:
+                result, exact = cached
+            else:
+                try:
+                    with self.decimal_context:
+                        if self.config.exact_mode:
+                            exact_a = chained if isinstance(chained, Fraction) else to_exact(validated_a)
+                            exact = from_exact(self.operation_strategy.execute_exact(
+                                exact_a, to_exact(validated_b), *map(to_exact, extra)
+                            ))
+                            result = to_decimal(exact)
+                        else:
+                            result = exact = self.operation_strategy.execute(validated_a, validated_b, *extra)
+                except DecimalException as e:
+                    raise OperationError(f"Arithmetic error: {type(e).__name__}")
+                if key is not None:
+                    self.result_cache.put(key, (result, exact))
+            if metrics is not None:
+                stage = metrics.lap('execute', stage)
+            if hooks:
+                self._fire('after_execute', operation=self.operation_strategy, result=result)
+        except Exception as e:
+            if metrics is not None:
+                metrics.increment(f"errors.{operation_name}")
+            if hooks:
+                self._fire('on_error', operation=self.operation_strategy, error=e)
+            raise
 
+        # Repeated values share one object across the history and its mementos;
+        # the result returned stays the one recorded, so it can be chained
+        intern = operand_table.decimal
+        if type(exact) is Decimal:
+            shared = intern(exact)
+            if result is exact:
+                result = shared
+            exact = shared
         calc = Calculation(
             operation=str(self.operation_strategy),
-            operand1=validated_a,
-            operand2=validated_b,
-            result=result
+            # An exact previous result is recorded as used, so reloads recompute the same result
+            operand1=chained if isinstance(chained, Fraction) else intern(validated_a),
+            operand2=intern(validated_b),
+            result=exact,
+            extra_operands=tuple(map(intern, extra)) if extra else ()
         )
 
+        self._record(calc)
+        if metrics is not None:
+            stage = metrics.lap('record', stage)
+
+        if hooks:
+            self._fire('before_notify', calculation=calc)
+        try:
+            self.notify_observers(calc)
+        except Exception as e:
+            if hooks:
+                self._fire('on_error', calculation=calc, error=e)
+            raise
+        if metrics is not None:
+            end = metrics.lap('notify', stage)
+            metrics.observe(f"operation.{operation_name}", end - started)
+            metrics.increment(f"operations.{operation_name}")
+        if hooks:
+            self._fire('after_notify', calculation=calc)
 
+        return result
+
+    def perform_reduction(self, values: Iterable[Number]) -> Decimal:
+        """
+        Run the current n-ary operation (sum, product, min, max, mean) over a
+        sequence of values, recorded as a single calculation. NumPy arrays
+        are validated in one vectorized pass. The first value may be ``ans``.
+        """
+        if not self.operation_strategy:
+            raise OperationError("No operation set")
+        if getattr(self.operation_strategy, 'arity', 2) is not None:
+            raise OperationError(f"{self.operation_strategy} does not take a sequence")
+        if isinstance(values, np.ndarray):
+            # The Decimals this returns pass validation again at the cost of a comparison
+            values = InputValidator.validate_many(values, self.config)
+        values = list(values)
+        if len(values) < 2:
+            raise OperationError(f"{self.operation_strategy} takes at least 2 operands")
+        return self.perform_operation(*values)
+
+    def _record(self, calc: Calculation) -> None:
+        """Append a calculation to history, keeping undo/redo and the log in step"""
+        metrics = self.metrics if self.metrics.enabled else None
+        if metrics is not None:
+            stage = time.perf_counter_ns()
+        if self._hooks:
+            self._fire('before_append', calculation=calc)
 
         # Save current state for undo/redo
-        self.undo_stack.append(CalculatorMemento(self.history.copy()))
+        self._push_undo(DeltaMemento(len(self.history)))
         self.redo_stack.clear()
 
-        # Update history and notify observers
         self.history.append(calc)
-        self.notify_observers(calc)
+        self.versions.record(self.history)
+        if self._aggregates is not None:
+            self._aggregates.add(calc)
+        if metrics is not None:
+            stage = metrics.lap('memento', stage)
 
-        return result
+        self._log({'type': 'calculation', 'calculation': calc.to_dict()})
+        if metrics is not None:
+            metrics.lap('wal', stage)
+        if self._hooks:
+            self._fire('after_append', calculation=calc)
+
+    def _push_undo(self, memento: Memento) -> None:
+        """Push onto the undo stack, dropping the oldest entries beyond the configured depth"""
+        self.undo_stack.append(memento)
+        if len(self.undo_stack) > self.config.max_undo_depth:
+            del self.undo_stack[:len(self.undo_stack) - self.config.max_undo_depth]
+
+    @property
+    def _logging_changes(self) -> bool:
+        return self.config.wal_enabled and not self._replaying
+
+    def _log(self, record: Dict[str, Any]) -> None:
+        """Write a change to the write-ahead log before it can be lost"""
+        if not self._logging_changes:
+            return
+        if self._wal is None:
+            self._wal = WriteAheadLog.for_session(self.config.history_file, fsync=self.config.wal_fsync)
+        self._wal.append(record)
+
+    def recover(self) -> int:
+        """
+        Replay write-ahead logs left by sessions that ended without saving,
+        save the result and drop those logs. Returns the number of records replayed.
+        """
+        replayed = 0
+        for path, lock in WriteAheadLog.orphans(self.config.history_file):
+            try:
+                records = WriteAheadLog.read(path)
+                with self.decimal_context:
+                    self._replay(records)
+                if records:
+                    self.save_history()
+                path.unlink(missing_ok=True)
+                replayed += len(records)
+            finally:
+                lock.release()
+                lock.lock_path.unlink(missing_ok=True)
+        if replayed:
+            logging.info(f"Recovered {replayed} changes from write-ahead logs")
+        return replayed
+
+    def _replay(self, records: List[Dict[str, Any]]) -> None:
+        self._replaying = True
+        # Rows held at any point of the replay; calculations are timestamped, so never recur
+        keys = {row_key(c.to_dict()) for c in self.history}
+        try:
+            for record in records:
+                kind = record.get('type')
+                if kind == 'calculation':
+                    calc = Calculation.from_dict(record['calculation'])
+                    key = row_key(calc.to_dict())
+                    if self.history and row_key(self.history[-1].to_dict()) == key:
+                        # Saved before the crash, but the log was not yet checkpointed
+                        self._push_undo(DeltaMemento(len(self.history) - 1))
+                        self.redo_stack.clear()
+                    elif key not in keys:
+                        self._record(calc)
+                        keys.add(key)
+                elif kind == 'undo':
+                    self.undo()
+                elif kind == 'redo':
+                    self.redo()
+                elif kind == 'clear':
+                    self.clear_history()
+                elif kind == 'goto':
+                    delta = DeltaMemento.from_dict(record['delta'])
+                    self._jump(delta.restore(self.history), delta.prefix_length, record.get('cleared', False))
+        finally:
+            self._replaying = False
+
+    def close(self) -> None:
+        """Stop asynchronous observers once delivered and release the write-ahead log; call after a final save"""
+        for dispatcher in self._dispatchers.values():
+            dispatcher.close()
+        self._dispatchers.clear()
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    @property
+    def segments(self) -> HistorySegments:
+        """Archived segments of the configured history file"""
+        history_file = self.config.history_file
+        if self._segments is None or self._segments.history_file != history_file:
+            self._segments = HistorySegments(history_file, compression=self.config.history_compression)
+        self._segments.max_bytes = self.config.segment_max_bytes
+        self._segments.max_age_hours = self.config.segment_max_age_hours
+        self._segments.compression = self.config.history_compression
+        return self._segments
 
     def save_history(self) -> None:
-        """Save history to CSV using pandas"""
+        """
+        Save history to CSV using pandas.
+
+        New calculations are appended under an exclusive file lock, so several
+        processes can share one history file without losing each other's rows.
+        Only the small active segment is written; it is archived into a
+        compressed segment once it grows too large or too old. Files are only
+        rewritten (atomically) when calculations this process had already
+        saved were removed by undo or clear. The undo/redo stacks are saved
+        alongside as deltas on the saved history.
+        """
         try:
-            data = [{
-                'operation': str(c.operation),
-                'operand1': str(c.operand1),
-                'operand2': str(c.operand2),
-                'result': str(c.result),
-                'timestamp': c.timestamp.isoformat()
-            } for c in self.history]
-
-            df = pd.DataFrame(data)
-            df.to_csv(self.config.history_file, index=False)
-            logging.info(f"History saved to {self.config.history_file}")
+            if self.metrics.enabled:
+                started = time.perf_counter_ns()
+            if self._hooks:
+                self._fire('before_save', history=self.history)
+            segments = self.segments
+            history_file = segments.history_file
+            with FileLock(history_file):
+                if self._saved_prefix_intact() and not self.versions.cleared:
+                    if segments.should_rotate():
+                        segments.rotate()
+                    self._append_rows(history_file, [c.to_dict() for c in self.history[self._saved_count:]])
+                else:
+                    self._rewrite_history(segments)
+                if self.config.persist_undo:
+                    UndoStore.for_history(history_file).save(
+                        self.history, self.undo_stack, self.redo_stack, self.config.max_undo_depth
+                    )
+            self._mark_saved()
+            if self._wal is not None:
+                self._wal.checkpoint()
+            if self.metrics.enabled:
+                self.metrics.lap('save', started)
+            if self._hooks:
+                self._fire('after_save', history=self.history)
+            logging.info(f"History saved to {history_file}")
         except Exception as e:
+            if self._hooks:
+                self._fire('on_error', error=e)
             logging.error(f"Failed to save history: {e}")
             raise OperationError(f"Failed to save history: {e}")
 
+    def _saved_prefix_intact(self) -> bool:
+        """Whether the history still starts with everything saved by the last save"""
+        if self._saved_count > len(self.history):
+            return False
+        return self._saved_count == 0 or self.history[self._saved_count - 1] is self._last_saved
+
+    def _mark_saved(self) -> None:
+        self._saved_keys.update(row_key(c.to_dict()) for c in self.history[self._saved_count:])
+        self._saved_count = len(self.history)
+        self._last_saved = self.history[-1] if self.history else None
+
+    def _append_rows(self, history_file: Path, rows: List[Dict[str, Any]]) -> None:
+        rows = [row for row in rows if row_key(row) not in self._saved_keys]
+        if not rows:
+            return
+        write_header = not history_file.exists() or history_file.stat().st_size == 0
+        if not write_header:
+            self._upgrade_columns(history_file)
+            self._terminate_last_line(history_file)
+        pd.DataFrame(rows, columns=HISTORY_COLUMNS).to_csv(
+            history_file, mode='a', header=write_header, index=False
+        )
+
+    @staticmethod
+    def _upgrade_columns(history_file: Path) -> None:
+        """Rewrite a file saved with older columns so appended rows line up with its header"""
+        with open(history_file, encoding='utf-8') as f:
+            header = f.readline().strip()
+        if header != ','.join(HISTORY_COLUMNS):
+            write_rows(history_file, read_rows(history_file))
+
+    @staticmethod
+    def _terminate_last_line(history_file: Path) -> None:
+        """Finish a row torn by a crash mid-append so new rows start on their own line"""
+        with open(history_file, 'rb+') as f:
+            f.seek(-1, 2)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    def _rewrite_history(self, segments: HistorySegments) -> None:
+        """
+        Replace the active segment with the current history merged with rows
+        other processes wrote. Rows this process saved earlier but no longer
+        holds are dropped, from archived segments too. After a clear every
+        archived segment is dropped, including those never loaded.
+        """
+        history_file = segments.history_file
+        rows = [c.to_dict() for c in self.history]
+        keys = {row_key(row) for row in rows}
+        removed = self._saved_keys - keys
+
+        active = read_rows(history_file)
+        if self.versions.cleared:
+            segments.clear()
+            self.versions.cleared = False
+        else:
+            archived_removed = removed - {row_key(row) for row in active}
+            if archived_removed:
+                segments.remove_rows(archived_removed)
+        archived = set()
+        for path in segments.segment_paths():
+            archived.update(row_key(row) for row in read_rows(path))
+
+        kept = [row for row in active if row_key(row) not in removed]
+        unarchived = [row for row in rows if row_key(row) not in archived]
+        write_rows(history_file, merge_rows(kept, unarchived))
+        self._saved_keys = keys
+
+    def _read_history_rows(self) -> List[Dict[str, Any]]:
+        """Read history rows from the needed segments without duplicates, oldest first"""
+        segments = self.segments
+        paths = segments.paths_for(self.config.max_history_size) + [segments.history_file]
+        return merge_rows(*(read_rows(path) for path in paths))
+
     def load_history(self) -> None:
-        """Load history from CSV using pandas"""
+        """
+        Load history from CSV using pandas.
+
+        Only the archived segments needed to fill ``max_history_size`` are
+        opened. Rows are merged: duplicates appended by several processes are
+        dropped and calculations not yet saved by this process are kept.
+        """
         try:
-            if self.config.history_file.exists():
-                df = pd.read_csv(self.config.history_file)
-                self.history = [
-                    Calculation.from_dict({
-                        'operation': row['operation'],
-                        'operand1': row['operand1'],
-                        'operand2': row['operand2'],
-                        'result': row['result'],
-                        'timestamp': row['timestamp']
-                    })
-                    for _, row in df.iterrows()
-                ]
+            segments = self.segments
+            history_file = segments.history_file
+            if history_file.exists() or segments.segment_paths():
+                with FileLock(history_file, shared=True):
+                    rows = self._read_history_rows()
+                keys = {row_key(row) for row in rows}
+                known = keys | self._saved_keys
+                unsaved = [c for c in self.history if row_key(c.to_dict()) not in known]
+                with self.decimal_context:
+                    history = self._parse_rows(rows)
+                if unsaved:
+                    history = sorted(history + unsaved, key=lambda c: c.timestamp)
+                if self.history or self.undo_stack:
+                    # Loading is undoable; older deltas stay relative to the replaced list
+                    self._push_undo(CalculatorMemento(self.history, length=len(self.history)))
+                self.redo_stack.clear()
+                self._reindex(history)
+                self.history = history
+                self.versions.cleared = False
+                self.versions.record(self.history)
+                self._saved_keys = keys
+                self._saved_count = len(history) if not unsaved else 0
+                self._last_saved = history[-1] if history and not unsaved else None
                 logging.info(f"Loaded {len(self.history)} calculations from history")
         except Exception as e:
             logging.error(f"Failed to load history: {e}")
             raise OperationError(f"Failed to load history: {e}")
 
+    @staticmethod
+    def _parse_rows(rows: List[Dict[str, Any]]) -> List[Calculation]:
+        """Build calculations from rows, skipping rows torn by a crash (the log replays them)"""
+        history = []
+        for row in rows:
+            try:
+                history.append(Calculation.from_dict(row))
+            except OperationError as e:
+                logging.warning(f"Skipping unreadable history row: {e}")
+        return history
+
+    def load_undo_state(self) -> bool:
+        """
+        Restore the undo/redo stacks saved with the current history.
+        Returns whether any were restored.
+        """
+        if not self.config.persist_undo:
+            return False
+        stacks = UndoStore.for_history(self.config.history_file).load(self.history)
+        if stacks is None:
+            return False
+        self.undo_stack, self.redo_stack = stacks
+        logging.info(f"Restored {len(self.undo_stack)} undo and {len(self.redo_stack)} redo steps")
+        return True
+
+    def compact_history(self) -> int:
+        """
+        Merge the archived history segments into one compressed segment.
+        Returns the number of archived rows.
+        """
+        try:
+            segments = self.segments
+            with FileLock(segments.history_file):
+                count = segments.compact()
+            logging.info("History segments compacted")
+            return count
+        except Exception as e:
+            logging.error(f"Failed to compact history: {e}")
+            raise OperationError(f"Failed to compact history: {e}")
+
     def undo(self) -> bool:
         if not self.undo_stack:
             return False
         memento = self.undo_stack.pop()
-        self.redo_stack.append(CalculatorMemento(self.history.copy()))
-        self.history = memento.history.copy()
+        previous = memento.restore(self.history)
+        self.redo_stack.append(DeltaMemento.between(self.history, previous, self._shared_prefix(memento)))
+        source = self.history if isinstance(memento, DeltaMemento) and not memento.tail else None
+        self._reindex(previous, self._shared_prefix(memento))
+        self.history = previous
+        self.versions.record(self.history, source)
+        self._log({'type': 'undo'})
         return True
 
     def redo(self) -> bool:
         if not self.redo_stack:
             return False
         memento = self.redo_stack.pop()
-        self.undo_stack.append(CalculatorMemento(self.history.copy()))
-        self.history = memento.history.copy()
+        following = memento.restore(self.history)
+        self._push_undo(DeltaMemento.between(self.history, following, self._shared_prefix(memento)))
+        self._reindex(following, self._shared_prefix(memento))
+        self.history = following
+        self.versions.record(self.history)
+        self._log({'type': 'redo'})
         return True
 
+    def goto(self, version: int) -> None:
+        """
+        Jump straight to any recorded history version. The jump is undoable
+        and is itself recorded as a new version.
+        """
+        target = self.versions.history_at(version)
+        shared = shared_prefix(target, self.history)
+        cleared = self.versions.get(version).cleared
+        if self._logging_changes:
+            delta = DeltaMemento.between(target, self.history, shared)
+            self._log({'type': 'goto', 'delta': delta.to_dict(), 'cleared': cleared})
+        self._jump(target, shared, cleared)
+        logging.info(f"Jumped to history version {version}")
+
+    def _jump(self, target: List[Calculation], prefix_length: Optional[int] = None, cleared: bool = False) -> None:
+        self._push_undo(CalculatorMemento(self.history, length=len(self.history)))
+        self.redo_stack.clear()
+        self._reindex(target, prefix_length)
+        self.history = target
+        self.versions.cleared = cleared
+        self.versions.record(self.history)
+
+    @property
+    def aggregates(self) -> AggregateIndex:
+        """
+        Aggregates of the history by operation and time bucket. Built from
+        the history on first use, then updated with every change to it.
+        """
+        if self._aggregates is None:
+            self._aggregates = AggregateIndex(self.config.aggregate_bucket_minutes)
+            self._aggregates.extend(self.history)
+        return self._aggregates
+
+    def _reindex(self, following: List[Calculation], prefix_length: Optional[int] = None) -> None:
+        """Bring a built aggregate index from the current history to ``following``"""
+        if self._aggregates is not None:
+            self._aggregates.replace(self.history, following, prefix_length)
+
+    def list_versions(self, count: int = 10) -> List[HistoryVersion]:
+        """
+        The newest ``count`` history versions, oldest first
+        """
+        return self.versions.latest(count)
+
+    @staticmethod
+    def _shared_prefix(memento: Memento) -> Optional[int]:
+        """Prefix a delta memento's state is known to share with the current one"""
+        return memento.prefix_length if isinstance(memento, DeltaMemento) else None
+
+    @property
+    def ans(self) -> Union[Decimal, Fraction, None]:
+        """
+        Result of the last calculation in the history (a Fraction for an
+        inexact result in exact mode), or None. Passed back to
+        perform_operation as the first operand it is used as is.
+        """
+        return self.history[-1].result if self.history else None
+
     def show_history(self) -> List[str]:
-        return [f"{c.operation}({c.operand1}, {c.operand2}) = {c.result}" for c in self.history]
+        return [f"{c.operation}({', '.join(map(str, c.operands))}) = {c.result}" for c in self.history]
 
     def clear_history(self):
-        self.history.clear()
+        # A new list: earlier versions still reference the old one
+        self.history = []
+        if self._aggregates is not None:
+            self._aggregates.clear()
         self.undo_stack.clear()
         self.redo_stack.clear()
+        # Saving drops every archived segment, not just the loaded rows
+        self.versions.cleared = True
+        self.versions.record(self.history)
+        self._log({'type': 'clear'})
         logging.info("History cleared")
@@ -1,11 +1,13 @@
+import copy
 from dataclasses import dataclass
 from decimal import Decimal
 from numbers import Number
 from pathlib import Path
 import os
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
+from app.decimal_context import ROUNDING_MODES, SIGNALS
 from app.exceptions import ConfigurationError
 
 load_dotenv()
@@ -19,6 +21,53 @@ def get_project_root() -> Path:
     current_file = Path(__file__)
     return current_file.parent.parent
 
+# Environment variables that move the calculator's files
+PATH_VARIABLES = (
+    'CALCULATOR_BASE_DIR', 'CALCULATOR_LOG_DIR', 'CALCULATOR_LOG_FILE',
+    'CALCULATOR_HISTORY_DIR', 'CALCULATOR_HISTORY_FILE',
+)
+
+@dataclass(frozen=True)
+class ResolvedPaths:
+    """
+    Immutable snapshot of the configured file locations. Resolving reads the
+    environment and the filesystem, so it is done once rather than on every
+    access from the save and load paths.
+    """
+    base_dir: Path
+    log_dir: Path
+    log_file: Path
+    history_dir: Path
+    history_file: Path
+
+    @classmethod
+    def resolve(cls, base_dir: Path) -> 'ResolvedPaths':
+        log_dir = Path(os.getenv('CALCULATOR_LOG_DIR', str(base_dir / "logs"))).resolve()
+        history_dir = Path(os.getenv('CALCULATOR_HISTORY_DIR', str(base_dir / "history"))).resolve()
+        return cls(
+            base_dir=base_dir,
+            log_dir=log_dir,
+            log_file=Path(os.getenv('CALCULATOR_LOG_FILE', str(log_dir / "calculator.log"))).resolve(),
+            history_dir=history_dir,
+            history_file=Path(
+                os.getenv('CALCULATOR_HISTORY_FILE', str(history_dir / "calculator_history.csv"))
+            ).resolve(),
+        )
+
+    @classmethod
+    def under(cls, base_dir: Path) -> 'ResolvedPaths':
+        """
+        Default locations under ``base_dir``, ignoring the path environment variables
+        """
+        return cls(
+            base_dir=base_dir,
+            log_dir=base_dir / "logs",
+            log_file=base_dir / "logs" / "calculator.log",
+            history_dir=base_dir / "history",
+            history_file=base_dir / "history" / "calculator_history.csv",
+        )
+
+
 @dataclass
 class CalculatorConfig:
     """
@@ -31,11 +80,40 @@ class CalculatorConfig:
             auto_save: Optional[bool] = None,
             precision: Optional[int] = None,
             max_input_value: Optional[Number] = None,
-            default_encoding: Optional[str] = None
+            default_encoding: Optional[str] = None,
+            segment_max_bytes: Optional[int] = None,
+            segment_max_age_hours: Optional[float] = None,
+            history_compression: Optional[str] = None,
+            wal_enabled: Optional[bool] = None,
+            wal_fsync: Optional[bool] = None,
+            max_undo_depth: Optional[int] = None,
+            persist_undo: Optional[bool] = None,
+            max_versions: Optional[int] = None,
+            metrics_enabled: Optional[bool] = None,
+            log_level: Optional[str] = None,
+            log_max_bytes: Optional[int] = None,
+            log_backup_count: Optional[int] = None,
+            log_batch_size: Optional[int] = None,
+            async_observers: Optional[bool] = None,
+            observer_queue_size: Optional[int] = None,
+            observer_batch_size: Optional[int] = None,
+            observer_backpressure: Optional[str] = None,
+            decimal_precision: Optional[int] = None,
+            decimal_rounding: Optional[str] = None,
+            decimal_traps: Optional[List[str]] = None,
+            exact_mode: Optional[bool] = None,
+            aggregate_bucket_minutes: Optional[int] = None,
+            verify_workers: Optional[int] = None,
+            verify_chunk_rows: Optional[int] = None,
+            verify_on_startup: Optional[bool] = None,
+            pool_max_calculators: Optional[int] = None,
+            pool_idle_seconds: Optional[float] = None,
+            result_cache_size: Optional[int] = None
     ):
         """
         Initialize configuration of environment variables
         """
+        self._paths: Optional[ResolvedPaths] = None
         project_root = get_project_root()
         self.base_dir = base_dir or Path(
             os.getenv('CALCULATOR_BASE_DIR', str(project_root))
@@ -62,46 +140,182 @@ class CalculatorConfig:
             'CALCULATOR_DEFAULT_ENCODING', 'utf-8'
         )
 
+        self.segment_max_bytes = segment_max_bytes if segment_max_bytes is not None else int(
+            os.getenv('CALCULATOR_HISTORY_SEGMENT_BYTES', str(1024 * 1024))
+        )
+
+        self.segment_max_age_hours = segment_max_age_hours if segment_max_age_hours is not None else float(
+            os.getenv('CALCULATOR_HISTORY_SEGMENT_HOURS', '0')
+        )
+
+        self.history_compression = history_compression or os.getenv(
+            'CALCULATOR_HISTORY_COMPRESSION', 'gzip'
+        )
+
+        wal_env = os.getenv('CALCULATOR_WAL_ENABLED', 'true').lower()
+        self.wal_enabled = wal_enabled if wal_enabled is not None else (
+            wal_env == 'true' or wal_env == '1'
+        )
+
+        wal_fsync_env = os.getenv('CALCULATOR_WAL_FSYNC', 'true').lower()
+        self.wal_fsync = wal_fsync if wal_fsync is not None else (
+            wal_fsync_env == 'true' or wal_fsync_env == '1'
+        )
+
+        self.max_undo_depth = max_undo_depth or int(
+            os.getenv('CALCULATOR_MAX_UNDO_DEPTH', '100')
+        )
+
+        persist_undo_env = os.getenv('CALCULATOR_PERSIST_UNDO', 'true').lower()
+        self.persist_undo = persist_undo if persist_undo is not None else (
+            persist_undo_env == 'true' or persist_undo_env == '1'
+        )
+
+        self.max_versions = max_versions or int(
+            os.getenv('CALCULATOR_MAX_VERSIONS', '1000')
+        )
+
+        metrics_env = os.getenv('CALCULATOR_METRICS_ENABLED', 'false').lower()
+        self.metrics_enabled = metrics_enabled if metrics_enabled is not None else (
+            metrics_env == 'true' or metrics_env == '1'
+        )
+
+        self.log_level = (log_level or os.getenv('CALCULATOR_LOG_LEVEL', 'INFO')).upper()
+
+        self.log_max_bytes = log_max_bytes if log_max_bytes is not None else int(
+            os.getenv('CALCULATOR_LOG_MAX_BYTES', str(1024 * 1024))
+        )
+
+        self.log_backup_count = log_backup_count if log_backup_count is not None else int(
+            os.getenv('CALCULATOR_LOG_BACKUP_COUNT', '5')
+        )
+
+        self.log_batch_size = log_batch_size or int(
+            os.getenv('CALCULATOR_LOG_BATCH_SIZE', '1')
+        )
+
+        async_observers_env = os.getenv('CALCULATOR_ASYNC_OBSERVERS', 'true').lower()
+        self.async_observers = async_observers if async_observers is not None else (
+            async_observers_env == 'true' or async_observers_env == '1'
+        )
+
+        self.observer_queue_size = observer_queue_size or int(
+            os.getenv('CALCULATOR_OBSERVER_QUEUE_SIZE', '1000')
+        )
+
+        self.observer_batch_size = observer_batch_size or int(
+            os.getenv('CALCULATOR_OBSERVER_BATCH_SIZE', '100')
+        )
+
+        self.observer_backpressure = observer_backpressure or os.getenv(
+            'CALCULATOR_OBSERVER_BACKPRESSURE', 'block'
+        )
+
+        self.decimal_precision = decimal_precision or int(
+            os.getenv('CALCULATOR_DECIMAL_PRECISION', '28')
+        )
+
+        self.decimal_rounding = (decimal_rounding or os.getenv(
+            'CALCULATOR_DECIMAL_ROUNDING', 'ROUND_HALF_EVEN'
+        )).upper()
+
+        self.decimal_traps = decimal_traps if decimal_traps is not None else [
+            name.strip() for name in os.getenv(
+                'CALCULATOR_DECIMAL_TRAPS', 'InvalidOperation,DivisionByZero,Overflow'
+            ).split(',') if name.strip()
+        ]
+
+        exact_mode_env = os.getenv('CALCULATOR_EXACT_MODE', 'false').lower()
+        self.exact_mode = exact_mode if exact_mode is not None else (
+            exact_mode_env == 'true' or exact_mode_env == '1'
+        )
+
+        self.aggregate_bucket_minutes = aggregate_bucket_minutes or int(
+            os.getenv('CALCULATOR_AGGREGATE_BUCKET_MINUTES', '60')
+        )
+
+        self.verify_workers = verify_workers if verify_workers is not None else int(
+            os.getenv('CALCULATOR_VERIFY_WORKERS', '0')
+        )
+
+        self.verify_chunk_rows = verify_chunk_rows or int(
+            os.getenv('CALCULATOR_VERIFY_CHUNK_ROWS', '10000')
+        )
+
+        verify_on_startup_env = os.getenv('CALCULATOR_VERIFY_ON_STARTUP', 'false').lower()
+        self.verify_on_startup = verify_on_startup if verify_on_startup is not None else (
+            verify_on_startup_env == 'true' or verify_on_startup_env == '1'
+        )
+
+        self.pool_max_calculators = pool_max_calculators or int(
+            os.getenv('CALCULATOR_POOL_MAX_CALCULATORS', '100')
+        )
+
+        self.pool_idle_seconds = pool_idle_seconds if pool_idle_seconds is not None else float(
+            os.getenv('CALCULATOR_POOL_IDLE_SECONDS', '0')
+        )
+
+        self.result_cache_size = result_cache_size if result_cache_size is not None else int(
+            os.getenv('CALCULATOR_RESULT_CACHE_SIZE', '10000')
+        )
+
+    @property
+    def paths(self) -> 'ResolvedPaths':
+        """
+        Resolved file locations, computed once from the environment and
+        base_dir. Call reload() to pick up environment changes.
+        """
+        paths = self._paths
+        if paths is None or paths.base_dir is not self.base_dir:
+            paths = self._paths = ResolvedPaths.resolve(self.base_dir)
+        return paths
+
+    def relocated(self, base_dir: Path) -> 'CalculatorConfig':
+        """
+        Copy of this configuration keeping all its files under ``base_dir``.
+        The path environment variables are not applied, so copies made for
+        different directories never share a file.
+        """
+        config = copy.copy(self)
+        config.base_dir = base_dir.resolve()
+        config.decimal_traps = list(self.decimal_traps)
+        config._paths = ResolvedPaths.under(config.base_dir)
+        return config
+
+    def reload(self) -> 'ResolvedPaths':
+        """
+        Resolve the file locations again from the current environment
+        """
+        self._paths = None
+        return self.paths
+
     @property
     def log_dir(self) -> Path:
         """
         get log path
         """
-        return Path(os.getenv(
-            'CALCULATOR_LOG_DIR',
-            str(self.base_dir / "logs")
-        )).resolve()
-    
+        return self.paths.log_dir
+
     @property
     def history_dir(self) -> Path:
         """
         get history folder path
         """
-        return Path(os.getenv(
-            'CALCULATOR_HISTORY_DIR',
-            str(self.base_dir / "history")
-        )).resolve()
-    
+        return self.paths.history_dir
+
     @property
     def history_file(self) -> Path:
         """
         get history file path
         """
-        return Path(os.getenv(
-            'CALCULATOR_HISTORY_FILE',
-            str(self.history_dir / "calculator_history.csv")
-        )).resolve()
-    
+        return self.paths.history_file
 
     @property
     def log_file(self) -> Path:
         """
         Get log file path for log entries
         """
-        return Path(os.getenv(
-            'CALCULATOR_LOG_FILE',
-            str(self.log_dir / "calculator.log")
-        )).resolve()
+        return self.paths.log_file
 
     def validate(self) -> None:
         """
@@ -117,6 +331,49 @@ class CalculatorConfig:
             raise ConfigurationError("precision must be positive")
         if self.max_input_value <= 0:
             raise ConfigurationError("max_input_value must be positive")
+        if self.max_versions <= 0:
+            raise ConfigurationError("max_versions must be positive")
+        if self.max_undo_depth <= 0:
+            raise ConfigurationError("max_undo_depth must be positive")
+        if self.segment_max_bytes < 0:
+            raise ConfigurationError("segment_max_bytes cannot be negative")
+        if self.segment_max_age_hours < 0:
+            raise ConfigurationError("segment_max_age_hours cannot be negative")
+        if self.history_compression not in ('gzip', 'bz2', 'xz', 'none'):
+            raise ConfigurationError("history_compression must be gzip, bz2, xz or none")
+        if self.log_level not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            raise ConfigurationError("log_level must be DEBUG, INFO, WARNING, ERROR or CRITICAL")
+        if self.log_max_bytes < 0:
+            raise ConfigurationError("log_max_bytes cannot be negative")
+        if self.log_backup_count < 0:
+            raise ConfigurationError("log_backup_count cannot be negative")
+        if self.log_batch_size <= 0:
+            raise ConfigurationError("log_batch_size must be positive")
+        if self.observer_queue_size <= 0:
+            raise ConfigurationError("observer_queue_size must be positive")
+        if self.observer_batch_size <= 0:
+            raise ConfigurationError("observer_batch_size must be positive")
+        if self.observer_backpressure not in ('block', 'drop_oldest', 'drop_newest'):
+            raise ConfigurationError("observer_backpressure must be block, drop_oldest or drop_newest")
+        if self.decimal_precision <= 0:
+            raise ConfigurationError("decimal_precision must be positive")
+        if self.decimal_rounding not in ROUNDING_MODES:
+            raise ConfigurationError(f"decimal_rounding must be one of {', '.join(ROUNDING_MODES)}")
+        for name in self.decimal_traps:
+            if name not in SIGNALS:
+                raise ConfigurationError(f"Unknown decimal trap: {name}")
+        if self.aggregate_bucket_minutes <= 0 or 1440 % self.aggregate_bucket_minutes:
+            raise ConfigurationError("aggregate_bucket_minutes must divide a day (1440 minutes)")
+        if self.verify_workers < 0:
+            raise ConfigurationError("verify_workers cannot be negative")
+        if self.verify_chunk_rows <= 0:
+            raise ConfigurationError("verify_chunk_rows must be positive")
+        if self.pool_max_calculators <= 0:
+            raise ConfigurationError("pool_max_calculators must be positive")
+        if self.pool_idle_seconds < 0:
+            raise ConfigurationError("pool_idle_seconds cannot be negative")
+        if self.result_cache_size < 0:
+            raise ConfigurationError("result_cache_size cannot be negative")
     
     
     
@@ -0,0 +1,85 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+from typing import Optional
+
+from app.calculator_config import CalculatorConfig
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+
+    The stock QueueHandler merges the message and its arguments before
+    queueing. Passing the record through untouched keeps that work off the
+    calling thread; the arguments logged here are not mutated afterwards.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class CalculatorLogging:
+    """
+    File logging configured from CalculatorConfig.
+
+    Records are put on an in-memory queue by the calling thread and written
+    by a QueueListener thread to a size-rotated log file, so writing a log
+    line never blocks a calculation on disk I/O.
+    """
+
+    def __init__(self, config: CalculatorConfig):
+        self.config = config
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = DeferredQueueHandler(self.queue)
+        self.listener: Optional[QueueListener] = None
+        self._previous_level: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self.listener is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.config.log_dir.mkdir(parents=True, exist_ok=True)
+        self.config.log_file.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            self.config.log_file,
+            maxBytes=self.config.log_max_bytes,
+            backupCount=self.config.log_backup_count,
+            encoding=self.config.default_encoding
+        )
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.listener = QueueListener(self.queue, file_handler)
+        self.listener.start()
+
+        root = logging.getLogger()
+        self._previous_level = root.level
+        root.setLevel(self.config.log_level)
+        root.addHandler(self.handler)
+
+    def stop(self) -> None:
+        """
+        Detach from the root logger and wait for queued records to be written
+        """
+        if not self.running:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        root.setLevel(self._previous_level)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+
+
+def setup_logging(config: CalculatorConfig) -> CalculatorLogging:
+    """
+    Start queued file logging for ``config`` and return it for shutdown
+    """
+    calculator_logging = CalculatorLogging(config)
+    calculator_logging.start()
+    return calculator_logging
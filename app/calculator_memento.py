@@ -1,8 +1,13 @@
 from dataclasses import dataclass, field
 import datetime
-from typing import Any, Dict, List
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from app.calculation import Calculation
+from app.history_versions import prefix
 
 
 @dataclass
@@ -13,13 +18,23 @@ class CalculatorMemento:
 
     history: List[Calculation]  # List of Calculation instances representing the calculator's history
     timestamp: datetime.datetime = field(default_factory=datetime.datetime.now)  # Time when the memento was created
+    length: Optional[int] = None  # Length of the saved state when history is a shared, still-growing list
+
+    def restore(self, following: List[Calculation]) -> List[Calculation]:
+        """
+        Rebuild the saved history. ``following`` is the history of the state
+        that came after this one, unused by a full snapshot.
+        """
+        if self.length is not None:
+            return prefix(self.history, self.length)
+        return self.history.copy()
 
     def to_dict(self) -> Dict[str, Any]:
         """
         Serializes memento into dictionary. Returns a dictionary containing the serialized state of the memento.
         """
         return {
-            'history': [calc.to_dict() for calc in self.history],
+            'history': [calc.to_dict() for calc in self.restore([])],
             'timestamp': self.timestamp.isoformat()
         }
 
@@ -32,3 +47,145 @@ class CalculatorMemento:
             history=[Calculation.from_dict(calc) for calc in data['history']],
             timestamp=datetime.datetime.fromisoformat(data['timestamp'])
         )
+
+
+@dataclass
+class DeltaMemento:
+    """
+    Memento storing only how a history differs from the history that followed
+    it: the length of the prefix both share and the calculations after it.
+    Pushing one for a new calculation is O(1) instead of a full history copy.
+    """
+
+    prefix_length: int  # Number of leading calculations shared with the following history
+    tail: List[Calculation] = field(default_factory=list)  # Calculations after the shared prefix
+    timestamp: datetime.datetime = field(default_factory=datetime.datetime.now)
+
+    def restore(self, following: List[Calculation]) -> List[Calculation]:
+        """
+        Rebuild the saved history from the history that came after it,
+        sharing the storage of the prefix
+        """
+        return prefix(following, self.prefix_length, self.tail)
+
+    @classmethod
+    def between(
+            cls,
+            history: List[Calculation],
+            following: List[Calculation],
+            prefix_length: Optional[int] = None
+    ) -> 'DeltaMemento':
+        """
+        Memento of ``history`` relative to ``following``. A known shared
+        prefix length skips the scan for it.
+        """
+        if prefix_length is None:
+            prefix_length = 0
+            for mine, theirs in zip(history, following):
+                if mine is not theirs:
+                    break
+                prefix_length += 1
+        return cls(prefix_length, history[prefix_length:])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes memento into dictionary
+        """
+        return {
+            'prefix_length': self.prefix_length,
+            'tail': [calc.to_dict() for calc in self.tail],
+            'timestamp': self.timestamp.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DeltaMemento':
+        """
+        Creates new memento from dictionary
+        """
+        return cls(
+            prefix_length=data['prefix_length'],
+            tail=[Calculation.from_dict(calc) for calc in data['tail']],
+            timestamp=datetime.datetime.fromisoformat(data['timestamp'])
+        )
+
+
+Memento = Union[CalculatorMemento, DeltaMemento]
+
+
+def memento_from_dict(data: Dict[str, Any]) -> Memento:
+    """
+    Recreate either kind of memento from its dictionary
+    """
+    if 'prefix_length' in data:
+        return DeltaMemento.from_dict(data)
+    return CalculatorMemento.from_dict(data)
+
+
+class UndoStore:
+    """
+    Undo and redo stacks persisted next to the history file.
+
+    Only delta mementos are stored, each relative to the state above it, with
+    the saved history as the base snapshot, so restoring costs time
+    proportional to the deltas rather than depth x history size. Stacks are
+    only restored onto the exact history they were saved with.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @classmethod
+    def for_history(cls, history_file: Path) -> 'UndoStore':
+        return cls(history_file.with_name(history_file.name + '.undo.json'))
+
+    @staticmethod
+    def _base(history: List[Calculation]) -> Dict[str, Any]:
+        return {
+            'length': len(history),
+            'last': history[-1].to_dict() if history else None
+        }
+
+    @staticmethod
+    def _deltas(stack: List[Memento], depth: int) -> List[Dict[str, Any]]:
+        """Top ``depth`` mementos of a stack, stopping below the first full snapshot"""
+        deltas = []
+        for memento in reversed(stack[-depth:] if depth else []):
+            if not isinstance(memento, DeltaMemento):
+                break
+            deltas.append(memento.to_dict())
+        deltas.reverse()
+        return deltas
+
+    def save(
+            self,
+            history: List[Calculation],
+            undo_stack: List[Memento],
+            redo_stack: List[Memento],
+            depth: int
+    ) -> None:
+        """
+        Atomically write the stacks, keeping at most ``depth`` entries of each
+        """
+        data = {
+            'base': self._base(history),
+            'undo': self._deltas(undo_stack, depth),
+            'redo': self._deltas(redo_stack, depth),
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def load(self, history: List[Calculation]) -> Optional[Tuple[List[Memento], List[Memento]]]:
+        """
+        The saved undo and redo stacks, or None if there are none for ``history``
+        """
+        if not self.path.exists():
+            return None
+        data = json.loads(self.path.read_text())
+        if data['base'] != self._base(history):
+            return None
+        return (
+            [memento_from_dict(m) for m in data['undo']],
+            [memento_from_dict(m) for m in data['redo']]
+        )
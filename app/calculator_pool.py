@@ -0,0 +1,168 @@
+from collections import OrderedDict
+import logging
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+from app.operations import Operation, OperationFactory
+from app.result_cache import ResultCache
+
+# Tenant ids become directory names
+_TENANT_ID = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+
+
+class CalculatorPool:
+    """
+    Calculators for many tenants in one process.
+
+    A tenant's calculator is created on first use, storing its history under
+    ``<base_dir>/tenants/<tenant>``. At most ``max_calculators`` stay open:
+    opening another saves and closes the least recently used one, as does
+    going unused for ``idle_seconds`` (if set). A closed tenant's calculator
+    is created again, from its saved history, when next used.
+
+    Operation instances and a result cache are shared by all calculators.
+    A calculator must only be used by one thread at a time; the pool itself
+    can be used from several.
+    """
+
+    def __init__(
+            self,
+            config: Optional[CalculatorConfig] = None,
+            max_calculators: Optional[int] = None,
+            idle_seconds: Optional[float] = None,
+            result_cache_size: Optional[int] = None,
+            setup: Optional[Callable[[str, Calculator], None]] = None,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        self.config = config or CalculatorConfig()
+        self.max_calculators = max_calculators or self.config.pool_max_calculators
+        self.idle_seconds = idle_seconds if idle_seconds is not None else self.config.pool_idle_seconds
+        cache_size = result_cache_size if result_cache_size is not None else self.config.result_cache_size
+        self.result_cache = ResultCache(cache_size) if cache_size else None
+        self.setup = setup  # Called with each new calculator, e.g. to add observers
+        self._clock = clock
+        self._calculators: 'OrderedDict[str, Calculator]' = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._operations: Dict[str, Operation] = {}
+        self._lock = threading.RLock()
+        self.created = 0
+        self.evicted = 0
+
+    @property
+    def root(self) -> Path:
+        return self.config.base_dir / 'tenants'
+
+    def tenant_dir(self, tenant: str) -> Path:
+        if not _TENANT_ID.fullmatch(tenant) or tenant.strip('.') == '':
+            raise ValidationError(f"Invalid tenant id: {tenant!r}")
+        return self.root / tenant
+
+    def get(self, tenant: str) -> Calculator:
+        """
+        The tenant's calculator, created (and its history loaded) if it is not open
+        """
+        with self._lock:
+            now = self._clock()
+            calculator = self._calculators.get(tenant)
+            if calculator is None:
+                calculator = self._open(tenant)
+            else:
+                self._calculators.move_to_end(tenant)
+            self._last_used[tenant] = now
+            self.evict_idle(now)
+            while len(self._calculators) > self.max_calculators:
+                self.evict(next(iter(self._calculators)))
+            return calculator
+
+    def _open(self, tenant: str) -> Calculator:
+        config = self.config.relocated(self.tenant_dir(tenant))
+        calculator = Calculator(config, result_cache=self.result_cache)
+        if self.setup is not None:
+            self.setup(tenant, calculator)
+        self._calculators[tenant] = calculator
+        self.created += 1
+        return calculator
+
+    def operation(self, name: str) -> Operation:
+        """Operation instance shared by every calculator of the pool"""
+        name = name.lower()
+        operation = self._operations.get(name)
+        if operation is None:
+            operation = self._operations[name] = OperationFactory.create_operation(name)
+        return operation
+
+    def calculate(self, tenant: str, operation: str, *operands):
+        """Run an operation on the tenant's calculator and return the result"""
+        with self._lock:
+            calculator = self.get(tenant)
+            calculator.set_operation(self.operation(operation))
+            return calculator.perform_operation(*operands)
+
+    def evict(self, tenant: str) -> bool:
+        """
+        Save and close the tenant's calculator; returns whether it was open.
+        It is closed even if saving fails (the error is logged, and the
+        write-ahead log, if enabled, still holds the unsaved calculations).
+        """
+        with self._lock:
+            calculator = self._calculators.pop(tenant, None)
+            self._last_used.pop(tenant, None)
+        if calculator is None:
+            return False
+        try:
+            calculator.flush_observers()
+            calculator.save_history()
+        except Exception as e:
+            logging.error(f"Could not save history of tenant {tenant}: {e}")
+        finally:
+            calculator.close()
+        self.evicted += 1
+        return True
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Save and close the calculators unused for ``idle_seconds``; returns how many"""
+        if not self.idle_seconds:
+            return 0
+        now = self._clock() if now is None else now
+        with self._lock:
+            idle = [tenant for tenant, used in self._last_used.items() if now - used >= self.idle_seconds]
+        return sum(self.evict(tenant) for tenant in idle)
+
+    def tenants(self) -> List[str]:
+        """Tenants with an open calculator, least recently used first"""
+        with self._lock:
+            return list(self._calculators)
+
+    def __len__(self) -> int:
+        return len(self._calculators)
+
+    def __contains__(self, tenant: str) -> bool:
+        return tenant in self._calculators
+
+    def close(self) -> None:
+        """Save and close every open calculator"""
+        for tenant in self.tenants():
+            self.evict(tenant)
+
+    def __enter__(self) -> 'CalculatorPool':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, int]:
+        cache = self.result_cache
+        return {
+            'open': len(self._calculators),
+            'created': self.created,
+            'evicted': self.evicted,
+            'cache_entries': len(cache) if cache is not None else 0,
+            'cache_hits': cache.hits if cache is not None else 0,
+            'cache_misses': cache.misses if cache is not None else 0,
+        }
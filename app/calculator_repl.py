@@ -1,133 +1,74 @@
 
 
-from decimal import Decimal
 import logging
+from typing import Optional
 
 from app.calculator import Calculator
-from app.exceptions import OperationError, ValidationError
-from app.history import AutoSaveObserver, LoggingObserver
-from app.operations import OperationFactory
+from app.calculator_config import CalculatorConfig
+from app.calculator_logging import setup_logging
+from app.history import AutoSaveObserver, LoggingObserver, StatisticsObserver
+from app.history_verifier import BackgroundVerification
+from app.profiling import Profiler
+from app.repl_commands import CommandRegistry, ReplSession, default_registry
 
-from colorama import init, Fore, Style
+from colorama import init, Fore
+
+try:
+    import readline
+except ImportError:  # pragma: no cover - not available on Windows
+    readline = None
 
 # Initialize colorama
 init(autoreset=True)
 
 
+def install_completion(registry: CommandRegistry) -> None:
+    """Complete command names with the tab key, where readline is available"""
+    if readline is None:
+        return
+    readline.set_completer(registry.complete)
+    readline.set_completer_delims(' \t|')
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
+
 
-def calculator_repl():
+def calculator_repl(registry: Optional[CommandRegistry] = None):
     """
     Command-line interface for the calculator.
     Implements a Read-Eval-Print Loop (REPL) for operations, history, undo/redo, and persistence.
+    Each line is dispatched through ``registry`` (the default commands if None),
+    so commands can be added without touching the loop.
     """
+    # Write log records from a background thread, set up before anything logs
+    calculator_logging = setup_logging(CalculatorConfig())
     try:
         # Initialize calculator
         calc = Calculator()
 
         # Add observers for logging and auto-saving
-        calc.add_observer(LoggingObserver())
+        logging_observer = LoggingObserver(batch_size=calculator_logging.config.log_batch_size)
+        calc.add_observer(logging_observer)
         calc.add_observer(AutoSaveObserver(calc))
+        # Seeded with the loaded history, then kept current as calculations run
+        statistics_observer = StatisticsObserver()
+        statistics_observer.update_batch(calc.history)
+        calc.add_observer(statistics_observer)
+        profiler = Profiler(calc)
+
+        registry = registry or default_registry()
+        session = ReplSession(calc, registry, statistics_observer.statistics, profiler)
+        install_completion(registry)
+        if calc.config.verify_on_startup:
+            # Checks the saved history while commands are already taken
+            session.verification = BackgroundVerification.for_config(calc.config)
 
         print(Fore.GREEN+f"Calculator started. Type 'help' for commands.")
 
-        while True:
+        while session.running:
             try:
-                command = input(Fore.GREEN+f"\nEnter command: ").lower().strip()
-
-                if command == 'help':
-                    print(Fore.GREEN+f"\nAvailable commands:")
-                    print(Fore.GREEN+f"  add, subtract, multiply, divide, power, root - Perform calculations")
-                    print(Fore.GREEN+f"  history - Show calculation history")
-                    print(Fore.GREEN+f"  clear - Clear calculation history")
-                    print(Fore.GREEN+f"  undo - Undo the last calculation")
-                    print(Fore.GREEN+f"  redo - Redo the last undone calculation")
-                    print(Fore.GREEN+f"  save - Save calculation history to file")
-                    print(Fore.GREEN+f"  load - Load calculation history from file")
-                    print(Fore.GREEN+f"  exit - Exit the calculator")
-                    continue
-
-                if command == 'exit':
-                    try:
-                        calc.save_history()
-                        print(Fore.GREEN+f"History saved successfully.")
-                    except Exception as e:
-                        print(Fore.YELLOW + f"Warning: Could not save history: {e}")
-                    print("Goodbye!")
-                    break
-
-                if command == 'history':
-                    history = calc.show_history()
-                    if not history:
-                        print(Fore.RED + f"No calculations in history")
-                    else:
-                        print(Fore.GREEN+f"\nCalculation History:")
-                        for i, entry in enumerate(history, 1):
-                            print(Fore.BLUE+f"{i}. {entry}")
-                    continue
-
-                if command == 'clear':
-                    calc.clear_history()
-                    print(Fore.GREEN+f"History cleared")
-                    continue
-
-                if command == 'undo':
-                    if calc.undo():
-                        print(Fore.YELLOW+f"Operation undone")
-                    else:
-                        print(Fore.YELLOW+f"Nothing to undo")
-                    continue
-
-                if command == 'redo':
-                    if calc.redo():
-                        print(Fore.YELLOW+f"Operation redone")
-                    else:
-                        print(Fore.YELLOW+f"Nothing to redo")
-                    continue
-
-                if command == 'save':
-                    try:
-                        calc.save_history()
-                        print(Fore.GREEN+f"History saved successfully")
-                    except Exception as e:
-                        print(Fore.RED+f"Error saving history: {e}")
-                    continue
-
-                if command == 'load':
-                    try:
-                        calc.load_history()
-                        print(Fore.GREEN+f"History loaded successfully")
-                    except Exception as e:
-                        print(Fore.RED+f"Error loading history: {e}")
-                    continue
-
-                if command in ['add', 'subtract', 'multiply', 'divide', 'power', 'root', 'integerdivision', 'modulus', 'percentage', 'absolutedifference']:
-                    print("\nEnter numbers (or 'cancel' to abort):")
-                    a = input(Fore.CYAN +f"First number: " + Style.RESET_ALL)
-                    if a.lower() == 'cancel':
-                        print(Fore.YELLOW+f"Operation cancelled")
-                        continue
-                    b = input(Fore.CYAN+f"Second number: "+ Style.RESET_ALL)
-                    if b.lower() == 'cancel':
-                        print(Fore.YELLOW+f"Operation cancelled")
-                        continue
-
-                    try:
-                        operation = OperationFactory.create_operation(command)
-                        calc.set_operation(operation)
-                        result = calc.perform_operation(a, b)
-
-                        # Normalize Decimal result
-                        if isinstance(result, Decimal):
-                            result = result.normalize()
-
-                        print(Fore.GREEN+f"\nResult: {result}")
-                    except (ValidationError, OperationError) as e:
-                        print(Fore.RED+f"Error: {e}")
-                    except Exception as e:
-                        print(Fore.RED+f"Unexpected error: {e}")
-                    continue
-
-                print(Fore.YELLOW+f"Unknown command: '{command}'. Type 'help' for available commands.")
+                registry.dispatch(session, input(Fore.GREEN+f"\nEnter command: ").strip())
 
             except (KeyboardInterrupt, EOFError):
                 print(Fore.RED+f"\nOperation cancelled or input terminated. Exiting...")
@@ -136,7 +77,12 @@ def calculator_repl():
                 print(Fore.RED+f"Error: {e}")
                 continue
 
+        calc.flush_observers()
+        logging_observer.flush()
+
     except Exception as e:
         print(Fore.RED+f"Fatal error: {e}")
         logging.error(f"Fatal error in calculator REPL: {e}")
         raise
+    finally:
+        calculator_logging.stop()
@@ -0,0 +1,84 @@
+import decimal
+from decimal import Context, Decimal, InvalidOperation
+import threading
+from typing import Dict, Iterable, List
+
+# Rounding modes and signals accepted in configuration, by name
+ROUNDING_MODES = (
+    'ROUND_CEILING', 'ROUND_DOWN', 'ROUND_FLOOR', 'ROUND_HALF_DOWN',
+    'ROUND_HALF_EVEN', 'ROUND_HALF_UP', 'ROUND_UP', 'ROUND_05UP',
+)
+SIGNALS = (
+    'Clamped', 'DivisionByZero', 'Inexact', 'InvalidOperation',
+    'Overflow', 'Rounded', 'Subnormal', 'Underflow',
+)
+
+# Quantizers 1, 0.1, 0.01, ... built once; formatting used to rebuild the
+# exponent from a string for every value
+_QUANTIZERS: Dict[int, Decimal] = {places: Decimal(1).scaleb(-places) for places in range(29)}
+
+
+def quantizer(places: int) -> Decimal:
+    """
+    Decimal with exponent -``places``, for quantizing to that many decimal places
+    """
+    q = _QUANTIZERS.get(places)
+    if q is None:
+        q = _QUANTIZERS[places] = Decimal(1).scaleb(-places)
+    return q
+
+
+def format_decimal(value: Decimal, places: int) -> str:
+    """
+    ``value`` rounded to ``places`` decimal places without trailing zeros
+    """
+    try:
+        return str(value.quantize(quantizer(places)).normalize())
+    except InvalidOperation:  # More digits than the context precision
+        return str(value)
+
+
+class CalculatorContext:
+    """
+    Decimal context (precision, rounding, traps) that calculations run in.
+
+    Entering installs the context for the current thread and exiting puts
+    the previous one back. Unlike decimal.localcontext no copy is made, so
+    entering it around every operation is cheap. Contexts to put back are
+    kept per thread, so threads may enter the same instance concurrently.
+    """
+
+    def __init__(
+            self,
+            precision: int = 28,
+            rounding: str = 'ROUND_HALF_EVEN',
+            traps: Iterable[str] = ('InvalidOperation', 'DivisionByZero', 'Overflow')
+    ):
+        self.context = Context(
+            prec=precision,
+            rounding=getattr(decimal, rounding),
+            traps=[getattr(decimal, name) for name in traps]
+        )
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config) -> 'CalculatorContext':
+        return cls(config.decimal_precision, config.decimal_rounding, config.decimal_traps)
+
+    @property
+    def _saved(self) -> List[Context]:
+        """Contexts this thread entered from, innermost last"""
+        try:
+            return self._local.saved
+        except AttributeError:
+            saved = self._local.saved = []
+            return saved
+
+    def __enter__(self) -> Context:
+        self._saved.append(decimal.getcontext())
+        decimal.setcontext(self.context)
+        return self.context
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        decimal.setcontext(self._saved.pop())
+
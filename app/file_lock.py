@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Advisory inter-process lock backed by a sidecar ``.lock`` file.
+
+    Used as a context manager around reads and writes of files shared by
+    several calculator processes. Shared locks allow concurrent readers,
+    exclusive locks serialize writers. Non-blocking locks are used to check
+    whether another live process still owns a file.
+    """
+
+    def __init__(self, path: Union[str, Path], shared: bool = False, blocking: bool = True):
+        target = Path(path)
+        self.lock_path = target.with_name(target.name + ".lock")
+        self.shared = shared
+        self.blocking = blocking
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """
+        Take the lock, waiting for it unless the lock is non-blocking.
+        Returns whether the lock is held.
+        """
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                mode = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+                fcntl.flock(self._fd, mode if self.blocking else mode | fcntl.LOCK_NB)
+            else:  # pragma: no cover - Windows has no shared locks
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK if self.blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(self._fd)
+            self._fd = None
+            if self.blocking:
+                raise
+            return False
+        return True
+
+    def release(self) -> None:
+        """
+        Release the lock if it is held
+        """
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
@@ -1,24 +1,78 @@
 from abc import ABC, abstractmethod
 import logging
-from typing import Any
+from typing import Any, List, Optional
 from app.calculation import Calculation
+from app.rational import to_decimal
+from app.streaming_stats import StreamingStatistics
+
+logger = logging.getLogger(__name__)
 
 
 class HistoryObserver(ABC):
+    # Observers setting this are notified in batches from a background thread
+    asynchronous = False
+
     @abstractmethod
     def update(self, calculation: Calculation):
         """Handle new calculation"""
         pass # pragma: no cover
 
+    def update_batch(self, calculations: List[Calculation]) -> None:
+        """Handle several new calculations; override to handle them at once"""
+        for calculation in calculations:
+            self.update(calculation)
+
 class LoggingObserver(HistoryObserver):
-    """Observer that logs calculations to file"""
+    """
+    Observer that logs calculations to file.
+
+    Nothing is formatted unless INFO is enabled, and then only by the
+    handler. With a batch size above one, calculations are buffered and
+    logged as one record per batch; ``flush`` logs a partial batch.
+    """
+    asynchronous = True
+
+    def __init__(self, batch_size: int = 1):
+        self.batch_size = batch_size
+        self._pending: List[Calculation] = []
+
     def update(self, calculation: Calculation) -> None:
         if calculation is None:
             raise AttributeError("Calculation cannont be none")
-        logging.info(
-            f"Calculation performed: {calculation.operation} "
-            f"({calculation.operand1}, {calculation.operand2}) = "
-            f"{calculation.result}"
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        if self.batch_size <= 1:
+            if calculation.extra_operands:
+                logger.info(
+                    "Calculation performed: %s (%s) = %s",
+                    calculation.operation, ', '.join(map(str, calculation.operands)), calculation.result
+                )
+                return
+            logger.info(
+                "Calculation performed: %s (%s, %s) = %s",
+                calculation.operation, calculation.operand1, calculation.operand2, calculation.result
+            )
+            return
+        self._pending.append(calculation)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Log the buffered calculations as one record"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        logger.info("Calculations performed: %s", _CalculationBatch(batch))
+
+
+class _CalculationBatch:
+    """Formats a batch of calculations lazily, when the record is written"""
+    def __init__(self, calculations: List[Calculation]):
+        self.calculations = calculations
+
+    def __str__(self) -> str:
+        return "; ".join(
+            f"{c.operation} ({', '.join(map(str, c.operands))}) = {c.result}" for c in self.calculations
         )
 
 class AutoSaveObserver(HistoryObserver):
@@ -34,4 +88,17 @@ class AutoSaveObserver(HistoryObserver):
             raise AttributeError("Calculation cannot be None")
         if self.calculator.config.auto_save:
             self.calculator.save_history()
-            logging.info("History auto-saved")
\ No newline at end of file
+            logging.info("History auto-saved")
+
+class StatisticsObserver(HistoryObserver):
+    """
+    Observer keeping streaming statistics of calculation results. It counts
+    every calculation it sees, so undone calculations stay counted.
+    """
+    def __init__(self, statistics: Optional[StreamingStatistics] = None):
+        self.statistics = statistics or StreamingStatistics()
+
+    def update(self, calculation: Calculation) -> None:
+        if calculation is None:
+            raise AttributeError("Calculation cannot be None")
+        self.statistics.add(to_decimal(calculation.result), calculation.operation)
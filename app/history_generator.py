@@ -0,0 +1,241 @@
+import argparse
+from datetime import datetime, timedelta
+from decimal import Decimal
+import bz2
+import gzip
+import itertools
+import lzma
+from pathlib import Path
+import random
+from typing import Any, Dict, IO, Iterator, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+
+from app.calculation import Calculation
+from app.decimal_context import CalculatorContext
+from app.exceptions import OperationError
+from app.history_segments import COMPRESSION_SUFFIXES, HISTORY_COLUMNS, HistorySegments
+from app.operations import OperationFactory
+
+# On-disk layouts a history can be generated in: a single CSV file, a CSV
+# without the extra_operands column as older versions wrote it, or archived
+# compressed segments with a manifest, as rotation leaves them
+FORMATS = ('csv', 'legacy', 'segments')
+
+# Rows held in memory at once while writing
+CHUNK_ROWS = 10_000
+
+_OPENERS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+class Magnitudes(NamedTuple):
+    """Shape of generated operands"""
+    min_digits: int = 1  # Digits before the decimal point
+    max_digits: int = 6
+    places: int = 2  # Digits after it
+    negative_share: float = 0.1
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse an operation mix such as ``add=3,divide=1`` into weights
+    """
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        try:
+            mix[name.strip().lower()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name}: {weight}")
+    return mix
+
+
+class HistoryGenerator:
+    """
+    Synthetic calculation histories for load tests and benchmarks.
+
+    Operations are drawn by weight from ``mix`` (every known operation
+    equally by default) with operands shaped by ``magnitudes``, and results
+    computed by the operations themselves, so generated rows load and verify
+    like saved ones. The same seed gives the same history. Rows are produced
+    one at a time and written in chunks, so memory stays constant however
+    many are generated.
+    """
+
+    def __init__(
+            self,
+            mix: Optional[Dict[str, float]] = None,
+            magnitudes: Magnitudes = Magnitudes(),
+            seed: int = 1,
+            start: datetime = datetime(2024, 1, 1),
+            interval: timedelta = timedelta(seconds=1),
+            max_operands: int = 6,
+            context: Optional[CalculatorContext] = None
+    ):
+        mix = mix or {name: 1.0 for name in OperationFactory.names()}
+        if not any(weight > 0 for weight in mix.values()) or any(weight < 0 for weight in mix.values()):
+            raise ValueError("Operation weights must be non-negative and not all zero")
+        if not 1 <= magnitudes.min_digits <= magnitudes.max_digits or magnitudes.places < 0:
+            raise ValueError(f"Invalid operand magnitudes: {magnitudes}")
+        if max_operands < 2:
+            raise ValueError("max_operands must be at least 2")
+        self.operations = [(name, OperationFactory.create_operation(name)) for name in mix]
+        self.cum_weights = list(itertools.accumulate(mix.values()))
+        self.magnitudes = magnitudes
+        # Integer range of the unscaled operand, for each number of digits
+        self._ranges = [
+            (10 ** (digits + magnitudes.places - 1), 10 ** (digits + magnitudes.places))
+            for digits in range(magnitudes.min_digits, magnitudes.max_digits + 1)
+        ]
+        self.seed = seed
+        self.start = start
+        self.interval = interval
+        self.max_operands = max_operands
+        self.context = context or CalculatorContext()
+
+    @property
+    def binary_only(self) -> bool:
+        return all(getattr(operation, 'arity', 2) == 2 for _, operation in self.operations)
+
+    def _number(self, rng: random.Random) -> Decimal:
+        m = self.magnitudes
+        low, high = self._ranges[int(rng.random() * len(self._ranges))]
+        if high < 2 ** 53:
+            value = Decimal(low + int(rng.random() * (high - low))).scaleb(-m.places)
+        else:
+            value = Decimal(rng.randrange(low, high)).scaleb(-m.places)
+        return -value if rng.random() < m.negative_share else value
+
+    def _operands(self, rng: random.Random, name: str, arity: Optional[int]) -> List[Decimal]:
+        # Shapes that keep the operations with narrow domains valid
+        if name == 'power':
+            return [self._number(rng), Decimal(rng.randint(0, 8))]
+        if name == 'root':
+            return [abs(self._number(rng)), Decimal(rng.randint(2, 5))]
+        if name == 'modpow':
+            limit = 10 ** self.magnitudes.max_digits
+            return [Decimal(rng.randrange(limit)), Decimal(rng.randrange(limit)), Decimal(rng.randrange(2, limit + 2))]
+        count = arity if arity is not None else rng.randint(2, self.max_operands)
+        return [self._number(rng) for _ in range(count)]
+
+    def calculations(self, count: int) -> Iterator[Calculation]:
+        rng = random.Random(self.seed)
+        timestamp = self.start
+        for _ in range(count):
+            name, operation = rng.choices(self.operations, cum_weights=self.cum_weights)[0]
+            arity = getattr(operation, 'arity', 2)
+            for _ in range(10):
+                operands = self._operands(rng, name, arity)
+                try:
+                    with self.context:
+                        result = operation.execute(*operands)
+                    break
+                except (OperationError, ArithmeticError):
+                    continue  # Division by zero and the like; draw other operands
+            else:
+                raise OperationError(f"Could not generate valid operands for {name}")
+            yield Calculation(name, operands[0], operands[1], result, timestamp, tuple(operands[2:]))
+            timestamp += self.interval
+
+    def rows(self, count: int) -> Iterator[Dict[str, Any]]:
+        for calculation in self.calculations(count):
+            yield calculation.to_dict()
+
+    def write(
+            self,
+            path: Path,
+            count: int,
+            format: str = 'csv',
+            compression: str = 'gzip',
+            segment_rows: int = 100_000
+    ) -> List[Path]:
+        """
+        Write ``count`` calculations to ``path`` in ``format``. For segments,
+        full segments of ``segment_rows`` are archived with ``compression``
+        and the rest left in ``path`` as the active segment. Returns the
+        files written. A path that already holds a history (the file, its
+        manifest or archived segments) is refused rather than mixed into.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown history format: {format}")
+        if format == 'legacy' and not self.binary_only:
+            raise ValueError("The legacy format only holds operations of two operands")
+        segments = HistorySegments(path, compression=compression)
+        if path.exists() or segments.manifest_path.exists():
+            raise FileExistsError(f"{path} already holds a history; remove it first")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rows = self.rows(count)
+        if format != 'segments':
+            columns = HISTORY_COLUMNS[:-1] if format == 'legacy' else HISTORY_COLUMNS
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                write_chunks(f, rows, count, columns)
+            return [path]
+
+        written = []
+        remaining = count
+        while remaining > segment_rows:
+            segment = segments.next_segment_path()
+            with open_segment(segment, compression) as f:
+                first, last = write_chunks(f, rows, segment_rows, HISTORY_COLUMNS)
+            segments.add_segment(segment, segment_rows, first, last)
+            written.append(segment)
+            remaining -= segment_rows
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            write_chunks(f, rows, remaining, HISTORY_COLUMNS)
+        return written + [path]
+
+
+def open_segment(path: Path, compression: str) -> IO[str]:
+    opener = _OPENERS.get(compression)
+    if opener is None:
+        return open(path, 'w', encoding='utf-8', newline='')
+    return opener(path, 'wt', encoding='utf-8', newline='')
+
+
+def write_chunks(f: IO[str], rows: Iterator[Dict[str, Any]], count: int, columns: Sequence[str]):
+    """
+    Write the next ``count`` rows to ``f`` as CSV with a header, at most
+    CHUNK_ROWS in memory at a time. Returns the first and last timestamps.
+    """
+    first = last = None
+    header = True
+    while count > 0 or header:
+        chunk = [next(rows) for _ in range(min(count, CHUNK_ROWS))]
+        count -= len(chunk)
+        if chunk:
+            first = first or chunk[0]['timestamp']
+            last = chunk[-1]['timestamp']
+        pd.DataFrame(chunk, columns=columns).to_csv(f, header=header, index=False)
+        header = False
+    return first, last
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Generate a synthetic history file, e.g.
+
+    python -m app.history_generator history.csv --rows 1000000 --mix add=3,divide=1 --format segments
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic calculation history")
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--mix', type=parse_mix, help="operation weights, e.g. add=3,divide=1 (default: all equally)")
+    parser.add_argument('--digits', type=int, nargs=2, default=(1, 6), metavar=('MIN', 'MAX'),
+                        help="digits before the decimal point")
+    parser.add_argument('--places', type=int, default=2, help="digits after the decimal point")
+    parser.add_argument('--negative', type=float, default=0.1, help="share of negative operands")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_SUFFIXES), default='gzip')
+    parser.add_argument('--segment-rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    generator = HistoryGenerator(
+        args.mix, Magnitudes(args.digits[0], args.digits[1], args.places, args.negative), seed=args.seed
+    )
+    for path in generator.write(args.path, args.rows, args.format, args.compression, args.segment_rows):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
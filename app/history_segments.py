@@ -0,0 +1,280 @@
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.exceptions import ConfigurationError
+
+# extra_operands is empty for binary operations, and absent from older files
+HISTORY_COLUMNS = ['operation', 'operand1', 'operand2', 'result', 'timestamp', 'extra_operands']
+
+# File suffix for each supported segment codec
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'none': ''}
+
+RowKey = Tuple[str, ...]
+
+
+def compression_for(path: Path) -> Optional[str]:
+    """
+    Codec name pandas should use for a segment file, from its suffix
+    """
+    for codec, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and path.name.endswith(suffix):
+            return codec
+    return None
+
+
+def row_key(row: Dict[str, Any]) -> RowKey:
+    """
+    Identity of a history row, used to deduplicate rows written by several processes
+    """
+    return tuple(str(row.get(column, '')) for column in HISTORY_COLUMNS)
+
+
+def read_rows(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read the rows of a (possibly compressed) history CSV, as strings
+    """
+    if not path.exists():
+        return []
+    try:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return []
+    if df.empty:
+        return []
+    if 'extra_operands' not in df.columns:
+        return df[HISTORY_COLUMNS[:-1]].to_dict('records')
+    rows = df[HISTORY_COLUMNS].to_dict('records')
+    # Rows read back match Calculation.to_dict, which leaves out empty extras
+    for row in rows:
+        if not row['extra_operands']:
+            del row['extra_operands']
+    return rows
+
+
+def merge_rows(*groups: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge groups of rows into one list without duplicates, oldest first
+    """
+    seen: Set[RowKey] = set()
+    merged = []
+    for rows in groups:
+        for row in rows:
+            key = row_key(row)
+            if key not in seen:
+                seen.add(key)
+                merged.append(row)
+    merged.sort(key=lambda row: row['timestamp'])
+    return merged
+
+
+def write_rows(path: Path, rows: List[Dict[str, Any]], **to_csv_kwargs: Any) -> None:
+    """
+    Atomically replace ``path`` with ``rows``: write a temporary file in the
+    same directory, then rename it over the target.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    os.close(fd)
+    try:
+        pd.DataFrame(rows, columns=HISTORY_COLUMNS).to_csv(temp_path, index=False, **to_csv_kwargs)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class HistorySegments:
+    """
+    Archived segments of a history file.
+
+    The history file itself is the small active segment new rows are appended
+    to. Once it grows past ``max_bytes`` (or its oldest row is older than
+    ``max_age_hours``) it is compressed into a numbered segment next to it and
+    recorded in a JSON manifest, which lets loads open only the newest
+    segments. Callers hold the history file lock around every method.
+    """
+
+    def __init__(
+            self,
+            history_file: Path,
+            max_bytes: int = 0,
+            max_age_hours: float = 0,
+            compression: str = 'gzip'
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ConfigurationError(f"Unsupported history compression: {compression}")
+        self.history_file = history_file
+        self.max_bytes = max_bytes
+        self.max_age_hours = max_age_hours
+        self.compression = compression
+        self.manifest_path = history_file.with_name(history_file.name + '.manifest.json')
+        self._manifest: Dict[str, Any] = {'next_sequence': 1, 'segments': []}
+        self._manifest_mtime: Optional[float] = None
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """
+        Current manifest, re-read only when another process changed it
+        """
+        try:
+            mtime = self.manifest_path.stat().st_mtime
+        except FileNotFoundError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            self._manifest = json.loads(self.manifest_path.read_text())
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def segment_paths(self) -> List[Path]:
+        """
+        All archived segment files, oldest first
+        """
+        return [self.history_file.with_name(s['file']) for s in self.manifest['segments']]
+
+    def paths_for(self, max_rows: Optional[int] = None) -> List[Path]:
+        """
+        The newest archived segments needed to hold ``max_rows`` rows
+        (together with the active segment), oldest first
+        """
+        segments = self.manifest['segments']
+        if not segments or max_rows is None:
+            return self.segment_paths()
+        needed = max_rows - self._active_rows()
+        selected = []
+        for segment in reversed(segments):
+            if needed <= 0:
+                break
+            selected.append(self.history_file.with_name(segment['file']))
+            needed -= segment['rows']
+        return list(reversed(selected))
+
+    def _active_rows(self) -> int:
+        if not self.history_file.exists():
+            return 0
+        with open(self.history_file, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+
+    def should_rotate(self) -> bool:
+        """
+        Whether the active segment is due to be archived
+        """
+        try:
+            size = self.history_file.stat().st_size
+        except FileNotFoundError:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        if self.max_age_hours and size:
+            oldest = self._oldest_active_timestamp()
+            return oldest is not None and datetime.now() - oldest >= timedelta(hours=self.max_age_hours)
+        return False
+
+    def _oldest_active_timestamp(self) -> Optional[datetime]:
+        with open(self.history_file, encoding='utf-8') as f:
+            header = f.readline().strip().split(',')
+            first = f.readline().strip().split(',')
+        if len(first) != len(header) or 'timestamp' not in header:
+            return None
+        try:
+            return datetime.fromisoformat(first[header.index('timestamp')])
+        except ValueError:
+            return None
+
+    def rotate(self) -> Optional[Path]:
+        """
+        Archive the active segment into a compressed segment and start a new one
+        """
+        rows = merge_rows(read_rows(self.history_file))
+        if not rows:
+            return None
+        path = self._write_segment(rows)
+        self.history_file.unlink()
+        logging.info(f"Rotated {len(rows)} history rows into {path.name}")
+        return path
+
+    def _write_segment(self, rows: List[Dict[str, Any]]) -> Path:
+        path = self.next_segment_path()
+        write_rows(path, rows, compression=compression_for(path))
+        self.add_segment(path, len(rows), rows[0]['timestamp'], rows[-1]['timestamp'])
+        return path
+
+    def next_segment_path(self) -> Path:
+        """
+        File the next archived segment is written to
+        """
+        name = f"{self.history_file.stem}.{self.manifest['next_sequence']:06d}{self.history_file.suffix}"
+        return self.history_file.with_name(name + COMPRESSION_SUFFIXES[self.compression])
+
+    def add_segment(self, path: Path, rows: int, first: str, last: str) -> None:
+        """
+        Record a segment written to ``next_segment_path()`` in the manifest
+        """
+        manifest = self.manifest
+        manifest['segments'].append({'file': path.name, 'rows': rows, 'first': first, 'last': last})
+        manifest['next_sequence'] += 1
+        self._save_manifest(manifest)
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.manifest_path.parent, prefix=self.manifest_path.name, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+        self._manifest = manifest
+        self._manifest_mtime = self.manifest_path.stat().st_mtime
+
+    def remove_rows(self, keys: Set[RowKey]) -> None:
+        """
+        Drop rows from the archived segments holding them
+        """
+        if not keys:
+            return
+        manifest = self.manifest
+        for segment in list(manifest['segments']):
+            path = self.history_file.with_name(segment['file'])
+            rows = read_rows(path)
+            kept = [row for row in rows if row_key(row) not in keys]
+            if len(kept) == len(rows):
+                continue
+            if kept:
+                write_rows(path, kept, compression=compression_for(path))
+                segment.update(rows=len(kept), first=kept[0]['timestamp'], last=kept[-1]['timestamp'])
+            else:
+                path.unlink()
+                manifest['segments'].remove(segment)
+        self._save_manifest(manifest)
+
+    def clear(self) -> int:
+        """
+        Delete every archived segment and start an empty manifest; sequence
+        numbers keep counting up. Returns how many segments were deleted.
+        """
+        manifest = self.manifest
+        paths = self.segment_paths()
+        for path in paths:
+            path.unlink(missing_ok=True)
+        if paths or self.manifest_path.exists():
+            self._save_manifest({'next_sequence': manifest['next_sequence'], 'segments': []})
+        return len(paths)
+
+    def compact(self) -> int:
+        """
+        Merge all archived segments into a single deduplicated segment.
+        Returns the number of rows in the compacted segment.
+        """
+        old_paths = self.segment_paths()
+        if len(old_paths) < 2:
+            return sum(s['rows'] for s in self.manifest['segments'])
+        rows = merge_rows(*(read_rows(path) for path in old_paths))
+        manifest = self.manifest
+        manifest['segments'] = []
+        self._write_segment(rows)
+        for path in old_paths:
+            path.unlink()
+        logging.info(f"Compacted {len(old_paths)} history segments into one of {len(rows)} rows")
+        return len(rows)
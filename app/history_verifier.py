@@ -0,0 +1,252 @@
+import argparse
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+import io
+import logging
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.calculation import Calculation
+from app.calculator_config import CalculatorConfig
+from app.decimal_context import CalculatorContext
+from app.exceptions import OperationError
+from app.file_lock import FileLock
+from app.history_segments import HISTORY_COLUMNS, HistorySegments, compression_for
+
+# Precision, rounding and traps, as CalculatorContext takes them
+ContextSettings = Tuple[int, str, Sequence[str]]
+
+# Rows of a chunk: the file they came from, the number of the first row and the rows
+Chunk = Tuple[str, int, List[Dict[str, Any]]]
+
+
+def context_settings(config: Any) -> ContextSettings:
+    """The configured Decimal context, in a form worker processes can be sent"""
+    return config.decimal_precision, config.decimal_rounding, tuple(config.decimal_traps)
+
+
+class Mismatch(NamedTuple):
+    """A history row whose saved result is not what its operation computes"""
+    file: str
+    row: int  # 1-based, not counting the header
+    operation: str
+    saved: str
+    computed: str  # Or why the row could not be checked
+
+
+class VerificationReport(NamedTuple):
+    files: int
+    rows: int
+    mismatches: List[Mismatch]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def lines(self, limit: int = 20) -> List[str]:
+        """
+        Human readable summary, listing the first ``limit`` mismatches
+        """
+        lines = [f"Verified {self.rows} rows in {self.files} files in {self.seconds:.2f}s: "
+                 f"{len(self.mismatches) or 'no'} mismatches"]
+        for m in self.mismatches[:limit]:
+            lines.append(f"  {m.file} row {m.row}: {m.operation} saved {m.saved}, computed {m.computed}")
+        if len(self.mismatches) > limit:
+            lines.append(f"  ... and {len(self.mismatches) - limit} more")
+        return lines
+
+
+def check_chunk(chunk: Chunk, settings: ContextSettings) -> Tuple[int, List[Mismatch]]:
+    """
+    Recompute the rows of a chunk as loading does, returning how many were
+    checked and those whose saved result differs. Runs in worker processes.
+    """
+    name, first_row, rows = chunk
+    mismatches = []
+    with CalculatorContext(*settings):
+        for number, row in enumerate(rows, first_row):
+            operation = row.get('operation', '')
+            saved = row.get('result', '')
+            try:
+                calculation = Calculation.parse(row)
+                computed = calculation.recompute()
+            except (OperationError, ArithmeticError) as e:
+                mismatches.append(Mismatch(name, number, operation, saved, f"error: {e}"))
+                continue
+            if calculation.result != computed:
+                mismatches.append(Mismatch(name, number, operation, saved, str(computed)))
+    return len(rows), mismatches
+
+
+def history_files(history_file: Path) -> List[Path]:
+    """Archived segments, oldest first, then the active history file"""
+    paths = HistorySegments(history_file).segment_paths()
+    if history_file.exists():
+        paths.append(history_file)
+    return paths
+
+
+def open_history_files(history_file: Path) -> List[Tuple[Path, BinaryIO]]:
+    """
+    The files ``history_files`` lists, opened under the shared history lock
+    so a concurrent save cannot change which files there are mid-read.
+    Archived segments are replaced rather than changed in place, so their
+    handles keep what was opened; the small active file, which saves append
+    to, is read whole.
+    """
+    if not history_file.parent.exists():
+        return []
+    files = []
+    with FileLock(history_file, shared=True):
+        for path in history_files(history_file):
+            f = open(path, 'rb')
+            if path == history_file:
+                with f:
+                    f = io.BytesIO(f.read())
+            files.append((path, f))
+    return files
+
+
+def read_chunks(files: Sequence[Tuple[Path, BinaryIO]], chunk_rows: int) -> Iterator[Chunk]:
+    """Rows of each file in chunks, so no file is held in memory whole"""
+    for path, f in files:
+        first_row = 1
+        try:
+            reader = pd.read_csv(
+                f, dtype=str, keep_default_na=False, chunksize=chunk_rows, compression=compression_for(path)
+            )
+            for df in reader:
+                columns = [column for column in HISTORY_COLUMNS if column in df.columns]
+                rows = df[columns].to_dict('records')
+                yield path.name, first_row, rows
+                first_row += len(rows)
+        except pd.errors.EmptyDataError:
+            continue
+
+
+def verify_history(
+        history_file: Path,
+        settings: ContextSettings = (28, 'ROUND_HALF_EVEN', ('InvalidOperation', 'DivisionByZero', 'Overflow')),
+        workers: int = 0,
+        chunk_rows: int = 10_000,
+        progress: Optional[Dict[str, int]] = None
+) -> VerificationReport:
+    """
+    Check every row of a history file and its archived segments against
+    what its operation computes, in chunks spread over ``workers``
+    processes (one per CPU if 0; 1 checks in this process). At most two
+    chunks per worker are read ahead. ``progress['rows']`` counts the rows
+    checked so far.
+    """
+    started = time.perf_counter()
+    files = open_history_files(history_file)
+    paths = [path for path, _ in files]
+    workers = workers or os.cpu_count() or 1
+    progress = progress if progress is not None else {}
+    progress['rows'] = 0
+    mismatches: List[Mismatch] = []
+
+    def collect(result: Tuple[int, List[Mismatch]]) -> None:
+        count, found = result
+        progress['rows'] += count
+        mismatches.extend(found)
+
+    chunks = read_chunks(files, chunk_rows)
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                collect(check_chunk(chunk, settings))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending: List[Future] = []
+                for chunk in chunks:
+                    pending.append(pool.submit(check_chunk, chunk, settings))
+                    if len(pending) >= 2 * workers:
+                        collect(pending.pop(0).result())
+                for future in pending:
+                    collect(future.result())
+    finally:
+        for _, f in files:
+            f.close()
+
+    order = {path.name: index for index, path in enumerate(paths)}
+    mismatches.sort(key=lambda m: (order[m.file], m.row))
+    return VerificationReport(len(paths), progress['rows'], mismatches, time.perf_counter() - started)
+
+
+class BackgroundVerification:
+    """
+    A verification running on a background thread (which hands the work
+    to worker processes), so checking a large history does not hold up
+    the REPL. The outcome is logged before it is marked done.
+    """
+
+    def __init__(self, history_file: Path, settings: ContextSettings, workers: int = 0, chunk_rows: int = 10_000):
+        self.history_file = history_file
+        self.progress: Dict[str, int] = {'rows': 0}
+        self._executor: Executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-verify')
+        self.future: Future = self._executor.submit(self._run, settings, workers, chunk_rows)
+        self._executor.shutdown(wait=False)
+
+    def _run(self, settings: ContextSettings, workers: int, chunk_rows: int) -> VerificationReport:
+        try:
+            report = verify_history(self.history_file, settings, workers, chunk_rows, self.progress)
+        except Exception as e:
+            logging.error(f"History verification of {self.history_file} failed: {e}")
+            raise
+        if report.ok:
+            logging.info(report.lines()[0])
+        else:
+            logging.warning("\n".join(report.lines()))
+        return report
+
+    @classmethod
+    def for_config(cls, config: Any) -> 'BackgroundVerification':
+        return cls(config.history_file, context_settings(config), config.verify_workers, config.verify_chunk_rows)
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> VerificationReport:
+        return self.future.result(timeout)
+
+    def status(self) -> str:
+        if not self.done:
+            return f"Verification running: {self.progress['rows']} rows checked"
+        error = self.future.exception()
+        if error is not None:
+            return f"Verification failed: {error}"
+        report = self.future.result()
+        return report.lines(limit=0)[0]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Verify a history file from the command line, e.g.
+
+    python -m app.history_verifier history/calculator_history.csv --workers 8
+
+    Exits with status 1 when any row does not match.
+    """
+    config = CalculatorConfig()
+    parser = argparse.ArgumentParser(description="Verify the results saved in a calculation history")
+    parser.add_argument('history_file', type=Path, nargs='?', default=config.history_file)
+    parser.add_argument('--workers', type=int, default=config.verify_workers, help="worker processes (0: one per CPU)")
+    parser.add_argument('--chunk-rows', type=int, default=config.verify_chunk_rows)
+    parser.add_argument('--limit', type=int, default=20, help="mismatches to list")
+    args = parser.parse_args(argv)
+
+    report = verify_history(args.history_file, context_settings(config), args.workers, args.chunk_rows)
+    for line in report.lines(args.limit):
+        print(line)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+from bisect import bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from app.calculation import Calculation
+from app.exceptions import OperationError
+
+
+# A leading slice of a history list: the list and how many of its calculations
+Part = Tuple[List[Calculation], int]
+
+
+class HistoryView(Sequence):
+    """
+    A history made of leading slices of other history lists, sharing their
+    storage rather than copying it, so taking a prefix of a history costs the
+    same however long the history is.
+
+    History lists only ever grow at the end and every holder records how much
+    of one it uses, so a view appends in place to the list of its last part
+    when it ends at that list's end; otherwise new calculations go to a list
+    of its own. Lookups and prefixes cost time in the number of parts (one
+    per branch the history was built on), not in calculations. Slices are
+    plain lists.
+    """
+
+    __slots__ = ('_parts', '_ends')
+
+    def __init__(self, parts: List[Part]):
+        self._parts: List[Part] = [(items, count) for items, count in parts if count]
+        self._ends: List[int] = []
+        total = 0
+        for _, count in self._parts:
+            total += count
+            self._ends.append(total)
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            return self._slice(start, stop)
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("history index out of range")
+        part = bisect_right(self._ends, index)
+        start = self._ends[part - 1] if part else 0
+        return self._parts[part][0][index - start]
+
+    def _slice(self, start: int, stop: int) -> List[Calculation]:
+        """Calculations from ``start`` to ``stop``, copying only those"""
+        result: List[Calculation] = []
+        part_start = 0
+        for (items, count), end in zip(self._parts, self._ends):
+            if end > start and part_start < stop:
+                result.extend(items[max(start - part_start, 0):min(stop, end) - part_start])
+            part_start = end
+        return result
+
+    def __iter__(self) -> Iterator[Calculation]:
+        for items, count in self._parts:
+            yield from islice(items, count)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, HistoryView)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __add__(self, other: List[Calculation]) -> List[Calculation]:
+        return list(self) + list(other)
+
+    def __repr__(self) -> str:
+        return f"HistoryView({list(self)!r})"
+
+    def copy(self) -> List[Calculation]:
+        return list(self)
+
+    def append(self, calculation: Calculation) -> None:
+        if self._parts:
+            items, count = self._parts[-1]
+            if count == len(items):
+                items.append(calculation)
+                self._parts[-1] = (items, count + 1)
+                self._ends[-1] += 1
+                return
+        self._parts.append(([calculation], 1))
+        self._ends.append(len(self) + 1)
+
+    def extend(self, calculations) -> None:
+        for calculation in calculations:
+            self.append(calculation)
+
+
+History = Union[List[Calculation], HistoryView]
+
+
+def parts_of(history: History) -> List[Part]:
+    if isinstance(history, HistoryView):
+        return history._parts
+    return [(history, len(history))]
+
+
+def prefix(history: History, length: int, tail: Optional[List[Calculation]] = None) -> History:
+    """
+    The first ``length`` calculations of ``history`` followed by ``tail``,
+    sharing the history's storage. Without a tail, the whole of a history
+    is the history itself.
+    """
+    if length == len(history) and not tail:
+        return history
+    parts = []
+    for items, count in parts_of(history):
+        if length <= 0:
+            break
+        parts.append((items, min(count, length)))
+        length -= count
+    if tail:
+        parts.append((list(tail), len(tail)))
+    return HistoryView(parts)
+
+
+def shared_prefix(history: History, other: History) -> int:
+    """
+    Length of a prefix two histories are known to share storage for, found
+    from their parts without comparing calculations (it may be less than
+    the longest common prefix)
+    """
+    shared = 0
+    for (items, count), (other_items, other_count) in zip(parts_of(history), parts_of(other)):
+        if items is not other_items:
+            break
+        shared += min(count, other_count)
+        if count != other_count:
+            break
+    return shared
+
+
+@dataclass
+class HistoryVersion:
+    """
+    One state of the history: a history list and its length at the time.
+    """
+
+    number: int
+    history: History
+    length: int
+    timestamp: datetime = field(default_factory=datetime.now)
+    # Cleared since the history file was last saved
+    cleared: bool = False
+
+    @property
+    def last(self) -> Optional[Calculation]:
+        return self.history[self.length - 1] if self.length else None
+
+
+class HistoryVersions:
+    """
+    Version-indexed log of every state the calculator history has been in.
+
+    The calculator only ever appends to a history list in place; every other
+    change installs a new list. A version can therefore reference the list it
+    was recorded from plus its length, so recording is O(1), versions share
+    storage, and finding any version is an O(1) index lookup. Only the newest
+    ``max_versions`` are kept; version numbers keep counting up.
+    """
+
+    def __init__(self, max_versions: int = 1000):
+        self.max_versions = max_versions
+        self._versions: List[HistoryVersion] = []
+        self._first = 0  # number of the oldest version still kept
+        self.current: Optional[int] = None
+        # Whether the current state was cleared since the last save; stamped on each version
+        self.cleared = False
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def record(self, history: History, source: Optional[History] = None) -> int:
+        """
+        Record the current state and return its version number. When the
+        state is a prefix of an already recorded list, passing that list as
+        ``source`` keeps the version from holding on to a second copy.
+        """
+        number = self._first + len(self._versions)
+        self._versions.append(HistoryVersion(
+            number, source if source is not None else history, len(history), cleared=self.cleared
+        ))
+        if len(self._versions) > self.max_versions:
+            dropped = len(self._versions) - self.max_versions
+            del self._versions[:dropped]
+            self._first += dropped
+        self.current = number
+        return number
+
+    def get(self, number: int) -> HistoryVersion:
+        """
+        Version by number
+        """
+        index = number - self._first
+        if number < 0 or not 0 <= index < len(self._versions):
+            raise OperationError(f"Unknown history version: {number}")
+        return self._versions[index]
+
+    def history_at(self, number: int) -> History:
+        """
+        History of a version. The recorded history itself is returned when
+        the version is its latest state (it can keep being appended to);
+        otherwise a view of the version's prefix of it, sharing its storage.
+        """
+        version = self.get(number)
+        return prefix(version.history, version.length)
+
+    def latest(self, count: int) -> List[HistoryVersion]:
+        """
+        The newest ``count`` versions, oldest first
+        """
+        return self._versions[-count:] if count > 0 else []
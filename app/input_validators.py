@@ -1,15 +1,115 @@
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+import math
+from typing import Any, Iterable, List, NamedTuple
+
+import numpy as np
+
 from app.exceptions import ValidationError
 
+
+class _Limits(NamedTuple):
+    """max_input_value in the forms compared against each input type"""
+    decimal: Decimal
+    integer: Any  # int bound, or None when no int can exceed the limit
+    floating: float  # Largest float not above the limit
+
+
+def _limits(max_value: Decimal) -> _Limits:
+    max_value = Decimal(max_value)
+    if not max_value.is_finite():
+        return _Limits(max_value, None, float('inf'))
+    floating = float(max_value)
+    if Decimal(floating) > max_value:
+        floating = math.nextafter(floating, 0)
+    return _Limits(max_value, int(max_value), floating)
+
+
+# Limits of the max_input_value object last validated against; an identity
+# check is much cheaper than hashing a Decimal for a keyed cache
+_last_limits = (None, None)
+
+
+def limits_for(config) -> _Limits:
+    global _last_limits
+    max_value, limits = _last_limits
+    if max_value is not config.max_input_value:
+        limits = _limits(config.max_input_value)
+        _last_limits = (config.max_input_value, limits)
+    return limits
+
+
 class InputValidator:
     @staticmethod
-    def validate_number(value, config):
+    def validate_number(value, config, limits: _Limits = None):
         """Convert input to Decimal and enforce limits."""
-        try:
+        if limits is None:
+            max_value, limits = _last_limits
+            if max_value is not config.max_input_value:
+                limits = limits_for(config)
+
+        # Fast paths by exact type; bool is an int but not a valid number
+        kind = type(value)
+        if kind is Decimal:
+            num = value
+        elif kind is int:
+            if limits.integer is not None and not -limits.integer <= value <= limits.integer:
+                raise ValidationError(f"Value {value} exceeds maximum {config.max_input_value}")
+            return Decimal(value)
+        elif kind is str:
+            try:
+                num = Decimal(value)
+            except InvalidOperation:
+                raise ValidationError(f"Invalid number: {value}")
+        elif kind is float:
+            # The shortest repr of a float below the largest float within the
+            # limit is itself within the limit; only larger values (and NaN)
+            # need the Decimal comparison
+            if -limits.floating < value < limits.floating:
+                return Decimal(str(value))
             num = Decimal(str(value))
-        except Exception:
-            raise ValidationError(f"Invalid number: {value}")
+        else:
+            try:
+                num = Decimal(str(value))
+            except (ArithmeticError, ValueError, TypeError):
+                raise ValidationError(f"Invalid number: {value}")
 
-        if abs(num) > config.max_input_value:
+        try:
+            over = num.copy_abs() > limits.decimal
+        except InvalidOperation:  # NaN
+            raise ValidationError(f"Invalid number: {value}")
+        if over:
             raise ValidationError(f"Value {num} exceeds maximum {config.max_input_value}")
         return num
+
+    @staticmethod
+    def validate_many(values: Iterable[Any], config) -> List[Decimal]:
+        """
+        Validate a sequence of inputs at once. Integer and float NumPy arrays
+        are range-checked in one vectorized pass before conversion.
+        """
+        limits = limits_for(config)
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+            return InputValidator._validate_array(values.ravel(), config, limits)
+        validate = InputValidator.validate_number
+        return [validate(value, config, limits) for value in values]
+
+    @staticmethod
+    def _validate_array(values: np.ndarray, config, limits: _Limits) -> List[Decimal]:
+        if values.dtype.kind in 'iu':
+            bound = limits.integer
+            if bound is not None and bound < np.iinfo(values.dtype).max:
+                over = values > bound
+                if values.dtype.kind == 'i':
+                    over |= values < -bound
+                if over.any():
+                    raise ValidationError(
+                        f"Value {values[over.argmax()]} exceeds maximum {config.max_input_value}"
+                    )
+            return [Decimal(value) for value in values.tolist()]
+
+        values = values.astype(np.float64, copy=False)
+        if np.isnan(values).any():
+            raise ValidationError(f"Invalid number: {values[np.isnan(values).argmax()]}")
+        for value in values[np.abs(values) >= limits.floating].tolist():
+            InputValidator.validate_number(value, config, limits)
+        return [Decimal(str(value)) for value in values.tolist()]
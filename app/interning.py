@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Dict
+
+# Distinct values the shared table holds before it starts over
+MAX_INTERNED = 4096
+
+
+class InternTable:
+    """
+    One shared Decimal instance per distinct value, so histories and
+    mementos of repetitive workloads do not each hold their own copy of the
+    same operands and results.
+
+    Values are keyed by their text: equal Decimals such as 1.0 and 1 are
+    written differently and must stay distinct. Once ``max_entries`` values
+    are held the table is emptied and fills again with the values then in
+    use, which bounds its size without bookkeeping on every lookup.
+    Decimals are immutable, so sharing them is safe; a ``max_entries`` of 0
+    disables interning.
+    """
+
+    def __init__(self, max_entries: int = MAX_INTERNED):
+        self.max_entries = max_entries
+        self._values: Dict[str, Decimal] = {}
+
+    def decimal(self, value: Decimal) -> Decimal:
+        """The shared instance equal to ``value`` and written the same way"""
+        if not self.max_entries:
+            return value
+        text = str(value)
+        shared = self._values.get(text)
+        if shared is None:
+            self._add(text, value)
+            return value
+        return shared
+
+    def parse(self, text: str) -> Decimal:
+        """Decimal of ``text``, parsing only text not seen before"""
+        if type(text) is not str:
+            return Decimal(text)
+        shared = self._values.get(text)
+        if shared is not None:
+            return shared
+        value = Decimal(text)
+        if self.max_entries:
+            self._add(text, value)
+        return value
+
+    def _add(self, text: str, value: Decimal) -> None:
+        if len(self._values) >= self.max_entries:
+            self._values.clear()
+        self._values[text] = value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+# Shared by every calculator of the process
+operand_table = InternTable()
@@ -0,0 +1,138 @@
+from collections import defaultdict
+import json
+from pathlib import Path
+import time
+from typing import Any, Dict, List, Optional, Union
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in nanoseconds.
+
+    Buckets keep the top three significant bits of each value, so bucket
+    bounds are within 25% of the recorded values while the number of buckets
+    stays logarithmic in the range.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = defaultdict(int)  # bucket upper bound (ns) -> count
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, ns: int) -> None:
+        shift = max(ns.bit_length() - 3, 0)
+        self.buckets[((ns >> shift) + 1) << shift] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """
+        Upper bound of the bucket holding the ``q``-th percentile (0-100)
+        """
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound in sorted(self.buckets):
+            seen += self.buckets[bound]
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max  # pragma: no cover
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ns': self.total,
+            'mean_ns': self.mean,
+            'min_ns': self.min,
+            'max_ns': self.max,
+            'p50_ns': self.percentile(50),
+            'p90_ns': self.percentile(90),
+            'p99_ns': self.percentile(99),
+            'buckets': {str(bound): n for bound, n in sorted(self.buckets.items())},
+        }
+
+
+class Metrics:
+    """
+    Counters and latency histograms for the calculation pipeline.
+
+    Callers check ``enabled`` before reading the clock, so a disabled
+    instance costs one attribute lookup per instrumented stage.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.started = time.time()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def observe(self, name: str, ns: int) -> None:
+        self.histograms[name].record(ns)
+
+    def lap(self, stage: str, start: int) -> int:
+        """
+        Record the time since ``start`` for a pipeline stage and return now,
+        the start of the next stage
+        """
+        now = time.perf_counter_ns()
+        self.histograms[f"stage.{stage}"].record(now - start)
+        return now
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        All metrics as plain data, including throughput since the last reset
+        """
+        elapsed = max(time.time() - self.started, 1e-9)
+        operations = sum(n for name, n in self.counters.items() if name.startswith('operations.'))
+        return {
+            'enabled': self.enabled,
+            'elapsed_s': elapsed,
+            'throughput_ops_per_s': operations / elapsed,
+            'counters': dict(sorted(self.counters.items())),
+            'histograms': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump(self, path: Union[str, Path]) -> Path:
+        """
+        Write the snapshot as JSON for dashboards
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json())
+        return path
+
+    def report(self) -> List[str]:
+        """
+        Human readable summary lines
+        """
+        snapshot = self.snapshot()
+        lines = [f"Throughput: {snapshot['throughput_ops_per_s']:.2f} operations/s"]
+        for name, count in snapshot['counters'].items():
+            lines.append(f"{name}: {count}")
+        for name, h in snapshot['histograms'].items():
+            lines.append(
+                f"{name}: n={h['count']} mean={h['mean_ns'] / 1000:.1f}us "
+                f"p50={h['p50_ns'] / 1000:.1f}us p99={h['p99_ns'] / 1000:.1f}us "
+                f"max={(h['max_ns'] or 0) / 1000:.1f}us"
+            )
+        return lines
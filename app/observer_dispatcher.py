@@ -0,0 +1,105 @@
+from collections import deque
+import logging
+import threading
+from typing import Deque, List, Optional
+
+from app.calculation import Calculation
+from app.history import HistoryObserver
+
+BACKPRESSURE_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+class ObserverDispatcher:
+    """
+    Delivers calculations to one observer from a background thread.
+
+    Calculations wait in a bounded queue and are handed to the observer's
+    ``update_batch`` in batches, so a slow observer only delays itself.
+    When the queue is full, the backpressure policy decides whether the
+    calculation path waits for room (block) or a calculation is dropped
+    (drop_oldest, drop_newest). Errors raised by the observer are logged and
+    counted instead of reaching the calculation that triggered them.
+    """
+
+    def __init__(
+            self,
+            observer: HistoryObserver,
+            max_queue: int = 1000,
+            batch_size: int = 100,
+            policy: str = 'block'
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.observer = observer
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.policy = policy
+        self.dropped = 0
+        self.errors = 0
+        self._queue: Deque[Calculation] = deque()
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"observer-{type(observer).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, calculation: Calculation) -> None:
+        """
+        Queue a calculation for the observer. After close, the observer is
+        called directly.
+        """
+        with self._condition:
+            if not self._closed:
+                while len(self._queue) >= self.max_queue:
+                    if self.policy == 'block':
+                        self._condition.wait()
+                    elif self.policy == 'drop_oldest':
+                        self._queue.popleft()
+                        self.dropped += 1
+                    else:
+                        self.dropped += 1
+                        return
+                self._queue.append(calculation)
+                self._condition.notify_all()
+                return
+        self.observer.update(calculation)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                batch: List[Calculation] = [
+                    self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))
+                ]
+                self._busy = True
+                self._condition.notify_all()
+            try:
+                self.observer.update_batch(batch)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Observer {type(self.observer).__name__} failed: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued calculation has been delivered. Returns
+        False if the timeout passed first.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Deliver what is queued, then stop the worker thread
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
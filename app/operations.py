@@ -1,13 +1,45 @@
-from decimal import Decimal
+from decimal import Decimal, ROUND_FLOOR, getcontext
+from fractions import Fraction
+import math
+import operator
+import sys
+from typing import Any, Callable, List, Tuple, Union
+
 from app.exceptions import OperationError
+from app.rational import Rational, integer_root, to_decimal
+
+# Largest exact power result, in bits, before exact mode gives up on it
+MAX_EXACT_BITS = 1_000_000
+
+# Largest integer power result, in decimal digits; converting a bigger int to
+# a Decimal alone takes longer than a user waits, and memory grows with it
+MAX_POWER_DIGITS = 100_000
 
 class Operation:
     """Base class for all operations."""
+    # Number of operands execute takes; None for any number from two up
+    arity = 2
+    # Name calculations record, derived once per class and interned so every
+    # calculation of an operation shares the one string
+    name = ''
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.name = sys.intern(cls.__name__.replace("Operation", "").lower())
+
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         raise NotImplementedError
 
+    def execute_exact(self, a: Rational, b: Rational) -> Union[Rational, Decimal]:
+        """
+        Exact result for int or Fraction operands. Operations whose plain
+        arithmetic is exact on those types inherit this; the others override
+        it, and may return a rounded Decimal when no exact result exists.
+        """
+        return self.execute(a, b)
+
     def __str__(self) -> str:
-        return self.__class__.__name__.replace("Operation", "").lower()
+        return self.name
 
 
 class AddOperation(Operation):
@@ -31,12 +63,59 @@ class DivideOperation(Operation):
             raise OperationError("Division by zero")
         return a / b
 
+    def execute_exact(self, a: Rational, b: Rational) -> Rational:
+        if b == 0:
+            raise OperationError("Division by zero")
+        return Fraction(a) / b
+
+
+def _is_integral(value: Decimal) -> bool:
+    return value.is_finite() and value == value.to_integral_value()
+
+
+def integer_power(base: int, exponent: int) -> int:
+    """
+    ``base ** exponent`` by exponentiation by squaring (Python's int pow),
+    refused before any work when the result would exceed MAX_POWER_DIGITS
+    """
+    if exponent < 0:
+        raise OperationError("Negative exponents not supported")
+    # Compared as a bound on the exponent: int times float overflows for huge exponents
+    if abs(base) > 1 and exponent > MAX_POWER_DIGITS / math.log10(abs(base)):
+        raise OperationError(f"Result too large: more than {MAX_POWER_DIGITS} digits")
+    return base ** exponent
+
 
 class PowerOperation(Operation):
+    """
+    Integral operands are raised exactly with integer arithmetic and other
+    integral exponents with Decimal arithmetic; only fractional exponents go
+    through float, falling back to Decimal when float overflows.
+    """
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b < 0:
             raise OperationError("Negative exponents not supported")
-        return Decimal(pow(float(a), float(b)))
+        if _is_integral(b):
+            if _is_integral(a):
+                return Decimal(integer_power(int(a), int(b)))
+            return a ** b
+        try:
+            return Decimal(pow(float(a), float(b)))
+        except OverflowError:
+            return a ** b
+
+    def execute_exact(self, a: Rational, b: Rational) -> Union[Rational, Decimal]:
+        if b < 0:
+            raise OperationError("Negative exponents not supported")
+        if not isinstance(b, int):
+            return self.execute(to_decimal(a), to_decimal(b))
+        fraction = Fraction(a)
+        if abs(fraction.numerator) <= 1 and fraction.denominator == 1:
+            return a ** b  # 0, 1 and -1 stay as small whatever the exponent
+        size = max(fraction.numerator.bit_length(), fraction.denominator.bit_length()) * b
+        if size > MAX_EXACT_BITS:
+            raise OperationError("Result too large for exact arithmetic")
+        return a ** b
 
 
 class RootOperation(Operation):
@@ -47,24 +126,83 @@ class RootOperation(Operation):
             raise OperationError("Zero root is undefined")
         return Decimal(pow(float(a), 1 / float(b)))
 
+    def execute_exact(self, a: Rational, b: Rational) -> Union[Rational, Decimal]:
+        if a < 0:
+            raise OperationError("Cannot calculate root of negative number")
+        if b == 0:
+            raise OperationError("Zero root is undefined")
+        if isinstance(b, int) and b > 0:
+            a = Fraction(a)
+            numerator = integer_root(a.numerator, b)
+            denominator = integer_root(a.denominator, b)
+            if numerator is not None and denominator is not None:
+                return Fraction(numerator, denominator)
+        return self.execute(to_decimal(a), to_decimal(b))
+
+def floor_divmod(a: Decimal, b: Decimal) -> Tuple[Decimal, Decimal]:
+    """
+    Floor quotient and remainder of finite Decimals (the remainder takes
+    the sign of the divisor, as in Python), exact for operands of any size.
+    Decimal's own divmod truncates and fails once the quotient has more
+    digits than the context precision, so it runs with a precision sized to
+    the operands.
+    """
+    # Digits of the quotient, and of the remainder, which is below b and
+    # a multiple of the smaller operand exponent
+    if a == a.to_integral_value() and b == b.to_integral_value():
+        exponent = 0
+    else:
+        exponent = min(a.as_tuple().exponent, b.as_tuple().exponent)
+    digits = max(a.adjusted() - b.adjusted() + 1, b.adjusted() - exponent + 1) + 1
+    context = getcontext()
+    if digits > context.prec:
+        context = context.copy()
+        context.prec = digits
+    quotient, remainder = context.divmod(a, b)
+    if remainder and (remainder < 0) != (b < 0):
+        quotient = context.subtract(quotient, 1)
+        remainder = context.add(remainder, b)
+    return quotient, remainder
+
+
 class ModulusOperation(Operation):
+    """Remainder of floor division; it takes the sign of the divisor, as Python's % does."""
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
+        if b == 0:
+            raise OperationError("Division by zero")
+        if not (a.is_finite() and b.is_finite()):
+            return a % b
+        return floor_divmod(a, b)[1]
+
+    def execute_exact(self, a: Rational, b: Rational) -> Rational:
         if b == 0:
             raise OperationError("Division by zero")
         return a % b
-    
+
 class IntegerDivisionOperation(Operation):
     """Perform division that results in an integer quotient, discarding any fractional part."""
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise OperationError("Division by zero")
-        return a / b
+        if not (a.is_finite() and b.is_finite()):
+            return (a / b).to_integral_value(rounding=ROUND_FLOOR)
+        return floor_divmod(a, b)[0]
+
+    def execute_exact(self, a: Rational, b: Rational) -> Rational:
+        if b == 0:
+            raise OperationError("Division by zero")
+        return a // b
     
 class PercentageOperation(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise OperationError("Division by zero")
         return (a / b) * 100
+
+    def execute_exact(self, a: Rational, b: Rational) -> Rational:
+        if b == 0:
+            raise OperationError("Division by zero")
+        return Fraction(a) / b * 100
     
 class AbsoluteDifferenceOperation(Operation):
     def execute(self, a: Decimal, b: Decimal):
@@ -73,6 +211,84 @@ class AbsoluteDifferenceOperation(Operation):
             diff = -diff
         return diff
 
+class ModPowOperation(Operation):
+    """
+    ``a`` to the power ``b`` modulo ``m`` for integers, using three-argument
+    pow so the full power is never built. A negative exponent takes the
+    power of the modular inverse.
+    """
+    arity = 3
+
+    def execute(self, a: Decimal, b: Decimal, m: Decimal) -> Decimal:
+        if not (_is_integral(a) and _is_integral(b) and _is_integral(m)):
+            raise OperationError("Modular exponentiation requires integers")
+        return Decimal(self.execute_exact(int(a), int(b), int(m)))
+
+    def execute_exact(self, a: Rational, b: Rational, m: Rational) -> int:
+        if not (isinstance(a, int) and isinstance(b, int) and isinstance(m, int)):
+            raise OperationError("Modular exponentiation requires integers")
+        if m == 0:
+            raise OperationError("Modulus must not be zero")
+        try:
+            return pow(a, b, m)
+        except ValueError:
+            raise OperationError(f"{a} has no inverse modulo {m}")
+
+def pairwise(values: List[Any], combine: Callable[[Any, Any], Any]) -> Any:
+    """
+    Combine neighbouring values, then neighbouring results, until one is
+    left. Rounding error grows with the depth of the tree (log n) rather
+    than with the number of values, and exact operands stay balanced in size.
+    """
+    while len(values) > 1:
+        combined = list(map(combine, values[0::2], values[1::2]))
+        if len(values) % 2:
+            combined.append(values[-1])
+        values = combined
+    return values[0]
+
+
+class ReductionOperation(Operation):
+    """
+    Operation over any number of operands, recorded as one calculation
+    instead of a chain of binary ones.
+    """
+    arity = None
+
+    def execute(self, *values: Decimal) -> Decimal:
+        raise NotImplementedError
+
+    def execute_exact(self, *values: Rational) -> Rational:
+        return self.execute(*values)
+
+
+class SumOperation(ReductionOperation):
+    def execute(self, *values: Decimal) -> Decimal:
+        return pairwise(list(values), operator.add)
+
+
+class ProductOperation(ReductionOperation):
+    def execute(self, *values: Decimal) -> Decimal:
+        return pairwise(list(values), operator.mul)
+
+
+class MinOperation(ReductionOperation):
+    def execute(self, *values: Decimal) -> Decimal:
+        return min(values)
+
+
+class MaxOperation(ReductionOperation):
+    def execute(self, *values: Decimal) -> Decimal:
+        return max(values)
+
+
+class MeanOperation(ReductionOperation):
+    def execute(self, *values: Decimal) -> Decimal:
+        return pairwise(list(values), operator.add) / len(values)
+
+    def execute_exact(self, *values: Rational) -> Rational:
+        return Fraction(pairwise(list(values), operator.add), len(values))
+
 class OperationFactory:
     """Factory for creating operation instances by name."""
     _operations = {
@@ -85,7 +301,13 @@ class OperationFactory:
         'modulus': ModulusOperation,
         'integerdivision': IntegerDivisionOperation,
         'percentage': PercentageOperation,
-        'absolutedifference': AbsoluteDifferenceOperation
+        'absolutedifference': AbsoluteDifferenceOperation,
+        'modpow': ModPowOperation,
+        'sum': SumOperation,
+        'product': ProductOperation,
+        'min': MinOperation,
+        'max': MaxOperation,
+        'mean': MeanOperation
     }
 
     @classmethod
@@ -94,3 +316,12 @@ class OperationFactory:
         if not op_class:
             raise ValueError(f"Unknown operation: {name}")
         return op_class()
+
+    @classmethod
+    def register(cls, name: str, operation_class: type) -> None:
+        """Make a new operation available by name"""
+        cls._operations[name.lower()] = operation_class
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return list(cls._operations)
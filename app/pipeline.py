@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from app.exceptions import OperationError
+from app.operations import Operation, OperationFactory
+
+# Operand that stands for the previous result
+ANS = 'ans'
+
+
+class Stage(NamedTuple):
+    """One operation of a pipeline and the operands typed for it"""
+    operation: Operation
+    operands: List[str]
+
+
+def parse_pipeline(text: str, resolve: Optional[Callable[[str], str]] = None) -> List[Stage]:
+    """
+    Parse ``add 5 | multiply 3 | root 2`` into stages, checking every
+    operation name before anything runs. ``resolve`` maps a typed name,
+    such as an alias or abbreviation, to the operation's own name.
+    """
+    stages = []
+    for part in text.split('|'):
+        words = part.replace(',', ' ').split()
+        if not words:
+            raise OperationError("Empty pipeline stage")
+        try:
+            operation = OperationFactory.create_operation(resolve(words[0]) if resolve else words[0])
+        except ValueError as e:
+            raise OperationError(str(e))
+        stages.append(Stage(operation, [ANS if word.lower() == ANS else word for word in words[1:]]))
+    return stages
+
+
+def run_pipeline(calculator: Any, stages: List[Stage]) -> Decimal:
+    """
+    Run the stages in order, each recorded as its own calculation. A stage
+    given fewer operands than its operation takes, and every reduction
+    after the first stage, starts from the previous result; ``ans`` can
+    also be typed for it anywhere. The previous result is passed on as the
+    calculator's result object, so it is neither reformatted nor validated
+    again.
+    """
+    result = None
+    for position, (operation, typed) in enumerate(stages):
+        arity = getattr(operation, 'arity', 2)
+        operands: List[Any] = list(typed)
+        if (len(operands) < arity if arity is not None else position > 0):
+            operands.insert(0, ANS)
+        if ANS in operands:
+            ans = calculator.ans
+            if ans is None:
+                raise OperationError("No previous result to chain from")
+            operands = [ans if operand == ANS else operand for operand in operands]
+        if arity is None and len(operands) < 2:
+            raise OperationError(f"{operation} takes at least 2 operands")
+        if arity is not None and len(operands) != arity:
+            raise OperationError(f"{operation} takes {arity} operands")
+        calculator.set_operation(operation)
+        result = calculator.perform_operation(*operands)
+    return result
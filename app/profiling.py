@@ -0,0 +1,133 @@
+import cProfile
+import io
+from pathlib import Path
+import pstats
+import tracemalloc
+from typing import Any, Dict, List, Optional, Union
+
+from app.calculator import Calculator
+
+
+class Profiler:
+    """
+    cProfile and tracemalloc profiling of a calculator, driven by its hooks.
+
+    The CPU profiler only runs between the start and end of an operation or a
+    save, so time spent waiting at the REPL prompt stays out of the profile.
+    Memory is traced from ``start`` on; each operation's net allocation is
+    recorded and ``dump`` lists the allocation sites that grew the most.
+    """
+
+    # Hook point -> whether it starts (True) or ends (False) a profiled span.
+    # Spans nest (an auto-save runs inside the operation that triggered it);
+    # only the outermost one is measured.
+    SPANS = {
+        'before_validate': True,
+        'after_notify': False,
+        'before_save': True,
+        'after_save': False,
+        'on_error': False,
+    }
+
+    def __init__(self, calculator: Calculator):
+        self.calculator = calculator
+        # The latest profile, kept after ``stop`` for ``report`` and ``dump``
+        self.profile: Optional[cProfile.Profile] = None
+        self._running = False
+        self.allocations: List[int] = []  # Net bytes allocated by each operation
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._span_memory: Optional[int] = None
+        self._depth = 0  # Spans open, counting nested ones
+        self._started_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self.active:
+            return
+        self.profile = cProfile.Profile()
+        self.allocations = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._snapshot = tracemalloc.take_snapshot()
+        for point in self.SPANS:
+            self.calculator.add_hook(point, self._hook)
+        self._running = True
+
+    def stop(self) -> None:
+        """
+        Stop profiling; the collected profile stays available to ``dump``
+        """
+        if not self.active:
+            return
+        for point in self.SPANS:
+            self.calculator.remove_hook(point, self._hook)
+        self._depth = 0
+        self._end_span()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._running = False
+
+    def _hook(self, point: str, context: Dict[str, Any]) -> None:
+        if self.SPANS[point]:
+            self._depth += 1
+            if self._depth == 1:
+                self._span_memory = tracemalloc.get_traced_memory()[0]
+                self.profile.enable()
+        elif self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._end_span()
+
+    def _end_span(self) -> None:
+        if self._span_memory is None:
+            return
+        self.profile.disable()
+        self.allocations.append(tracemalloc.get_traced_memory()[0] - self._span_memory)
+        self._span_memory = None
+
+    def report(self, limit: int = 20) -> str:
+        """
+        Top functions by cumulative time and top allocation sites since start
+        """
+        if self.profile is None:
+            return "No profile collected"
+        out = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profile, stream=out)
+        except TypeError:  # No span has been profiled yet
+            out.write("No operations profiled\n")
+        else:
+            stats.sort_stats('cumulative').print_stats(limit)
+
+        if self.allocations:
+            out.write(
+                f"Memory: {len(self.allocations)} spans, "
+                f"mean {sum(self.allocations) / len(self.allocations):.0f} bytes, "
+                f"max {max(self.allocations)} bytes\n"
+            )
+        if self._snapshot is not None and tracemalloc.is_tracing():
+            out.write("Top allocations since profiling started:\n")
+            diff = tracemalloc.take_snapshot().compare_to(self._snapshot, 'lineno')
+            for stat in diff[:limit]:
+                out.write(f"{stat}\n")
+        return out.getvalue()
+
+    def dump(self, path: Union[str, Path, None] = None, limit: int = 20) -> str:
+        """
+        The report, also written to ``path`` when given. A ``.prof`` path
+        gets the raw cProfile data instead, for pstats or snakeviz.
+        """
+        report = self.report(limit)
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.suffix == '.prof' and self.profile is not None:
+                self.profile.dump_stats(path)
+            else:
+                path.write_text(report)
+        return report
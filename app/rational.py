@@ -0,0 +1,61 @@
+from decimal import Decimal
+from fractions import Fraction
+from typing import Optional, Union
+
+from app.exceptions import OperationError
+
+# Exact operand: an int when integral (cheaper arithmetic), else a Fraction
+Rational = Union[int, Fraction]
+
+
+def to_exact(value: Union[Decimal, Fraction]) -> Rational:
+    """
+    Exact rational value of a finite Decimal (a Fraction already is one)
+    """
+    if isinstance(value, Fraction):
+        return value
+    if not value.is_finite():
+        raise OperationError(f"No exact value for {value}")
+    numerator, denominator = value.as_integer_ratio()
+    if denominator == 1:
+        return numerator
+    return Fraction(numerator, denominator)
+
+
+def from_exact(value: Union[Rational, Decimal]) -> Union[Decimal, Fraction]:
+    """
+    Value to store as a result: integral values become exact Decimals,
+    other fractions stay fractions until displayed or exported
+    """
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return Decimal(value.numerator)
+    return value
+
+
+def to_decimal(value: Union[Decimal, Fraction, int]) -> Decimal:
+    """
+    Decimal for display and export, rounded to the current context
+    """
+    if isinstance(value, Fraction):
+        return Decimal(value.numerator) / Decimal(value.denominator)
+    if isinstance(value, int):
+        return Decimal(value)
+    return value
+
+
+def integer_root(n: int, k: int) -> Optional[int]:
+    """
+    The exact ``k``-th root of a non-negative int, or None if there is none
+    """
+    if n < 2:
+        return n
+    # Newton's method from a power of two at or above the root
+    x = 1 << -(-n.bit_length() // k)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            break
+        x = y
+    return x if x ** k == n else None
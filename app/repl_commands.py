@@ -0,0 +1,500 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.exceptions import OperationError, ValidationError
+from app.history_verifier import BackgroundVerification, context_settings, verify_history
+from app.operations import Operation, OperationFactory
+from app.pipeline import parse_pipeline, run_pipeline
+from app.rational import to_decimal
+
+from colorama import Fore, Style
+
+# Prompts for the operands of an operation, in order
+ORDINALS = ('First', 'Second', 'Third')
+
+# Symbols typed in place of an operation's name
+OPERATION_ALIASES = {
+    'add': ('+',),
+    'subtract': ('-',),
+    'multiply': ('*',),
+    'divide': ('/',),
+    'power': ('^', '**'),
+    'modulus': ('%', 'mod'),
+    'integerdivision': ('//', 'integerdivide'),
+    'percentage': ('percentcalculation',),
+    'absolutedifference': ('absdiff',),
+}
+
+# First word of a line, which may run straight into a pipeline's '|'
+_FIRST_WORD = re.compile(r'\s*([^\s|]+)(.*)', re.DOTALL)
+
+
+class ReplSession:
+    """State a command works on: the calculator and the REPL's helpers"""
+
+    def __init__(self, calculator: Any, registry: 'CommandRegistry', statistics: Any = None, profiler: Any = None):
+        self.calculator = calculator
+        self.registry = registry
+        self.statistics = statistics
+        self.profiler = profiler
+        self.verification: Optional[BackgroundVerification] = None
+        self.running = True
+
+
+Handler = Callable[[ReplSession, List[str]], None]
+
+
+@dataclass(frozen=True)
+class Command:
+    """A REPL command: its handler is called with the words typed after it"""
+    name: str
+    handler: Handler
+    help: str
+    usage: Optional[str] = None
+    aliases: Tuple[str, ...] = ()
+    operation: Optional[Operation] = None
+
+    @property
+    def is_operation(self) -> bool:
+        return self.operation is not None
+
+
+class CommandRegistry:
+    """
+    Commands of the REPL by name and alias, so a line is dispatched with one
+    dictionary lookup however many commands there are. A unique prefix of a
+    command's name also runs it; the prefixes are worked out again only when
+    a command is added or removed.
+    """
+
+    def __init__(self):
+        self.commands: Dict[str, Command] = {}
+        self._lookup: Dict[str, Command] = {}
+        self._abbreviations: Optional[Dict[str, List[Command]]] = None
+        self._matches: List[str] = []
+
+    def register(
+            self,
+            name: str,
+            handler: Handler,
+            help: str,
+            usage: Optional[str] = None,
+            aliases: Iterable[str] = (),
+            operation: Optional[Operation] = None
+    ) -> Command:
+        command = Command(name.lower(), handler, help, usage, tuple(alias.lower() for alias in aliases), operation)
+        for word in (command.name,) + command.aliases:
+            if word in self._lookup:
+                raise ValueError(f"Command already registered: {word}")
+        self.commands[command.name] = command
+        for word in (command.name,) + command.aliases:
+            self._lookup[word] = command
+        self._abbreviations = None
+        return command
+
+    def command(self, name: str, help: str, usage: Optional[str] = None, aliases: Iterable[str] = ()):
+        """Decorator registering a function as a command"""
+        def decorator(handler: Handler) -> Handler:
+            self.register(name, handler, help, usage, aliases)
+            return handler
+        return decorator
+
+    def register_operation(self, name: str, aliases: Iterable[str] = ()) -> Command:
+        """
+        Register the factory's operation ``name`` as a command, which runs
+        it inline (``add 2 3``), as a pipeline or by prompting for numbers
+        """
+        operation = OperationFactory.create_operation(name)
+        if getattr(operation, 'arity', 2) is None:
+            help = "Reduce a list of numbers to one result"
+        else:
+            help = "Perform calculations"
+        return self.register(
+            name, lambda session, args: _run_operation(session, operation, name, args),
+            help, aliases=aliases, operation=operation
+        )
+
+    def unregister(self, name: str) -> None:
+        command = self.commands.pop(name.lower())
+        for word in (command.name,) + command.aliases:
+            del self._lookup[word]
+        self._abbreviations = None
+
+    @property
+    def abbreviations(self) -> Dict[str, List[Command]]:
+        """Commands each proper prefix of a command name could stand for"""
+        if self._abbreviations is None:
+            abbreviations: Dict[str, List[Command]] = {}
+            for command in self.commands.values():
+                for end in range(1, len(command.name)):
+                    abbreviations.setdefault(command.name[:end], []).append(command)
+            self._abbreviations = abbreviations
+        return self._abbreviations
+
+    def matches(self, word: str) -> List[Command]:
+        """Commands ``word`` names: one for a name, alias or unique prefix"""
+        word = word.lower()
+        command = self._lookup.get(word)
+        if command is not None:
+            return [command]
+        return self.abbreviations.get(word, [])
+
+    def resolve(self, word: str) -> Optional[Command]:
+        matches = self.matches(word)
+        return matches[0] if len(matches) == 1 else None
+
+    def operation_name(self, word: str) -> str:
+        """Operation name for a typed name, alias or abbreviation"""
+        command = self.resolve(word)
+        return command.name if command is not None and command.is_operation else word
+
+    def dispatch(self, session: ReplSession, line: str) -> None:
+        """Run the command a line of input starts with"""
+        match = _FIRST_WORD.match(line)
+        if match is None:
+            print(Fore.YELLOW+f"Unknown command: '{line.lower()}'. Type 'help' for available commands.")
+            return
+        word, rest = match.groups()
+        matches = self.matches(word)
+        if len(matches) > 1:
+            names = ", ".join(command.name for command in matches)
+            print(Fore.YELLOW+f"Ambiguous command '{word.lower()}': {names}")
+            return
+        if not matches:
+            print(Fore.YELLOW+f"Unknown command: '{line.lower()}'. Type 'help' for available commands.")
+            return
+        matches[0].handler(session, rest.split())
+
+    def completions(self, text: str, preceding: str = '') -> List[str]:
+        """
+        Command words starting with ``text``, when it is the first word of
+        the line or of a pipeline stage (only operations follow a '|')
+        """
+        stages = preceding.split('|')
+        if stages[-1].strip():
+            return []
+        text = text.lower()
+        if len(stages) > 1:
+            words = (word for word, command in self._lookup.items() if command.is_operation)
+        else:
+            words = iter(self._lookup)
+        return sorted(word for word in words if word.startswith(text))
+
+    def complete(self, text: str, state: int) -> Optional[str]:
+        """Completer for ``readline.set_completer``"""
+        if state == 0:
+            import readline
+            preceding = readline.get_line_buffer()[:readline.get_begidx()]
+            self._matches = self.completions(text, preceding)
+        return self._matches[state] if state < len(self._matches) else None
+
+    def help_lines(self) -> List[str]:
+        """One line per command; neighbouring commands with the same help share a line"""
+        lines = []
+        group: List[Command] = []
+        for command in list(self.commands.values()) + [None]:
+            if group and (command is None or command.help != group[0].help):
+                if len(group) == 1:
+                    first = group[0]
+                    usage = first.usage or first.name
+                    aliases = f" ({', '.join(first.aliases)})" if first.aliases and not first.is_operation else ""
+                    lines.append(f"  {usage}{aliases} - {first.help}")
+                else:
+                    lines.append(f"  {', '.join(c.name for c in group)} - {group[0].help}")
+                group = []
+            if command is not None:
+                group.append(command)
+        return lines
+
+
+def _run_operation(session: ReplSession, operation: Operation, name: str, args: List[str]) -> None:
+    calc = session.calculator
+    if args:
+        # Operands typed inline, or a pipeline starting with this operation
+        try:
+            text = ' '.join([name] + args)
+            result = run_pipeline(calc, parse_pipeline(text, session.registry.operation_name))
+            print(Fore.GREEN+f"\nResult: {result.normalize():f}")
+        except (ValidationError, OperationError) as e:
+            print(Fore.RED+f"Error: {e}")
+        return
+
+    arity = getattr(operation, 'arity', 2)
+    print("\nEnter numbers (or 'cancel' to abort):")
+    if arity is None:
+        value = input(Fore.CYAN+f"Numbers (separated by spaces or commas): "+Style.RESET_ALL)
+        numbers = None if value.lower() == 'cancel' else [
+            calc.ans if number.lower() == 'ans' else number
+            for number in value.replace(',', ' ').split()
+        ]
+    else:
+        numbers = []
+        for ordinal in ORDINALS[:arity]:
+            value = input(Fore.CYAN+f"{ordinal} number: "+Style.RESET_ALL)
+            if value.lower() == 'cancel':
+                break
+            numbers.append(calc.ans if value.lower() == 'ans' else value)
+        if len(numbers) < arity:
+            numbers = None
+    if numbers is None:
+        print(Fore.YELLOW+f"Operation cancelled")
+        return
+
+    try:
+        calc.set_operation(operation)
+        if arity is None:
+            result = calc.perform_reduction(numbers)
+        else:
+            result = calc.perform_operation(*numbers)
+
+        # Normalize Decimal result
+        if isinstance(result, Decimal):
+            result = result.normalize()
+
+        print(Fore.GREEN+f"\nResult: {result}")
+    except (ValidationError, OperationError) as e:
+        print(Fore.RED+f"Error: {e}")
+    except Exception as e:
+        print(Fore.RED+f"Unexpected error: {e}")
+
+
+def _help(session: ReplSession, args: List[str]) -> None:
+    print(Fore.GREEN+f"\nAvailable commands:")
+    for line in session.registry.help_lines():
+        print(Fore.GREEN+line)
+    print(Fore.GREEN+f"  <operation> <numbers> [| <operation> <numbers> ...] - Calculate inline, chaining")
+    print(Fore.GREEN+f"      from the previous result, e.g. add 5 | multiply 3 | root 2")
+    print(Fore.GREEN+f"  Any unique start of a command runs it, e.g. hist for history")
+
+
+def _exit(session: ReplSession, args: List[str]) -> None:
+    calc = session.calculator
+    try:
+        calc.save_history()
+        print(Fore.GREEN+f"History saved successfully.")
+    except Exception as e:
+        print(Fore.YELLOW + f"Warning: Could not save history: {e}")
+    else:
+        calc.close()
+    print("Goodbye!")
+    session.running = False
+
+
+def _history(session: ReplSession, args: List[str]) -> None:
+    history = session.calculator.show_history()
+    if not history:
+        print(Fore.RED + f"No calculations in history")
+    else:
+        print(Fore.GREEN+f"\nCalculation History:")
+        for i, entry in enumerate(history, 1):
+            print(Fore.BLUE+f"{i}. {entry}")
+
+
+def _clear(session: ReplSession, args: List[str]) -> None:
+    session.calculator.clear_history()
+    print(Fore.GREEN+f"History cleared")
+
+
+def _undo(session: ReplSession, args: List[str]) -> None:
+    if session.calculator.undo():
+        print(Fore.YELLOW+f"Operation undone")
+    else:
+        print(Fore.YELLOW+f"Nothing to undo")
+
+
+def _redo(session: ReplSession, args: List[str]) -> None:
+    if session.calculator.redo():
+        print(Fore.YELLOW+f"Operation redone")
+    else:
+        print(Fore.YELLOW+f"Nothing to redo")
+
+
+def _versions(session: ReplSession, args: List[str]) -> None:
+    calc = session.calculator
+    print(Fore.GREEN+f"\nHistory Versions:")
+    for version in calc.list_versions():
+        marker = "*" if version.number == calc.versions.current else " "
+        last = f", last: {version.last}" if version.last else ""
+        print(Fore.BLUE+f"{marker} {version.number}. {version.length} calculations{last}")
+
+
+def _goto(session: ReplSession, args: List[str]) -> None:
+    if len(args) != 1 or not args[0].isdigit():
+        print(Fore.YELLOW+f"Usage: goto <version>")
+        return
+    try:
+        session.calculator.goto(int(args[0]))
+        print(Fore.GREEN+f"Jumped to version {args[0]}")
+    except OperationError as e:
+        print(Fore.RED+f"Error: {e}")
+
+
+def _save(session: ReplSession, args: List[str]) -> None:
+    try:
+        session.calculator.save_history()
+        print(Fore.GREEN+f"History saved successfully")
+    except Exception as e:
+        print(Fore.RED+f"Error saving history: {e}")
+
+
+def _load(session: ReplSession, args: List[str]) -> None:
+    try:
+        session.calculator.load_history()
+        print(Fore.GREEN+f"History loaded successfully")
+    except Exception as e:
+        print(Fore.RED+f"Error loading history: {e}")
+
+
+def _compact(session: ReplSession, args: List[str]) -> None:
+    try:
+        count = session.calculator.compact_history()
+        print(Fore.GREEN+f"History segments compacted ({count} archived calculations)")
+    except Exception as e:
+        print(Fore.RED+f"Error compacting history: {e}")
+
+
+def _summary(session: ReplSession, args: List[str]) -> None:
+    for line in session.statistics.report():
+        print(Fore.BLUE+line)
+
+
+def _aggregate(session: ReplSession, args: List[str]) -> None:
+    parts = [arg.lower() for arg in args]
+    start = None
+    if 'today' in parts:
+        parts.remove('today')
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if len(parts) > 1:
+        print(Fore.YELLOW+f"Usage: aggregate [operation] [today]")
+        return
+    aggregates = session.calculator.aggregates
+    if parts:
+        name = session.registry.operation_name(parts[0])
+        totals = {name: aggregates.query(name, start)}
+    else:
+        totals = aggregates.by_operation(start)
+    if not any(t.count for t in totals.values()):
+        print(Fore.YELLOW+f"No matching calculations")
+        return
+    for name, t in totals.items():
+        print(Fore.BLUE+f"{name}: count={t.count} total={t.total} mean={t.mean} "
+                        f"min={t.minimum} max={t.maximum}")
+
+
+def _stats(session: ReplSession, args: List[str]) -> None:
+    metrics = session.calculator.metrics
+    action = args[0].lower() if args else 'show'
+    if action == 'on':
+        metrics.enabled = True
+        print(Fore.GREEN+f"Metrics enabled")
+    elif action == 'off':
+        metrics.enabled = False
+        print(Fore.GREEN+f"Metrics disabled")
+    elif action == 'reset':
+        metrics.reset()
+        print(Fore.GREEN+f"Metrics reset")
+    elif action == 'json' and len(args) == 2:
+        try:
+            path = metrics.dump(args[1])
+            print(Fore.GREEN+f"Metrics written to {path}")
+        except OSError as e:
+            print(Fore.RED+f"Error writing metrics: {e}")
+    elif action == 'show':
+        if not metrics.enabled:
+            print(Fore.YELLOW+f"Metrics are disabled. Type 'stats on' to start recording.")
+        for line in metrics.report():
+            print(Fore.BLUE+line)
+    else:
+        print(Fore.YELLOW+f"Usage: stats [on|off|reset|json <file>]")
+
+
+def _profile(session: ReplSession, args: List[str]) -> None:
+    profiler = session.profiler
+    action = args[0].lower() if args else 'status'
+    if action == 'on':
+        profiler.start()
+        print(Fore.GREEN+f"Profiling enabled")
+    elif action == 'off':
+        profiler.stop()
+        print(Fore.GREEN+f"Profiling disabled")
+    elif action == 'dump' and len(args) <= 2:
+        try:
+            report = profiler.dump(args[1] if len(args) == 2 else None)
+            print(Fore.BLUE+report)
+            if len(args) == 2:
+                print(Fore.GREEN+f"Profile written to {args[1]}")
+        except OSError as e:
+            print(Fore.RED+f"Error writing profile: {e}")
+    elif action == 'status':
+        print(Fore.GREEN+f"Profiling is {'on' if profiler.active else 'off'}")
+    else:
+        print(Fore.YELLOW+f"Usage: profile [on|off|dump [file]]")
+
+
+def _verify(session: ReplSession, args: List[str]) -> None:
+    config = session.calculator.config
+    action = args[0].lower() if args else 'run'
+    if action == 'run' and len(args) <= 1:
+        report = verify_history(
+            config.history_file, context_settings(config), config.verify_workers, config.verify_chunk_rows
+        )
+        for line in report.lines():
+            print((Fore.GREEN if report.ok else Fore.RED)+line)
+    elif action == 'background':
+        if session.verification is not None and not session.verification.done:
+            print(Fore.YELLOW+f"A verification is already running")
+            return
+        session.verification = BackgroundVerification.for_config(config)
+        print(Fore.GREEN+f"Verification started. Type 'verify status' to check on it.")
+    elif action == 'status':
+        verification = session.verification
+        if verification is None:
+            print(Fore.YELLOW+f"No verification started")
+        elif verification.done and verification.future.exception() is None:
+            report = verification.result()
+            for line in report.lines():
+                print((Fore.GREEN if report.ok else Fore.RED)+line)
+        else:
+            print(Fore.BLUE+verification.status())
+    else:
+        print(Fore.YELLOW+f"Usage: verify [background|status]")
+
+
+def _ans(session: ReplSession, args: List[str]) -> None:
+    ans = session.calculator.ans
+    if ans is None:
+        print(Fore.YELLOW+f"No previous result")
+    else:
+        print(Fore.GREEN+f"ans = {to_decimal(ans).normalize():f}")
+
+
+def default_registry() -> CommandRegistry:
+    """The REPL's commands: one per operation the factory knows, then the rest"""
+    registry = CommandRegistry()
+    for name in OperationFactory.names():
+        registry.register_operation(name, OPERATION_ALIASES.get(name, ()))
+    registry.register('ans', _ans, "Show the previous result; type ans for any number to reuse it")
+    registry.register('history', _history, "Show calculation history")
+    registry.register('clear', _clear, "Clear calculation history")
+    registry.register('undo', _undo, "Undo the last calculation")
+    registry.register('redo', _redo, "Redo the last undone calculation")
+    registry.register('versions', _versions, "List recent history versions")
+    registry.register('goto', _goto, "Jump to a history version", usage="goto <version>")
+    registry.register('save', _save, "Save calculation history to file")
+    registry.register('load', _load, "Load calculation history from file")
+    registry.register('compact', _compact, "Merge archived history segments into one")
+    registry.register('summary', _summary, "Show statistics of calculation results")
+    registry.register('aggregate', _aggregate, "Count, total, min and max of results by operation",
+                      usage="aggregate [operation] [today]")
+    registry.register('stats', _stats, "Show or manage performance metrics",
+                      usage="stats [on|off|reset|json <file>]")
+    registry.register('profile', _profile, "Profile CPU time and memory of operations",
+                      usage="profile [on|off|dump [file]]")
+    registry.register('verify', _verify, "Check saved results against recomputed ones, in worker processes",
+                      usage="verify [background|status]")
+    registry.register('help', _help, "Show this list of commands", aliases=('?',))
+    registry.register('exit', _exit, "Exit the calculator", aliases=('quit', 'q'))
+    return registry
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from decimal import Decimal
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream of Decimals in one pass
+    and constant memory, using Welford's update for mean and variance.
+    Infinite values are counted apart, since they have no mean.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.non_finite = 0
+        self.mean = Decimal(0)
+        self.m2 = Decimal(0)  # Sum of squared differences from the mean
+        self.min: Optional[Decimal] = None
+        self.max: Optional[Decimal] = None
+
+    def add(self, value: Decimal) -> None:
+        if not value.is_finite():
+            self.non_finite += 1
+            return
+        self.count += 1
+        if self.count == 1:
+            self.mean = self.min = self.max = value
+            return
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> Decimal:
+        """Sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else Decimal(0)
+
+    @property
+    def stdev(self) -> Decimal:
+        return self.variance.sqrt()
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream in bounded memory.
+
+    Values are bucketed by their binary exponent and top ``bits`` mantissa
+    bits, and each bucket is reported at its midpoint, so a quantile is
+    within 2**-bits (relative) of a recorded value. The number of buckets
+    depends on the range of the values, never on how many were recorded.
+    """
+
+    def __init__(self, bits: int = 7):
+        self.bits = bits
+        self._scale = 1 << bits
+        self.buckets: Dict[float, int] = defaultdict(int)  # bucket midpoint -> count
+        self.count = 0
+
+    def add(self, value: Decimal) -> None:
+        x = float(value)
+        if x and math.isfinite(x):
+            mantissa, exponent = math.frexp(abs(x))
+            x = math.copysign(math.ldexp((math.floor(mantissa * self._scale) + 0.5) / self._scale, exponent), x)
+        self.buckets[x] += 1
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Approximate ``q``-quantile (0-1), or None before any value
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for midpoint in sorted(self.buckets):
+            seen += self.buckets[midpoint]
+            if seen >= rank:
+                return midpoint
+        return midpoint  # pragma: no cover
+
+
+class StreamingStatistics:
+    """
+    Summary statistics of calculation results, updated one value at a time
+    so a summary costs the same however long the history is.
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, sketch_bits: int = 7):
+        self.results = RunningStats()
+        self.sketch = QuantileSketch(sketch_bits)
+        self.operations: Dict[str, int] = defaultdict(int)
+
+    def add(self, value: Decimal, operation: Optional[str] = None) -> None:
+        self.results.add(value)
+        self.sketch.add(value)
+        if operation is not None:
+            self.operations[operation] += 1
+
+    def add_many(self, values: Iterable[Decimal]) -> None:
+        for value in values:
+            self.add(value)
+
+    def summary(self) -> Dict[str, Any]:
+        results = self.results
+        return {
+            'count': results.count + results.non_finite,
+            'non_finite': results.non_finite,
+            'mean': results.mean if results.count else None,
+            'stdev': results.stdev if results.count else None,
+            'min': results.min,
+            'max': results.max,
+            'quantiles': {q: self.sketch.quantile(q) for q in self.QUANTILES},
+            'operations': dict(sorted(self.operations.items())),
+        }
+
+    def report(self) -> List[str]:
+        """
+        Human readable summary lines
+        """
+        summary = self.summary()
+        if not summary['count']:
+            return ["No calculations yet"]
+        lines = [f"Calculations: {summary['count']}"]
+        if summary['non_finite']:
+            lines.append(f"Infinite results: {summary['non_finite']}")
+        if summary['mean'] is not None:
+            lines.append(f"Mean: {summary['mean']:.10g}  Std dev: {summary['stdev']:.10g}")
+            lines.append(f"Min: {summary['min']}  Max: {summary['max']}")
+            lines.append("Quantiles (approx.): " + "  ".join(
+                f"p{q * 100:g}={value:.6g}" for q, value in summary['quantiles'].items()
+            ))
+        if summary['operations']:
+            lines.append("By operation: " + ", ".join(f"{name}={n}" for name, n in summary['operations'].items()))
+        return lines
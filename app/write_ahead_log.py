@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+import uuid
+
+from app.file_lock import FileLock
+
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log of history changes since the last checkpoint.
+
+    Each calculator session writes its own log next to the history file and
+    holds a lock on it while alive, so a log whose lock can be taken belongs
+    to a session that died and is replayed by the next calculator started.
+    Checkpointing atomically swaps in an empty log once the history file
+    holds everything the log described.
+    """
+
+    SUFFIX = '.wal'
+
+    def __init__(self, path: Path, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._lock = FileLock(path, blocking=False)
+        self._file: Optional[TextIO] = None
+
+    @classmethod
+    def for_session(cls, history_file: Path, fsync: bool = True) -> 'WriteAheadLog':
+        """
+        Create the log of a new session of ``history_file``
+        """
+        session = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        return cls(history_file.with_name(f"{history_file.name}.{session}{cls.SUFFIX}"), fsync)
+
+    @classmethod
+    def orphans(cls, history_file: Path) -> Iterator[Tuple[Path, FileLock]]:
+        """
+        Logs of ``history_file`` left behind by sessions that are no longer
+        running, each with its lock held by the caller until released
+        """
+        for path in sorted(history_file.parent.glob(f"{history_file.name}.*{cls.SUFFIX}")):
+            lock = FileLock(path, blocking=False)
+            if lock.acquire():
+                yield path, lock
+
+    @staticmethod
+    def read(path: Path) -> List[Dict[str, Any]]:
+        """
+        Records of a log, ignoring a final record torn by a crash mid-write
+        """
+        records = []
+        if not path.exists():
+            return records
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning(f"Ignoring torn record in {path.name}")
+                    break
+        return records
+
+    def open(self) -> None:
+        if self._file is not None:
+            return
+        if not self._lock.held and not self._lock.acquire():
+            raise OSError(f"Write-ahead log {self.path} is in use")
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Durably add a record to the log
+        """
+        self.open()
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def checkpoint(self) -> None:
+        """
+        Atomically replace the log with an empty one
+        """
+        if self._file is None:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        os.close(fd)
+        os.replace(temp_path, self.path)
+        self._file.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self) -> None:
+        """
+        Close the log and remove it; everything it held must be saved already
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.path.unlink(missing_ok=True)
+        self._lock.release()
+        self._lock.lock_path.unlink(missing_ok=True)
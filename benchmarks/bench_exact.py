@@ -0,0 +1,72 @@
+"""
+Benchmark: exact (Fraction) mode versus Decimal mode.
+
+Times one operation the way the calculator runs it in each mode, including
+the conversions exact mode adds (operands to int/Fraction, the result back
+to Decimal for display), and shows the error Decimal mode accumulates over
+a chain of divisions and multiplications that exact mode does not.
+
+Run with ``python -m benchmarks.bench_exact``.
+"""
+from decimal import Decimal
+import timeit
+
+from app.operations import OperationFactory
+from app.rational import from_exact, to_decimal, to_exact
+
+CASES = [
+    ('add', Decimal('123456789'), Decimal('987654321')),
+    ('add', Decimal('1.25'), Decimal('3.375')),
+    ('multiply', Decimal('123456789'), Decimal('987654321')),
+    ('multiply', Decimal('0.1'), Decimal('0.3')),
+    ('divide', Decimal('1'), Decimal('3')),
+    ('divide', Decimal('22.5'), Decimal('7.25')),
+    ('root', Decimal('1024'), Decimal('2')),
+    ('root', Decimal('2'), Decimal('2')),
+]
+
+
+def run(number: int = 50_000) -> list:
+    results = []
+    for name, a, b in CASES:
+        operation = OperationFactory.create_operation(name)
+
+        def decimal_mode():
+            return operation.execute(a, b)
+
+        def exact_mode():
+            return to_decimal(from_exact(operation.execute_exact(to_exact(a), to_exact(b))))
+
+        results.append({
+            'case': f"{name}({a}, {b})",
+            'decimal_ns': min(timeit.repeat(decimal_mode, number=number, repeat=5)) / number * 1e9,
+            'exact_ns': min(timeit.repeat(exact_mode, number=number, repeat=5)) / number * 1e9,
+        })
+    return results
+
+
+def chain_error(steps: int = 1000) -> dict:
+    """Divide by 3 then multiply by 3, ``steps`` times, starting from 1"""
+    divide = OperationFactory.create_operation('divide')
+    multiply = OperationFactory.create_operation('multiply')
+    approximate, exact = Decimal(1), to_exact(Decimal(1))
+    for _ in range(steps):
+        approximate = multiply.execute(divide.execute(approximate, Decimal(3)), Decimal(3))
+        exact = multiply.execute_exact(divide.execute_exact(exact, 3), 3)
+    return {'decimal': approximate, 'exact': to_decimal(from_exact(exact))}
+
+
+def main() -> None:
+    print("Time per operation (nanoseconds)")
+    print(f"{'operation':>26} {'Decimal':>9} {'exact':>9} {'ratio':>7}")
+    for row in run():
+        print(f"{row['case']:>26} {row['decimal_ns']:>9.0f} {row['exact_ns']:>9.0f} "
+              f"{row['exact_ns'] / row['decimal_ns']:>6.1f}x")
+    errors = chain_error()
+    print("\n1000 rounds of (x / 3) * 3 from 1:")
+    print(f"  Decimal mode: {errors['decimal']}")
+    print(f"  exact mode:   {errors['exact']}")
+
+
+if __name__ == "__main__":
+    main()
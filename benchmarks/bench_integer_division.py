@@ -0,0 +1,44 @@
+"""
+Benchmark: integer division and modulus on large integers.
+
+Compares IntegerDivisionOperation and ModulusOperation, which size the
+Decimal context to the operands and floor the result, with bare Decimal
+``//`` and ``%``. Bare Decimal needs a context precision of at least the
+quotient's digits to divide at all, so it is given one here; with the
+default precision of 28 it raises instead.
+
+Run with ``python -m benchmarks.bench_integer_division``.
+"""
+from decimal import Decimal, localcontext
+import random
+import timeit
+
+from app.operations import IntegerDivisionOperation, ModulusOperation
+
+
+def run(digit_counts=(30, 100, 300, 1000), number: int = 2000) -> dict:
+    rng = random.Random(42)
+    floor_div, modulus = IntegerDivisionOperation(), ModulusOperation()
+    results = {}
+    for digits in digit_counts:
+        a = Decimal(rng.randrange(10 ** (digits - 1), 10 ** digits))
+        b = Decimal(rng.randrange(10 ** (digits // 2 - 1), 10 ** (digits // 2)))
+        with localcontext() as context:
+            context.prec = digits + 2
+            decimal_ns = min(timeit.repeat(lambda: (a // b, a % b), number=number, repeat=5))
+        operations_ns = min(timeit.repeat(
+            lambda: (floor_div.execute(a, b), modulus.execute(a, b)), number=number, repeat=5
+        ))
+        results[digits] = {'decimal_us': decimal_ns / number * 1e6, 'operations_us': operations_ns / number * 1e6}
+    return results
+
+
+def main() -> None:
+    print("Quotient and remainder of an n-digit by an n/2-digit integer (microseconds)")
+    print(f"{'digits':>7} {'Decimal':>9} {'operations':>11}")
+    for digits, timing in run().items():
+        print(f"{digits:>7} {timing['decimal_us']:>9.1f} {timing['operations_us']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: memory of a repetitive history with and without interning.
+
+A workload drawing operands from a few dozen values is run through
+``perform_operation``, then saved and loaded back. With interning every
+calculation refers to one shared Decimal per distinct value (and one string
+per operation name); without it each holds its own copies. Memory is what
+tracemalloc sees allocated for the history, undo stack and versions.
+
+Run with ``python -m benchmarks.bench_interning``.
+"""
+from decimal import Decimal
+from pathlib import Path
+import random
+from tempfile import TemporaryDirectory
+import time
+import tracemalloc
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.interning import operand_table
+from app.operations import OperationFactory
+
+OPERATIONS = ('add', 'subtract', 'multiply', 'divide')
+
+
+def workload(count: int, distinct: int, seed: int = 1):
+    rng = random.Random(seed)
+    values = [str(Decimal(rng.randrange(1, 10_000)).scaleb(-2)) for _ in range(distinct)]
+    for _ in range(count):
+        # Operands as text, as the REPL passes them: each is parsed into a new Decimal
+        yield rng.choice(OPERATIONS), rng.choice(values), rng.choice(values)
+
+
+def measure(base_dir: Path, count: int, distinct: int) -> dict:
+    config = CalculatorConfig(
+        base_dir=base_dir, auto_save=False, wal_enabled=False, persist_undo=False,
+        max_history_size=count, max_input_value=Decimal('1e999')
+    )
+    operations = {name: OperationFactory.create_operation(name) for name in OPERATIONS}
+
+    tracemalloc.start()
+    calc = Calculator(config)
+    start = time.perf_counter()
+    for name, a, b in workload(count, distinct):
+        calc.set_operation(operations[name])
+        calc.perform_operation(a, b)
+    perform_seconds = time.perf_counter() - start
+    performed, _ = tracemalloc.get_traced_memory()
+    calc.save_history()
+    calc.close()
+    del calc
+
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    loaded = Calculator(config)
+    load_seconds = time.perf_counter() - start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(loaded.history) == count
+    loaded.close()
+    return {
+        'performed_mib': performed / 2 ** 20,
+        'loaded_mib': (after - before) / 2 ** 20,
+        'perform_ops_per_s': count / perform_seconds,
+        'load_rows_per_s': count / load_seconds,
+    }
+
+
+def run(count: int = 50_000, distinct: int = 50) -> dict:
+    results = {}
+    limit = operand_table.max_entries
+    for label, max_entries in (('interned', limit), ('plain', 0)):
+        operand_table.clear()
+        operand_table.max_entries = max_entries
+        try:
+            with TemporaryDirectory() as temp_dir:
+                results[label] = measure(Path(temp_dir), count, distinct)
+        finally:
+            operand_table.max_entries = limit
+    return results
+
+
+def main() -> None:
+    count, distinct = 50_000, 50
+    print(f"{count} calculations over {distinct} distinct operands (tracemalloc)")
+    print(f"{'':>10} {'performed MiB':>14} {'loaded MiB':>11} {'ops/s':>9} {'load rows/s':>12}")
+    for label, r in run(count, distinct).items():
+        print(
+            f"{label:>10} {r['performed_mib']:>14.1f} {r['loaded_mib']:>11.1f} "
+            f"{r['perform_ops_per_s']:>9,.0f} {r['load_rows_per_s']:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
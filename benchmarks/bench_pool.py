@@ -0,0 +1,67 @@
+"""
+Benchmark: serving many tenants from one calculator pool.
+
+Requests from ``tenants`` tenants, each of which does a few calculations
+from a small set of common ones, go through pools holding at most
+``max_calculators`` calculators at once. Traced memory stays bounded by the
+pool size rather than growing with the number of tenants, and the shared
+result cache answers the calculations tenants have in common.
+
+Run with ``python -m benchmarks.bench_pool``.
+"""
+from decimal import Decimal
+from pathlib import Path
+import random
+from tempfile import TemporaryDirectory
+import time
+import tracemalloc
+
+from app.calculator_config import CalculatorConfig
+from app.calculator_pool import CalculatorPool
+
+COMMON = [
+    ('add', 12, 30), ('divide', 22, 7), ('multiply', Decimal('3.5'), 4), ('power', 2, 32), ('subtract', 100, 1),
+]
+
+
+def run(tenants: int = 1_000, requests: int = 2_000, sizes=(10, 100, 1_000), seed: int = 1) -> dict:
+    results = {}
+    for max_calculators in sizes:
+        rng = random.Random(seed)
+        with TemporaryDirectory() as temp_dir:
+            config = CalculatorConfig(
+                base_dir=Path(temp_dir), auto_save=False, wal_enabled=False, persist_undo=False,
+                max_input_value=Decimal('1e999')
+            )
+            tracemalloc.start()
+            start = time.perf_counter()
+            with CalculatorPool(config, max_calculators=max_calculators) as pool:
+                for _ in range(requests):
+                    name, a, b = rng.choice(COMMON)
+                    pool.calculate(f"tenant{rng.randrange(tenants)}", name, a, b)
+                _, peak = tracemalloc.get_traced_memory()
+                stats = pool.stats()
+            seconds = time.perf_counter() - start
+            tracemalloc.stop()
+        results[max_calculators] = {
+            'requests_per_s': requests / seconds,
+            'peak_mib': peak / 2 ** 20,
+            'created': stats['created'],
+            'cache_hit_rate': stats['cache_hits'] / max(stats['cache_hits'] + stats['cache_misses'], 1),
+        }
+    return results
+
+
+def main() -> None:
+    tenants, requests = 1_000, 2_000
+    print(f"{requests} requests from {tenants} tenants")
+    print(f"{'pool size':>10} {'requests/s':>12} {'peak MiB':>10} {'opened':>8} {'cache hits':>11}")
+    for size, r in run(tenants, requests).items():
+        print(
+            f"{size:>10} {r['requests_per_s']:>12,.0f} {r['peak_mib']:>10.1f} "
+            f"{r['created']:>8} {r['cache_hit_rate']:>11.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: integer power and modular exponentiation over large exponents.
+
+Times ``power`` on integral operands, which float arithmetic used to overflow
+for, and ``modpow`` against ``power`` followed by ``modulus``. Also times how
+quickly the size guard refuses a power whose result would be too large to
+build.
+
+Run with ``python -m benchmarks.bench_power``.
+"""
+from decimal import Decimal
+import timeit
+
+from app.exceptions import OperationError
+from app.operations import MAX_POWER_DIGITS, OperationFactory
+
+MODULUS = Decimal(1_000_000_007)
+
+
+def float_power(a: Decimal, b: Decimal):
+    """The float arithmetic every power went through before integer mode"""
+    try:
+        return Decimal(pow(float(a), float(b)))
+    except OverflowError:
+        return None
+
+
+def best_time(function, number: int) -> float:
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def run(exponents=(10, 100, 1_000, 10_000, 100_000), base: Decimal = Decimal(3)) -> list:
+    power = OperationFactory.create_operation('power')
+    modulus = OperationFactory.create_operation('modulus')
+    modpow = OperationFactory.create_operation('modpow')
+    results = []
+    for exponent in exponents:
+        b = Decimal(exponent)
+        number = max(1, 10_000 // exponent)
+        results.append({
+            'exponent': exponent,
+            'float_ns': best_time(lambda: float_power(base, b), number) * 1e9,
+            'float_overflows': float_power(base, b) is None,
+            'power_ns': best_time(lambda: power.execute(base, b), number) * 1e9,
+            'power_then_mod_ns': best_time(lambda: modulus.execute(power.execute(base, b), MODULUS), number) * 1e9,
+            'modpow_ns': best_time(lambda: modpow.execute(base, b, MODULUS), number) * 1e9,
+        })
+    return results
+
+
+def huge_exponents(exponents=(10 ** 9, 10 ** 100, 10 ** 999), base: Decimal = Decimal(3)) -> list:
+    """modpow on exponents whose full power could never be built, and the guard refusing power"""
+    power = OperationFactory.create_operation('power')
+    modpow = OperationFactory.create_operation('modpow')
+
+    def refused(b: Decimal) -> None:
+        try:
+            power.execute(base, b)
+        except OperationError:
+            return
+        raise AssertionError(f"power accepted exponent {b}")
+
+    results = []
+    for exponent in exponents:
+        b = Decimal(exponent)
+        results.append({
+            'exponent': f"1e{len(str(exponent)) - 1}",
+            'modpow_ns': best_time(lambda: modpow.execute(base, b, MODULUS), 1_000) * 1e9,
+            'guard_ns': best_time(lambda: refused(b), 1_000) * 1e9,
+        })
+    return results
+
+
+def main() -> None:
+    print("Time per operation, 3 ** n (microseconds)")
+    print(f"{'n':>8} {'float':>9} {'power':>10} {'power % m':>10} {'modpow':>9}")
+    for row in run():
+        float_time = 'overflow' if row['float_overflows'] else f"{row['float_ns'] / 1e3:.2f}"
+        print(
+            f"{row['exponent']:>8} {float_time:>9} {row['power_ns'] / 1e3:>10.2f} "
+            f"{row['power_then_mod_ns'] / 1e3:>10.2f} {row['modpow_ns'] / 1e3:>9.2f}"
+        )
+    print(f"\nExponents past the {MAX_POWER_DIGITS}-digit power limit (microseconds)")
+    print(f"{'n':>8} {'modpow':>9} {'refusal':>9}")
+    for row in huge_exponents():
+        print(f"{row['exponent']:>8} {row['modpow_ns'] / 1e3:>9.2f} {row['guard_ns'] / 1e3:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: n-ary reductions versus a loop of binary operations.
+
+Sums a list of values the way the calculator used to (one ``add`` per value,
+each with its own undo entry, log record and autosave) and with a single
+``sum`` reduction recorded as one calculation, with the configuration the
+REPL runs under. Also compares the pairwise summation ``sum`` uses with a
+left-to-right running total, for speed and for rounding error at low
+precision.
+
+Run with ``python -m benchmarks.bench_reductions``.
+"""
+import decimal
+from decimal import Decimal
+from fractions import Fraction
+from pathlib import Path
+import random
+from tempfile import TemporaryDirectory
+import time
+import timeit
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+from app.operations import OperationFactory
+
+
+def build_calculator(base_dir: Path) -> Calculator:
+    config = CalculatorConfig(base_dir=base_dir, auto_save=True, wal_fsync=False)
+    config.history_file.unlink(missing_ok=True)
+    calc = Calculator(config)
+    calc.add_observer(AutoSaveObserver(calc))
+    return calc
+
+
+def random_values(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [Decimal(rng.randrange(-10 ** 12, 10 ** 12)).scaleb(-6) for _ in range(count)]
+
+
+def per_pair_loop(calc: Calculator, values: list) -> Decimal:
+    calc.set_operation(OperationFactory.create_operation('add'))
+    total = values[0]
+    for value in values[1:]:
+        total = calc.perform_operation(total, value)
+    return total
+
+
+def reduction(calc: Calculator, values: list) -> Decimal:
+    calc.set_operation(OperationFactory.create_operation('sum'))
+    return calc.perform_reduction(values)
+
+
+def run(sizes=(10, 100, 1_000)) -> dict:
+    results = {}
+    for size in sizes:
+        values = random_values(size)
+        timings = {}
+        for name, method in (('loop', per_pair_loop), ('reduction', reduction)):
+            with TemporaryDirectory() as temp_dir:
+                calc = build_calculator(Path(temp_dir))
+                start = time.perf_counter()
+                method(calc, values)
+                timings[name] = time.perf_counter() - start
+                calc.close()
+        results[size] = {
+            'loop_values_per_s': size / timings['loop'],
+            'reduction_values_per_s': size / timings['reduction'],
+        }
+    return results
+
+
+def running_total(values: list) -> Decimal:
+    total = values[0]
+    for value in values[1:]:
+        total += value
+    return total
+
+
+def summation(size: int = 100_000, precision: int = 12) -> dict:
+    """Speed and error of pairwise versus running-total summation"""
+    values = random_values(size)
+    exact = sum(Fraction(value) for value in values)
+    operation = OperationFactory.create_operation('sum')
+    results = {}
+    with decimal.localcontext() as context:
+        context.prec = precision
+        for name, method in (('running total', running_total), ('pairwise', lambda v: operation.execute(*v))):
+            seconds = min(timeit.repeat(lambda: method(values), number=1, repeat=5))
+            results[name] = {
+                'values_per_s': size / seconds,
+                'error': abs(Fraction(method(values)) - exact),
+            }
+    return results
+
+
+def main() -> None:
+    print("Summing a list in the calculator (values per second, autosave on)")
+    print(f"{'values':>8} {'add loop':>10} {'sum':>12} {'speedup':>8}")
+    for size, row in run().items():
+        print(
+            f"{size:>8} {row['loop_values_per_s']:>10.0f} {row['reduction_values_per_s']:>12.0f} "
+            f"{row['reduction_values_per_s'] / row['loop_values_per_s']:>7.0f}x"
+        )
+    print("\nSumming 100000 values at 12 significant digits")
+    print(f"{'method':>14} {'values/s':>12} {'abs error':>12}")
+    for name, row in summation().items():
+        print(f"{name:>14} {row['values_per_s']:>12.0f} {float(row['error']):>12.4g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: input validation by input type.
+
+Compares the original ``Decimal(str(value))`` conversion with the
+type-specific fast paths of ``InputValidator.validate_number``, and a loop of
+single validations with ``validate_many`` on lists and NumPy arrays.
+
+Run with ``python -m benchmarks.bench_validation``.
+"""
+from decimal import Decimal
+import timeit
+
+import numpy as np
+
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+from app.input_validators import InputValidator
+
+
+def validate_via_str(value, config):
+    """The validation every input went through before the fast paths"""
+    try:
+        num = Decimal(str(value))
+    except Exception:
+        raise ValidationError(f"Invalid number: {value}")
+    if abs(num) > config.max_input_value:
+        raise ValidationError(f"Value {num} exceeds maximum {config.max_input_value}")
+    return num
+
+
+INPUTS = {
+    'Decimal': Decimal('12345.678'),
+    'int': 1234567,
+    'float': 12345.678,
+    'str': '12345.678',
+}
+
+
+def run(number: int = 200_000, array_size: int = 100_000) -> dict:
+    config = CalculatorConfig(max_input_value=Decimal('1e999'))
+    results = {}
+    for name, value in INPUTS.items():
+        before = min(timeit.repeat(lambda: validate_via_str(value, config), number=number, repeat=7))
+        after = min(timeit.repeat(lambda: InputValidator.validate_number(value, config), number=number, repeat=7))
+        results[name] = {'before_ns': before / number * 1e9, 'after_ns': after / number * 1e9}
+
+    arrays = {
+        'list[int]': list(range(array_size)),
+        'int64 array': np.arange(array_size, dtype=np.int64),
+        'float64 array': np.linspace(0, 1000, array_size),
+    }
+    for name, values in arrays.items():
+        loop = min(timeit.repeat(
+            lambda: [validate_via_str(v, config) for v in values], number=1, repeat=3
+        ))
+        bulk = min(timeit.repeat(lambda: InputValidator.validate_many(values, config), number=1, repeat=3))
+        results[name] = {'before_ns': loop / array_size * 1e9, 'after_ns': bulk / array_size * 1e9}
+    return results
+
+
+def main() -> None:
+    print("Validation cost per value (nanoseconds)")
+    print(f"{'input':>14} {'Decimal(str())':>15} {'fast path':>10} {'speedup':>8}")
+    for name, timing in run().items():
+        print(
+            f"{name:>14} {timing['before_ns']:>15.0f} {timing['after_ns']:>10.0f} "
+            f"{timing['before_ns'] / timing['after_ns']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: cost of jumping to a history version versus stepping with undo.
+
+A version that is not the newest state of its list is a view sharing that
+list's storage, so ``goto`` costs the same however long the history is and
+however far away the target is; so does the first calculation after it.
+Undo/redo pays one step per version.
+
+Calculators run with the default configuration, write-ahead log (with fsync)
+included; only the history size limit is raised to hold the history, which
+is generated and loaded as on startup. Times are the best of several runs.
+
+Run with ``python -m benchmarks.bench_versions``.
+"""
+from decimal import Decimal
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import timeit
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history_generator import HistoryGenerator
+from app.operations import OperationFactory
+
+
+def build_calculator(base_dir: Path, length: int, distance: int) -> Calculator:
+    """A loaded history of ``length`` rows followed by ``distance`` calculations"""
+    config = CalculatorConfig(max_history_size=length + 10 * distance).relocated(base_dir)
+    HistoryGenerator({'add': 1.0, 'multiply': 1.0}).write(config.history_file, length)
+    calc = Calculator(config)
+    calc.set_operation(OperationFactory.create_operation('add'))
+    for i in range(distance):
+        calc.perform_operation(Decimal(i), Decimal(1))
+    return calc
+
+
+def run(lengths=(1_000, 10_000, 100_000), distance: int = 100, repeat: int = 50) -> dict:
+    results = {}
+    for length in lengths:
+        with TemporaryDirectory() as temp_dir:
+            calc = build_calculator(Path(temp_dir), length, distance)
+            tip = calc.versions.current
+            earlier = tip - distance // 2
+            loaded = tip - distance
+
+            def jump(version):
+                return lambda: calc.goto(version)
+
+            def jump_and_calculate():
+                calc.goto(earlier)
+                calc.perform_operation(Decimal(1), Decimal(1))
+
+            def step_back_and_forth():
+                for _ in range(distance):
+                    calc.undo()
+                for _ in range(distance):
+                    calc.redo()
+
+            results[length] = {
+                'goto_tip_us': min(timeit.repeat(jump(tip), number=1, repeat=repeat)) * 1e6,
+                'goto_earlier_us': min(timeit.repeat(jump(earlier), number=1, repeat=repeat)) * 1e6,
+                'goto_loaded_us': min(timeit.repeat(jump(loaded), number=1, repeat=repeat)) * 1e6,
+                'goto_calculate_us': min(timeit.repeat(jump_and_calculate, number=1, repeat=repeat)) * 1e6,
+                'undo_redo_us': min(timeit.repeat(step_back_and_forth, number=1, repeat=3)) * 1e6 / 2,
+            }
+            calc.close()
+    return results
+
+
+def main() -> None:
+    distance = 100
+    print(f"Default configuration; {distance} calculations after the loaded history (microseconds)")
+    print(
+        f"{'history':>10} {'goto tip':>10} {'goto -50':>10} {'goto loaded':>12} "
+        f"{'goto + calc':>12} {'100 undos':>12}"
+    )
+    for length, timing in run(distance=distance).items():
+        print(
+            f"{length:>10} {timing['goto_tip_us']:>10.1f} {timing['goto_earlier_us']:>10.1f} "
+            f"{timing['goto_loaded_us']:>12.1f} {timing['goto_calculate_us']:>12.1f} "
+            f"{timing['undo_redo_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Benchmark suite for the calculation pipeline, with results as JSON and a
+check against a stored baseline.
+
+Measures ``perform_operation`` throughput (with and without the write-ahead
+log), undo/redo stepping on a long history, ``save_history`` and loading on
+startup for 10k to 1M rows (also from generated, gzip-archived segments),
+``Calculation.from_dict`` and the REPL running a script of commands.
+Every metric records whether higher is better, so a comparison flags a
+regression whichever way it moves.
+
+Run with ``python -m benchmarks.suite``. Options:
+
+    --quick                 smaller sizes, for a run of a few seconds
+    --rows N [N ...]        history sizes for save/load (default 10000 100000 1000000)
+    --output FILE           write the results as JSON
+    --baseline FILE         compare against a baseline (default benchmarks/baseline.json)
+    --save-baseline         write the results as the new baseline instead
+    --tolerance FRACTION    slowdown allowed before a metric is a regression (default 0.25)
+
+The exit status is 1 when any metric regressed. Baselines are specific to the
+machine they were recorded on; record one before comparing on a new machine.
+"""
+import argparse
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from decimal import Decimal
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+from unittest.mock import patch
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import PATH_VARIABLES, CalculatorConfig
+from app.history_generator import HistoryGenerator
+from app.operations import OperationFactory
+
+BASELINE = Path(__file__).with_name('baseline.json')
+
+# Operations the synthetic workloads cycle through, with operands that keep them valid
+WORKLOAD = (
+    ('add', Decimal('12.5'), Decimal('7.25')),
+    ('subtract', Decimal('1000'), Decimal('0.001')),
+    ('multiply', Decimal('3.14159'), Decimal('2.71828')),
+    ('divide', Decimal('22'), Decimal('7')),
+    ('power', Decimal('2'), Decimal('10')),
+    ('modulus', Decimal('1234567'), Decimal('89')),
+)
+
+
+class Sizes(NamedTuple):
+    operations: int = 20_000
+    undo_history: int = 10_000
+    undo_steps: int = 1_000
+    rows: Sequence[int] = (10_000, 100_000, 1_000_000)
+    from_dict_rows: int = 100_000
+    repl_lines: int = 2_000
+
+
+QUICK = Sizes(
+    operations=2_000, undo_history=2_000, undo_steps=200, rows=(10_000,), from_dict_rows=10_000, repl_lines=200
+)
+
+
+class Metric(NamedTuple):
+    value: float
+    unit: str
+    higher_is_better: bool = True
+
+
+class Regression(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+    change: float  # Fraction worse than the baseline
+
+
+def build_config(base_dir: Path, **options) -> CalculatorConfig:
+    """
+    Configuration keeping every file under ``base_dir``, whatever paths the
+    environment sets, with workload-safe limits
+    """
+    options.setdefault('max_input_value', Decimal('1e999'))
+    options.setdefault('auto_save', False)
+    options.setdefault('wal_enabled', False)
+    return CalculatorConfig(**options).relocated(base_dir)
+
+
+def build_calculator(base_dir: Path, **options) -> Calculator:
+    return Calculator(build_config(base_dir, **options))
+
+
+def synthetic_history(count: int) -> List[Calculation]:
+    """Calculations of the workload's operations, one second apart"""
+    mix = {name: 1.0 for name, _, _ in WORKLOAD}
+    return list(HistoryGenerator(mix).calculations(count))
+
+
+def throughput(count: int, seconds: float) -> float:
+    return count / seconds if seconds else float('inf')
+
+
+def bench_perform_operation(sizes: Sizes) -> Dict[str, Metric]:
+    results = {}
+    operations = [OperationFactory.create_operation(name) for name, _, _ in WORKLOAD]
+    for name, options in (('perform_operation', {}), ('perform_operation_wal', {'wal_enabled': True, 'wal_fsync': False})):
+        with TemporaryDirectory() as temp_dir:
+            calc = build_calculator(Path(temp_dir), max_history_size=sizes.operations, **options)
+            start = time.perf_counter()
+            for i in range(sizes.operations):
+                index = i % len(WORKLOAD)
+                calc.set_operation(operations[index])
+                calc.perform_operation(WORKLOAD[index][1], WORKLOAD[index][2])
+            seconds = time.perf_counter() - start
+            calc.close()
+        results[f'{name}.ops_per_s'] = Metric(throughput(sizes.operations, seconds), 'ops/s')
+    return results
+
+
+def bench_undo_redo(sizes: Sizes) -> Dict[str, Metric]:
+    with TemporaryDirectory() as temp_dir:
+        calc = build_calculator(
+            Path(temp_dir), max_history_size=sizes.undo_history, max_undo_depth=sizes.undo_steps
+        )
+        calc.set_operation(OperationFactory.create_operation('add'))
+        for i in range(sizes.undo_history):
+            calc.perform_operation(Decimal(i), Decimal(1))
+        start = time.perf_counter()
+        for _ in range(sizes.undo_steps):
+            calc.undo()
+        for _ in range(sizes.undo_steps):
+            calc.redo()
+        seconds = time.perf_counter() - start
+        calc.close()
+    return {
+        f'undo_redo.{sizes.undo_history}.steps_per_s': Metric(throughput(2 * sizes.undo_steps, seconds), 'steps/s'),
+    }
+
+
+def bench_save_load(sizes: Sizes) -> Dict[str, Metric]:
+    results = {}
+    for rows in sizes.rows:
+        history = synthetic_history(rows)
+        with TemporaryDirectory() as temp_dir:
+            options = {'max_history_size': rows, 'persist_undo': False}
+            calc = build_calculator(Path(temp_dir), **options)
+            calc.history = history
+            start = time.perf_counter()
+            calc.save_history()
+            save_seconds = time.perf_counter() - start
+            calc.close()
+
+            start = time.perf_counter()
+            loaded = build_calculator(Path(temp_dir), **options)
+            load_seconds = time.perf_counter() - start
+            assert len(loaded.history) == rows, f"loaded {len(loaded.history)} of {rows} rows"
+            loaded.close()
+        results[f'save_history.{rows}.rows_per_s'] = Metric(throughput(rows, save_seconds), 'rows/s')
+        results[f'load_history.{rows}.rows_per_s'] = Metric(throughput(rows, load_seconds), 'rows/s')
+    return results
+
+
+def bench_load_segments(sizes: Sizes) -> Dict[str, Metric]:
+    """Startup load of generated histories archived in ten gzip segments"""
+    results = {}
+    for rows in sizes.rows:
+        with TemporaryDirectory() as temp_dir:
+            options = {'max_history_size': rows, 'persist_undo': False}
+            config = build_config(Path(temp_dir))
+            HistoryGenerator().write(config.history_file, rows, 'segments', segment_rows=max(rows // 10, 1))
+            start = time.perf_counter()
+            loaded = build_calculator(Path(temp_dir), **options)
+            seconds = time.perf_counter() - start
+            assert len(loaded.history) == rows, f"loaded {len(loaded.history)} of {rows} rows"
+            loaded.close()
+        results[f'load_segments.{rows}.rows_per_s'] = Metric(throughput(rows, seconds), 'rows/s')
+    return results
+
+
+def bench_from_dict(sizes: Sizes) -> Dict[str, Metric]:
+    rows = [calc.to_dict() for calc in synthetic_history(sizes.from_dict_rows)]
+    start = time.perf_counter()
+    for row in rows:
+        Calculation.from_dict(row)
+    seconds = time.perf_counter() - start
+    return {'from_dict.rows_per_s': Metric(throughput(len(rows), seconds), 'rows/s')}
+
+
+def repl_script(lines: int) -> List[str]:
+    """Inline calculations, a pipeline and undo/redo, repeated, then exit"""
+    cycle = ['add 2 3', 'multiply 4 5', 'divide 22 7 | power 2', 'undo', 'redo', 'sum 1 2 3 4', 'ans']
+    return [cycle[i % len(cycle)] for i in range(lines)] + ['exit']
+
+
+@contextmanager
+def isolated_environment(base_dir: Path) -> Iterator[None]:
+    """
+    Run with the configuration, history and logs of ``base_dir``; the other
+    path environment variables are cleared so nothing lands outside it. Handlers
+    the root logger picked up earlier (logging adds one writing to stderr
+    when a message is logged before any is set up) are detached meanwhile.
+    """
+    cwd = os.getcwd()
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    os.chdir(base_dir)
+    try:
+        with patch.dict(os.environ):
+            for name in PATH_VARIABLES:
+                os.environ.pop(name, None)
+            os.environ['CALCULATOR_BASE_DIR'] = str(base_dir)
+            yield
+    finally:
+        os.chdir(cwd)
+        for handler in handlers:
+            root.addHandler(handler)
+
+
+def bench_repl(sizes: Sizes) -> Dict[str, Metric]:
+    from app.calculator_repl import calculator_repl
+
+    script = iter(repl_script(sizes.repl_lines))
+    with TemporaryDirectory() as temp_dir, isolated_environment(Path(temp_dir)):
+        with patch('builtins.input', lambda _: next(script)), redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            calculator_repl()
+            seconds = time.perf_counter() - start
+    return {'repl_script.lines_per_s': Metric(throughput(sizes.repl_lines, seconds), 'lines/s')}
+
+
+BENCHMARKS = (
+    bench_perform_operation, bench_undo_redo, bench_save_load, bench_load_segments, bench_from_dict, bench_repl
+)
+
+
+def run(sizes: Sizes = Sizes()) -> Dict[str, Metric]:
+    results = {}
+    for benchmark in BENCHMARKS:
+        results.update(benchmark(sizes))
+    return results
+
+
+def to_json(results: Dict[str, Metric]) -> dict:
+    return {
+        'meta': {
+            'recorded': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'metrics': {name: metric._asdict() for name, metric in results.items()},
+    }
+
+
+def from_json(data: dict) -> Dict[str, Metric]:
+    return {name: Metric(**metric) for name, metric in data['metrics'].items()}
+
+
+def compare(
+        results: Dict[str, Metric],
+        baseline: Dict[str, Metric],
+        tolerance: float = 0.25
+) -> List[Regression]:
+    """Metrics more than ``tolerance`` worse than the baseline; metrics only one side has are skipped"""
+    regressions = []
+    for name, metric in results.items():
+        base = baseline.get(name)
+        if base is None or not base.value:
+            continue
+        if metric.higher_is_better:
+            change = (base.value - metric.value) / base.value
+        else:
+            change = (metric.value - base.value) / base.value
+        if change > tolerance:
+            regressions.append(Regression(name, base.value, metric.value, change))
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the calculation pipeline")
+    parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--rows', type=int, nargs='+')
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    sizes = QUICK if args.quick else Sizes()
+    if args.rows:
+        sizes = sizes._replace(rows=tuple(args.rows))
+    results = run(sizes)
+
+    width = max(len(name) for name in results)
+    for name, metric in results.items():
+        print(f"{name:<{width}} {metric.value:>14,.0f} {metric.unit}")
+
+    data = to_json(results)
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=2))
+        print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(data, indent=2))
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+
+    regressions = compare(results, from_json(json.loads(args.baseline.read_text())), args.tolerance)
+    if not regressions:
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for r in regressions:
+        print(f"  {r.name}: {r.baseline:,.0f} -> {r.current:,.0f} ({r.change:.0%} worse)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
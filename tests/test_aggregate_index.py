@@ -0,0 +1,73 @@
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+
+from app.aggregate_index import Aggregate, AggregateIndex, Totals
+from app.calculation import Calculation
+
+
+def calc(operation, a, b, minute=0, hour=9, result=None):
+    return Calculation(operation=operation, operand1=Decimal(a), operand2=Decimal(b), result=result,
+                       timestamp=datetime(2025, 1, 1, hour, minute))
+
+
+def test_aggregate_add_and_remove_are_exact():
+    aggregate = Aggregate()
+    for value in ('1e30', '1e-30', '-5', 'Infinity'):
+        aggregate.add(Decimal(value))
+    totals = aggregate.totals()
+    assert (totals.count, totals.non_finite, totals.minimum, totals.maximum) == (4, 1, -5, Decimal('Infinity'))
+    assert aggregate.total == Decimal('999999999999999999999999999995.000000000000000000000000000001')
+    aggregate.remove(Decimal('1e30'))
+    aggregate.remove(Decimal('Infinity'))
+    assert aggregate.total == Decimal('-4.999999999999999999999999999999')
+    assert (aggregate.minimum, aggregate.maximum) == (Decimal(-5), Decimal('1e-30'))
+    aggregate.remove(Decimal('-5'))
+    assert (aggregate.count, aggregate.minimum, aggregate.maximum) == (1, Decimal('1e-30'), Decimal('1e-30'))
+
+def test_aggregate_keeps_duplicates_of_extremes():
+    aggregate = Aggregate()
+    for value in (3, 1, 1, 2):
+        aggregate.add(Decimal(value))
+    aggregate.remove(Decimal(1))
+    assert aggregate.minimum == 1
+    aggregate.remove(Decimal(1))
+    assert aggregate.minimum == 2
+
+def test_index_buckets_by_operation_and_time():
+    index = AggregateIndex(bucket_minutes=30)
+    index.extend([
+        calc('divide', 1, 4, minute=5), calc('divide', 1, 2, minute=40),
+        calc('add', 1, 2, minute=10), calc('divide', 9, 3, hour=11),
+    ])
+    assert len(index.buckets) == 4
+    assert index.bucket_start(datetime(2025, 1, 1, 9, 59, 59)) == datetime(2025, 1, 1, 9, 30)
+
+    divisions = index.query('divide')
+    assert (divisions.count, divisions.total, divisions.minimum, divisions.maximum) == (3, Decimal('3.75'), Decimal('0.25'), 3)
+    assert divisions.mean == Decimal('1.25')
+    assert index.query('divide', start=datetime(2025, 1, 1, 9, 45)).count == 2
+    assert index.query('divide', end=datetime(2025, 1, 1, 10)).total == Decimal('0.75')
+    assert index.query('multiply') == Totals(0, Decimal(0), None, None)
+    assert index.query('multiply').mean is None
+    assert list(index.by_operation()) == ['add', 'divide']
+    assert [(name, bucket.hour, bucket.minute) for name, bucket, _ in index.series()] == [
+        ('add', 9, 0), ('divide', 9, 0), ('divide', 9, 30), ('divide', 11, 0)
+    ]
+
+def test_index_replace_removes_and_adds_only_the_changed_tail():
+    first, second, third = calc('add', 1, 1), calc('add', 2, 2), calc('multiply', 3, 3)
+    index = AggregateIndex()
+    index.extend([first, second])
+    index.replace([first, second], [first, third])
+    assert index.query('add').count == 1
+    assert index.query('multiply').total == 9
+    index.replace([first, third], [], prefix_length=0)
+    assert index.buckets == {}
+
+def test_index_fractional_results():
+    index = AggregateIndex()
+    calculation = calc('divide', 1, 3, result=Fraction(1, 3))
+    index.add(calculation)
+    index.remove(calculation)
+    assert index.buckets == {}
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from benchmarks.suite import (
+    Metric, Sizes, bench_load_segments, bench_repl, bench_save_load, compare, from_json, main, run, to_json
+)
+
+TINY = Sizes(operations=60, undo_history=60, undo_steps=10, rows=(100,), from_dict_rows=100, repl_lines=20)
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = {
+        'ops': Metric(1000, 'ops/s'),
+        'latency': Metric(10, 'ms', higher_is_better=False),
+        'steady': Metric(500, 'ops/s'),
+        'retired': Metric(1, 'ops/s'),
+    }
+    results = {
+        'ops': Metric(700, 'ops/s'),
+        'latency': Metric(14, 'ms', higher_is_better=False),
+        'steady': Metric(450, 'ops/s'),
+        'new': Metric(1, 'ops/s'),
+    }
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert [(r.name, round(r.change, 2)) for r in regressions] == [('ops', 0.3), ('latency', 0.4)]
+    assert compare(results, baseline, tolerance=0.5) == []
+
+
+def test_json_round_trip():
+    results = {'ops': Metric(1000.5, 'ops/s'), 'latency': Metric(3, 'ms', False)}
+    data = json.loads(json.dumps(to_json(results)))
+    assert set(data['meta']) == {'recorded', 'python', 'platform'}
+    assert from_json(data) == results
+
+
+@pytest.mark.parametrize('benchmark', [bench_save_load, bench_load_segments, bench_repl])
+def test_benchmarks_write_nothing_outside_their_temp_dir(benchmark, tmp_path, monkeypatch):
+    outside = tmp_path / 'configured'
+    outside.mkdir()
+    (outside / 'history.csv').write_text('operation,operand1,operand2,result,timestamp\n')
+    monkeypatch.setenv('CALCULATOR_BASE_DIR', str(outside / 'base'))
+    monkeypatch.setenv('CALCULATOR_HISTORY_FILE', str(outside / 'history.csv'))
+    monkeypatch.setenv('CALCULATOR_HISTORY_DIR', str(outside / 'history'))
+    monkeypatch.setenv('CALCULATOR_LOG_DIR', str(outside / 'logs'))
+    monkeypatch.setenv('CALCULATOR_LOG_FILE', str(outside / 'logs' / 'log.log'))
+    cwd = tmp_path / 'cwd'
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+
+    benchmark(TINY)
+    assert [p.name for p in outside.iterdir()] == ['history.csv']
+    assert (outside / 'history.csv').read_text() == 'operation,operand1,operand2,result,timestamp\n'
+    assert list(cwd.iterdir()) == []
+
+
+@pytest.mark.slow
+def test_run_covers_the_pipeline():
+    results = run(TINY)
+    assert set(results) == {
+        'perform_operation.ops_per_s', 'perform_operation_wal.ops_per_s', 'undo_redo.60.steps_per_s',
+        'save_history.100.rows_per_s', 'load_history.100.rows_per_s', 'load_segments.100.rows_per_s',
+        'from_dict.rows_per_s',
+        'repl_script.lines_per_s',
+    }
+    assert all(metric.value > 0 for metric in results.values())
+
+
+@pytest.mark.slow
+def test_main_records_and_checks_a_baseline(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr('benchmarks.suite.QUICK', TINY)
+    baseline = tmp_path / 'baseline.json'
+    output = tmp_path / 'results.json'
+
+    assert main(['--quick', '--baseline', str(baseline)]) == 0
+    assert "No baseline" in capsys.readouterr().out
+    assert main(['--quick', '--baseline', str(baseline), '--save-baseline']) == 0
+    assert 'repl_script.lines_per_s' in json.loads(baseline.read_text())['metrics']
+
+    # A baseline far faster than anything measured flags every metric
+    data = json.loads(baseline.read_text())
+    for metric in data['metrics'].values():
+        metric['value'] *= 1000
+    baseline.write_text(json.dumps(data))
+    assert main(['--quick', '--baseline', str(baseline), '--output', str(output)]) == 1
+    out = capsys.readouterr().out
+    assert "Regressions against" in out and "repl_script.lines_per_s" in out
+    assert json.loads(output.read_text())['metrics'].keys() == data['metrics'].keys()
@@ -84,6 +84,20 @@ def test_invalid_from_dict():
     with pytest.raises(OperationError, match="Invalid calculation data"):
         Calculation.from_dict(data)
 
+def test_parse_keeps_saved_result():
+    data = {
+        "operation": "add",
+        "operand1": "2",
+        "operand2": "3",
+        "result": "6",
+        "timestamp": datetime.now().isoformat()
+    }
+    calc = Calculation.parse(data)
+    assert calc.result == Decimal("6")
+    assert calc.recompute() == Decimal("5")
+    with pytest.raises(OperationError, match="Invalid calculation data"):
+        Calculation.parse({"operation": "add"})
+
 def test_format_result():
     calc = Calculation(operation="divide", operand1=Decimal("1"), operand2=Decimal("3"))
     assert calc.format_result(precision=2) == "0.33"
@@ -97,3 +111,21 @@ def test_equality():
     assert calc1 == calc2
     assert calc1 != calc3
 
+
+def test_extra_operands_round_trip():
+    calc = Calculation(operation="modpow", operand1=Decimal("4"), operand2=Decimal("13"),
+                       extra_operands=(Decimal("497"),))
+    assert calc.result == Decimal("445")
+    assert calc.operands == (Decimal("4"), Decimal("13"), Decimal("497"))
+    assert str(calc) == "modpow(4, 13, 497) = 445"
+    data = calc.to_dict()
+    assert data['extra_operands'] == "497"
+    assert Calculation.from_dict(data) == calc
+
+def test_parse_shares_repeated_values():
+    row = {"operation": "add", "operand1": "2.5", "operand2": "2.5", "result": "5.0",
+           "timestamp": datetime.now().isoformat(), "extra_operands": ""}
+    first, second = Calculation.parse(row), Calculation.parse(dict(row))
+    assert first.operand1 is first.operand2 is second.operand1
+    assert first.result is second.result
+    assert str(first.result) == "5.0"
@@ -1,13 +1,16 @@
 import datetime
+import decimal
 from pathlib import Path
 import pandas as pd
 import pytest
 from unittest.mock import Mock, patch, PropertyMock
 from decimal import Decimal
+from fractions import Fraction
 from tempfile import TemporaryDirectory
 from app.calculator import Calculator
 from app.calculator_repl import calculator_repl
 from app.calculator_config import CalculatorConfig
+from app.decimal_context import CalculatorContext
 from app.exceptions import OperationError, ValidationError
 from app.history import LoggingObserver, AutoSaveObserver
 from app.operations import OperationFactory
@@ -120,12 +123,652 @@ def test_load_history(mock_exists, mock_read_csv, calculator):
         pytest.fail("Loading history failed due to OperationError")
 
 @patch('app.calculator.logging.info')
-def test_logging_setup(logging_info_mock):
+def test_logging_setup(logging_info_mock, tmp_path):
     with patch.object(CalculatorConfig, 'log_dir', new_callable=PropertyMock) as mock_log_dir, \
          patch.object(CalculatorConfig, 'log_file', new_callable=PropertyMock) as mock_log_file:
         mock_log_dir.return_value = Path('/tmp/logs')
         mock_log_file.return_value = Path('/tmp/logs/calculator.log')
         
         # Instantiate calculator to trigger logging
-        calculator = Calculator(CalculatorConfig())
+        calculator = Calculator(CalculatorConfig().relocated(tmp_path))
         logging_info_mock.assert_any_call("Calculator initialized with configuration")
+
+def test_save_history_appends_and_keeps_other_process_rows(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    calculator.save_history()
+
+    # second instance sharing the same history file
+    other = Calculator(config=calculator.config)
+    assert len(other.history) == 1
+    other.set_operation(OperationFactory.create_operation('multiply'))
+    other.perform_operation(4, 5)
+    other.save_history()
+
+    calculator.perform_operation(3, 4)
+    calculator.save_history()
+
+    rows = pd.read_csv(calculator.config.history_file)
+    assert list(rows['operation']) == ['add', 'multiply', 'add']
+
+def test_save_history_rewrite_after_undo_keeps_other_rows(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    calculator.save_history()
+
+    other = Calculator(config=calculator.config)
+    other.set_operation(OperationFactory.create_operation('subtract'))
+    other.perform_operation(9, 1)
+    other.save_history()
+
+    calculator.undo()
+    calculator.save_history()
+
+    rows = pd.read_csv(calculator.config.history_file)
+    assert list(rows['operation']) == ['subtract']
+
+def test_load_history_merges_duplicates_and_unsaved(calculator):
+    history_file = calculator.config.history_file
+    timestamp = datetime.datetime(2025, 1, 1).isoformat()
+    row = f"add,1,2,3,{timestamp}\n"
+    history_file.write_text("operation,operand1,operand2,result,timestamp\n" + row + row)
+
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(5, 5)
+    calculator.load_history()
+
+    assert [c.result for c in calculator.history] == [Decimal('3'), Decimal('10')]
+    calculator.save_history()
+    assert len(pd.read_csv(history_file)) == 3
+
+def test_save_history_rotates_and_load_reads_segments(calculator):
+    calculator.config.segment_max_bytes = 150
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(10):
+        calculator.perform_operation(i, 1)
+        calculator.save_history()
+
+    assert len(calculator.segments.segment_paths()) > 1
+    reloaded = Calculator(config=calculator.config)
+    assert [c.operand1 for c in reloaded.history] == [Decimal(i) for i in range(10)]
+
+    calculator.config.max_history_size = 1
+    reloaded.load_history()
+    assert len(reloaded.history) < 10
+    assert reloaded.history[-1].operand1 == Decimal(9)
+
+def test_clear_removes_archived_rows(calculator):
+    calculator.config.segment_max_bytes = 1
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    calculator.perform_operation(2, 2)
+    calculator.save_history()
+    assert calculator.segments.segment_paths()
+
+    calculator.clear_history()
+    calculator.save_history()
+    assert Calculator(config=calculator.config).history == []
+
+def segmented_history(calculator, count):
+    """Save ``count`` calculations one segment each, then reload only the newest two"""
+    calculator.config.segment_max_bytes = 1
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(count):
+        calculator.perform_operation(i, 1)
+        calculator.save_history()
+    calculator.perform_operation(count, 1)
+    calculator.save_history()
+    calculator.config.max_history_size = 2
+    reloaded = Calculator(config=calculator.config)
+    assert len(reloaded.history) < count
+    return reloaded
+
+def test_clear_removes_segments_that_were_not_loaded(calculator):
+    reloaded = segmented_history(calculator, 6)
+    reloaded.clear_history()
+    reloaded.save_history()
+
+    assert reloaded.segments.segment_paths() == []
+    calculator.config.max_history_size = 100
+    assert Calculator(config=calculator.config).history == []
+
+def test_undo_keeps_segments_that_were_not_loaded(calculator):
+    reloaded = segmented_history(calculator, 6)
+    reloaded.set_operation(OperationFactory.create_operation('add'))
+    reloaded.perform_operation(10, 1)
+    reloaded.perform_operation(11, 1)
+    reloaded.save_history()
+    reloaded.undo()
+    reloaded.undo()
+    reloaded.save_history()
+
+    calculator.config.max_history_size = 100
+    assert [c.operand1 for c in Calculator(config=calculator.config).history] == [Decimal(i) for i in range(7)]
+
+def test_undoing_a_load_keeps_segments_that_were_not_loaded(calculator):
+    reloaded = segmented_history(calculator, 6)
+    reloaded.set_operation(OperationFactory.create_operation('add'))
+    reloaded.perform_operation(10, 1)
+    reloaded.save_history()
+    reloaded.load_history()
+    reloaded.undo()
+    reloaded.save_history()
+
+    calculator.config.max_history_size = 100
+    operands = [c.operand1 for c in Calculator(config=calculator.config).history]
+    assert operands == [Decimal(i) for i in range(7)] + [Decimal(10)]
+
+def test_goto_a_cleared_version_drops_segments_that_were_not_loaded(calculator):
+    reloaded = segmented_history(calculator, 6)
+    loaded = reloaded.versions.current
+    reloaded.clear_history()
+    cleared = reloaded.versions.current
+    reloaded.goto(loaded)
+    reloaded.goto(cleared)
+    reloaded.save_history()
+
+    calculator.config.max_history_size = 100
+    assert Calculator(config=calculator.config).history == []
+
+def test_goto_before_clear_keeps_segments_that_were_not_loaded(calculator):
+    reloaded = segmented_history(calculator, 6)
+    loaded = reloaded.versions.current
+    reloaded.clear_history()
+    reloaded.goto(loaded)
+    reloaded.save_history()
+
+    calculator.config.max_history_size = 100
+    assert [c.operand1 for c in Calculator(config=calculator.config).history] == [Decimal(i) for i in range(7)]
+
+def test_compact_history(calculator):
+    calculator.config.segment_max_bytes = 1
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(3):
+        calculator.perform_operation(i, 1)
+        calculator.save_history()
+    assert calculator.compact_history() == 2
+    assert len(calculator.segments.segment_paths()) == 1
+
+def test_compact_history_error(calculator):
+    with patch.object(Calculator, 'segments', new_callable=PropertyMock, side_effect=RuntimeError("boom")):
+        with pytest.raises(OperationError, match="Failed to compact history"):
+            calculator.compact_history()
+
+def crash(calculator):
+    """Simulate the process dying: drop the log handle and lock without cleanup"""
+    calculator._wal._file.close()
+    calculator._wal._lock.release()
+
+def test_recover_replays_unsaved_calculations(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    calculator.perform_operation(2, 2)
+    calculator.perform_operation(3, 3)
+    calculator.undo()
+    crash(calculator)
+
+    recovered = Calculator(config=calculator.config)
+
+    assert [c.result for c in recovered.history] == [Decimal('2'), Decimal('4')]
+    assert list(calculator.config.history_dir.glob("*.wal")) == []
+    assert len(pd.read_csv(calculator.config.history_file)) == 2
+    # undo state rebuilt from the replayed tail
+    assert recovered.redo()
+    assert recovered.history[-1].result == Decimal('6')
+
+def test_recover_after_save_before_checkpoint(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    with patch.object(calculator._wal, 'checkpoint'):
+        calculator.save_history()
+    calculator.perform_operation(1, 1)
+    calculator.clear_history()
+    calculator.perform_operation(5, 5)
+    crash(calculator)
+
+    recovered = Calculator(config=calculator.config)
+    assert [c.result for c in recovered.history] == [Decimal('10')]
+
+def test_recover_when_another_process_removed_the_log_first(calculator, caplog):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    crash(calculator)
+    logs = list(calculator.config.history_dir.glob("*.wal"))
+
+    def save_and_recover_elsewhere(self):
+        save_history(self)
+        for path in logs:
+            path.unlink()
+
+    save_history = Calculator.save_history
+    with patch.object(Calculator, 'save_history', save_and_recover_elsewhere):
+        recovered = Calculator(config=calculator.config)
+    assert [c.result for c in recovered.history] == [Decimal('2')]
+    assert "Could not recover" not in caplog.text
+
+def test_close_removes_session_log(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    calculator.close()
+    assert list(calculator.config.history_dir.glob("*.wal")) == []
+    calculator.close()
+
+def test_wal_disabled(calculator):
+    calculator.config.wal_enabled = False
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    assert calculator._wal is None
+
+def test_load_skips_torn_row_and_appends_on_new_line(calculator):
+    history_file = calculator.config.history_file
+    history_file.write_text(
+        "operation,operand1,operand2,result,timestamp\n"
+        f"add,1,2,3,{datetime.datetime(2025, 1, 1).isoformat()}\n"
+        "add,4,5,9,2025-01"
+    )
+    calculator.load_history()
+    assert len(calculator.history) == 1
+
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(7, 1)
+    calculator.save_history()
+    reloaded = Calculator(config=calculator.config)
+    assert [c.result for c in reloaded.history] == [Decimal('3'), Decimal('8')]
+
+def test_undo_redo_use_delta_mementos(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(3):
+        calculator.perform_operation(i, 1)
+    assert all(m.tail == [] for m in calculator.undo_stack)
+
+    calculator.undo()
+    calculator.undo()
+    assert [c.result for c in calculator.history] == [Decimal('1')]
+    calculator.redo()
+    assert [c.result for c in calculator.history] == [Decimal('1'), Decimal('2')]
+    calculator.undo()
+    calculator.redo()
+    calculator.redo()
+    assert [c.result for c in calculator.history] == [Decimal('1'), Decimal('2'), Decimal('3')]
+    assert not calculator.redo()
+
+def test_undo_depth_is_bounded(calculator):
+    calculator.config.max_undo_depth = 2
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(5):
+        calculator.perform_operation(i, 1)
+    assert len(calculator.undo_stack) == 2
+    assert calculator.undo() and calculator.undo() and not calculator.undo()
+    assert len(calculator.history) == 3
+
+def test_undo_redo_restored_after_restart(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(3):
+        calculator.perform_operation(i, 1)
+    calculator.undo()
+    calculator.save_history()
+    calculator.close()
+
+    restarted = Calculator(config=calculator.config)
+    assert len(restarted.undo_stack) == 2
+    assert restarted.redo()
+    assert [c.result for c in restarted.history] == [Decimal('1'), Decimal('2'), Decimal('3')]
+    assert restarted.undo() and restarted.undo() and restarted.undo()
+    assert restarted.history == []
+
+def test_undo_state_not_restored_when_disabled(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    calculator.config.persist_undo = False
+    assert not calculator.load_undo_state()
+    assert Calculator(config=calculator.config).undo_stack == []
+
+def test_load_history_is_undoable(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    calculator.perform_operation(2, 2)
+    calculator.undo()
+
+    calculator.load_history()
+    assert calculator.redo_stack == []
+    assert calculator.undo()
+    assert [c.result for c in calculator.history] == [Decimal('2')]
+
+def test_goto_jumps_to_any_version(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    start = calculator.versions.current
+    for i in range(5):
+        calculator.perform_operation(i, 1)
+    tip = calculator.versions.current
+
+    calculator.goto(start + 2)
+    assert [c.result for c in calculator.history] == [Decimal('1'), Decimal('2')]
+    assert calculator.redo_stack == []
+
+    calculator.goto(tip)
+    assert len(calculator.history) == 5
+
+    assert calculator.undo()
+    assert len(calculator.history) == 2
+    assert calculator.redo()
+    assert len(calculator.history) == 5
+
+def test_goto_then_new_calculation_keeps_other_versions(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(3):
+        calculator.perform_operation(i, 1)
+    tip = calculator.versions.current
+
+    first = calculator.history[0]
+    calculator.goto(tip - 2)
+    assert calculator.history[0] is first  # Shared with the later versions, not copied
+    calculator.perform_operation(9, 9)
+    assert [c.result for c in calculator.history] == [Decimal('1'), Decimal('18')]
+    assert len(calculator.versions.history_at(tip)) == 3
+    assert [c.result for c in calculator.versions.history_at(tip)] == [Decimal('1'), Decimal('2'), Decimal('3')]
+
+def test_undo_and_clear_record_versions(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    version = calculator.versions.current
+    calculator.clear_history()
+    calculator.goto(version)
+    assert len(calculator.history) == 1
+    assert [v.length for v in calculator.list_versions(3)] == [1, 0, 1]
+
+def test_goto_unknown_version(calculator):
+    with pytest.raises(OperationError, match="Unknown history version"):
+        calculator.goto(999)
+
+def test_recover_replays_goto(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 1)
+    calculator.save_history()
+    version = calculator.versions.current
+    calculator.perform_operation(2, 2)
+    calculator.perform_operation(3, 3)
+    calculator.goto(version)
+    crash(calculator)
+
+    recovered = Calculator(config=calculator.config)
+    assert [c.result for c in recovered.history] == [Decimal('2')]
+    assert recovered.undo()
+    assert len(recovered.history) == 3
+
+def test_history_after_goto_saves_and_undoes(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(4):
+        calculator.perform_operation(i, 1)
+    calculator.save_history()
+    calculator.goto(calculator.versions.current - 2)
+    calculator.perform_operation(7, 7)
+    calculator.save_history()
+    assert calculator.undo() and calculator.undo()
+    assert [c.result for c in calculator.history] == [Decimal(i + 1) for i in range(4)]
+    assert calculator.redo() and calculator.redo()
+    calculator.save_history()
+
+    reloaded = Calculator(config=calculator.config)
+    assert [c.result for c in reloaded.history] == [Decimal('1'), Decimal('2'), Decimal('14')]
+
+def test_metrics_disabled_by_default(calculator):
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    assert calculator.metrics.snapshot()['counters'] == {}
+
+def test_metrics_record_pipeline_stages(calculator):
+    calculator.metrics.enabled = True
+    calculator.add_observer(LoggingObserver())
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    calculator.perform_operation(1, 2)
+    with pytest.raises(OperationError):
+        calculator.perform_operation(1, 0)
+    calculator.save_history()
+
+    snapshot = calculator.metrics.snapshot()
+    assert snapshot['counters'] == {'operations.divide': 1, 'errors.divide': 1}
+    for name in ('stage.validate', 'stage.execute', 'stage.memento', 'stage.wal',
+                 'stage.record', 'stage.notify', 'stage.save',
+                 'observer.LoggingObserver', 'operation.divide'):
+        assert name in snapshot['histograms']
+
+def test_hooks_run_at_each_pipeline_point(calculator):
+    points = []
+    calculator.add_hook('before_validate', lambda point, context: points.append(point))
+    for point in ('after_validate', 'before_execute', 'after_execute', 'before_append',
+                  'after_append', 'before_notify', 'after_notify', 'before_save', 'after_save'):
+        calculator.add_hook(point, lambda point, context: points.append((point, sorted(context))))
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    calculator.save_history()
+    assert points == [
+        'before_validate',
+        ('after_validate', ['operands', 'operation']),
+        ('before_execute', ['operands', 'operation']),
+        ('after_execute', ['operation', 'result']),
+        ('before_append', ['calculation']),
+        ('after_append', ['calculation']),
+        ('before_notify', ['calculation']),
+        ('after_notify', ['calculation']),
+        ('before_save', ['history']),
+        ('after_save', ['history']),
+    ]
+
+def test_error_hook_and_remove_hook(calculator):
+    errors = []
+    hook = lambda point, context: errors.append(context['error'])
+    calculator.add_hook('on_error', hook)
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    with pytest.raises(OperationError):
+        calculator.perform_operation(1, 0)
+    assert isinstance(errors[0], OperationError)
+    calculator.remove_hook('on_error', hook)
+    assert calculator._hooks == {}
+    with pytest.raises(ValueError, match="Unknown hook point"):
+        calculator.add_hook('whenever', hook)
+
+def test_asynchronous_observers_are_dispatched_in_background(calculator):
+    observer = Mock(spec=LoggingObserver)
+    observer.asynchronous = True
+    calculator.add_observer(observer)
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    assert calculator.flush_observers(5)
+    observer.update_batch.assert_called_once_with([calculator.history[-1]])
+    observer.update.assert_not_called()
+    calculator.remove_observer(observer)
+    assert calculator._dispatchers == {}
+
+def test_asynchronous_observers_can_be_disabled(calculator):
+    calculator.config.async_observers = False
+    observer = Mock(spec=LoggingObserver)
+    observer.asynchronous = True
+    calculator.add_observer(observer)
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    observer.update.assert_called_once_with(calculator.history[-1])
+    assert calculator._dispatchers == {}
+
+def test_close_delivers_queued_calculations(calculator):
+    observer = Mock(spec=LoggingObserver)
+    observer.asynchronous = True
+    calculator.add_observer(observer)
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    for i in range(10):
+        calculator.perform_operation(i, 1)
+    calculator.close()
+    delivered = [c for call in observer.update_batch.call_args_list for c in call.args[0]]
+    assert delivered == calculator.history[-10:]
+    assert calculator._dispatchers == {}
+
+def test_operations_use_configured_decimal_context(calculator):
+    calculator.decimal_context = CalculatorContext(precision=5, rounding='ROUND_UP')
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    assert calculator.perform_operation(2, 3) == Decimal('0.66667')
+    assert decimal.getcontext().prec == 28
+
+def test_trapped_decimal_signal_is_an_operation_error(calculator):
+    calculator.decimal_context = CalculatorContext(traps=['Inexact'])
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    assert calculator.perform_operation(1, 4) == Decimal('0.25')
+    with pytest.raises(OperationError, match="Arithmetic error: Inexact"):
+        calculator.perform_operation(1, 3)
+
+def test_exact_mode_keeps_fractions_in_history(calculator):
+    calculator.config.exact_mode = True
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    result = calculator.perform_operation(1, 3)
+    assert result == Decimal('0.' + '3' * 28)
+    calc = calculator.history[-1]
+    assert calc.result == Fraction(1, 3)
+    assert calc.to_dict()['result'] == str(result)
+    assert str(calc) == f"divide(1, 3) = {result}"
+    assert calc.format_result(4) == '0.3333'
+
+    calculator.set_operation(OperationFactory.create_operation('multiply'))
+    assert calculator.perform_operation('0.1', 3) == Decimal('0.3')
+    assert calculator.history[-1].result == Fraction(3, 10)
+    assert calculator.perform_operation('0.25', 4) == Decimal(1)
+    assert isinstance(calculator.history[-1].result, Decimal)
+
+def test_exact_mode_round_trips_through_saved_history(calculator):
+    calculator.config.exact_mode = True
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    calculator.perform_operation(2, 3)
+    calculator.save_history()
+    calculator.load_history()
+    assert calculator.history[-1].result == Decimal('0.' + '6' * 27 + '7')
+
+def test_exact_mode_chained_results_reload_without_warnings(calculator, caplog):
+    from app.history_verifier import verify_history
+    calculator.config.exact_mode = True
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    calculator.perform_operation(1, 3)
+    calculator.set_operation(OperationFactory.create_operation('multiply'))
+    assert calculator.perform_operation(calculator.ans, 3) == Decimal(1)
+    calculator.save_history()
+
+    assert pd.read_csv(calculator.config.history_file, dtype=str)['operand1'].iloc[-1] == '1/3'
+    with caplog.at_level('WARNING'):
+        calculator.load_history()
+    assert not [r for r in caplog.records if r.levelname == 'WARNING']
+    assert str(calculator.history[-1]) == "multiply(1/3, 3) = 1"
+    assert verify_history(calculator.config.history_file, workers=1).ok
+
+def test_perform_operation_with_three_operands(calculator):
+    calculator.set_operation(OperationFactory.create_operation('modpow'))
+    assert calculator.perform_operation(4, 13, 497) == Decimal(445)
+    assert calculator.show_history() == ["modpow(4, 13, 497) = 445"]
+    with pytest.raises(OperationError, match="modpow takes 3 operands"):
+        calculator.perform_operation(4, 13)
+    calculator.config.exact_mode = True
+    assert calculator.perform_operation(3, -1, 7) == Decimal(5)
+
+def test_extra_operands_saved_and_appended_to_old_history_files(calculator):
+    history_file = calculator.config.history_file
+    history_file.write_text(
+        "operation,operand1,operand2,result,timestamp\n"
+        "add,1,2,3,2025-01-01T00:00:00\n"
+    )
+    calculator.load_history()
+    calculator.set_operation(OperationFactory.create_operation('modpow'))
+    calculator.perform_operation(2, 10, 1000)
+    calculator.save_history()
+
+    rows = pd.read_csv(history_file, dtype=str, keep_default_na=False)
+    assert list(rows.columns)[-1] == 'extra_operands'
+    assert list(rows['extra_operands']) == ['', '1000']
+    calculator.load_history()
+    assert [str(c) for c in calculator.history] == ["add(1, 2) = 3", "modpow(2, 10, 1000) = 24"]
+
+def test_perform_reduction_records_one_calculation(calculator):
+    import numpy as np
+    calculator.set_operation(OperationFactory.create_operation('sum'))
+    assert calculator.perform_reduction(np.arange(1, 101)) == Decimal(5050)
+    assert len(calculator.history) == 1
+    assert calculator.history[-1].operands == tuple(Decimal(i) for i in range(1, 101))
+    assert calculator.perform_reduction(['1.5', 2, 3.5]) == Decimal(7)
+    assert calculator.undo()
+    assert len(calculator.history) == 1
+
+    calculator.save_history()
+    calculator.load_history()
+    assert str(calculator.history[-1]).endswith("99, 100) = 5050")
+
+def test_perform_reduction_errors(calculator):
+    calculator.set_operation(OperationFactory.create_operation('mean'))
+    with pytest.raises(OperationError, match="at least 2 operands"):
+        calculator.perform_reduction([1])
+    with pytest.raises(ValidationError):
+        calculator.perform_reduction([1, 'x'])
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    with pytest.raises(OperationError, match="does not take a sequence"):
+        calculator.perform_reduction([1, 2, 3])
+
+def test_aggregates_follow_undo_redo_clear_goto_and_load(calculator):
+    def brute_force():
+        totals = {}
+        for c in calculator.history:
+            count, total = totals.get(c.operation, (0, 0))
+            totals[c.operation] = (count + 1, total + c.result)
+        return totals
+
+    def indexed():
+        return {name: (t.count, t.total) for name, t in calculator.aggregates.by_operation().items()}
+
+    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.perform_operation(1, 2)
+    assert indexed() == brute_force() == {'add': (1, 3)}
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    calculator.perform_operation(1, 4)
+    calculator.perform_operation(3, 4)
+    assert indexed() == brute_force()
+    version = calculator.versions.current
+
+    calculator.undo()
+    assert indexed() == brute_force() == {'add': (1, 3), 'divide': (1, Decimal('0.25'))}
+    calculator.redo()
+    calculator.undo()
+    calculator.perform_operation(5, 1)
+    assert indexed() == brute_force()
+    calculator.goto(version)
+    assert indexed() == brute_force()
+    calculator.save_history()
+    calculator.clear_history()
+    assert indexed() == brute_force() == {}
+    calculator.load_history()
+    assert indexed() == brute_force()
+    today = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    assert calculator.aggregates.query('divide', start=today).count == 2
+
+def test_result_cache_serves_repeated_operations(tmp_path):
+    from app.result_cache import ResultCache
+    cache = ResultCache()
+    config = CalculatorConfig(max_input_value=Decimal('1e9'), auto_save=False).relocated(tmp_path)
+    first, second = Calculator(config, result_cache=cache), Calculator(config, result_cache=cache)
+    first.set_operation(OperationFactory.create_operation('divide'))
+    second.set_operation(OperationFactory.create_operation('divide'))
+    assert first.perform_operation(1, 3) == second.perform_operation(1, 3)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Other arithmetic settings do not share results
+    config = CalculatorConfig(decimal_precision=5, max_input_value=Decimal('1e9'), auto_save=False).relocated(tmp_path)
+    other = Calculator(config, result_cache=cache)
+    other.set_operation(OperationFactory.create_operation('divide'))
+    assert other.perform_operation(1, 3) == Decimal('0.33333')
+    assert cache.misses == 2
+
+def test_history_shares_repeated_values(calculator):
+    calculator.set_operation(OperationFactory.create_operation('multiply'))
+    calculator.perform_operation(Decimal('1.5'), 4)
+    calculator.perform_operation('1.5', 4)
+    first, second = calculator.history
+    assert first.operand1 is second.operand1
+    assert first.result is second.result
+    assert first.operation is second.operation
+    # The previous result still chains
+    assert calculator.perform_operation(calculator.ans, 2) == Decimal('12.0')
@@ -0,0 +1,56 @@
+import logging
+from pathlib import Path
+from unittest.mock import patch, PropertyMock
+
+import pytest
+
+from app.calculator_config import CalculatorConfig
+from app.calculator_logging import CalculatorLogging, DeferredQueueHandler, setup_logging
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = CalculatorConfig(base_dir=tmp_path, log_max_bytes=200, log_backup_count=2, log_level='INFO')
+    with patch.object(CalculatorConfig, 'log_dir', new_callable=PropertyMock) as mock_log_dir, \
+         patch.object(CalculatorConfig, 'log_file', new_callable=PropertyMock) as mock_log_file:
+        mock_log_dir.return_value = tmp_path / "logs"
+        mock_log_file.return_value = tmp_path / "logs/calculator.log"
+        yield config
+
+
+def test_records_are_written_by_the_listener(config):
+    root = logging.getLogger()
+    level = root.level
+    calculator_logging = setup_logging(config)
+    assert calculator_logging.running
+    assert calculator_logging.handler in root.handlers
+    logging.getLogger('app.test').info("result %s", 42)
+    logging.getLogger('app.test').debug("hidden")
+    calculator_logging.stop()
+
+    assert calculator_logging.handler not in root.handlers
+    assert root.level == level
+    text = config.log_file.read_text(encoding=config.default_encoding)
+    assert "INFO - result 42" in text
+    assert "hidden" not in text
+
+
+def test_log_file_rotates(config):
+    calculator_logging = CalculatorLogging(config)
+    calculator_logging.start()
+    calculator_logging.start()  # Already running
+    for i in range(20):
+        logging.info("calculation number %d", i)
+    calculator_logging.stop()
+    calculator_logging.stop()  # Already stopped
+
+    rotated = sorted(p.name for p in config.log_dir.iterdir())
+    assert rotated == ['calculator.log', 'calculator.log.1', 'calculator.log.2']
+
+
+def test_queue_handler_defers_formatting():
+    handler = DeferredQueueHandler(None)
+    record = logging.LogRecord('app', logging.INFO, __file__, 1, "value %s", ('x',), None)
+    prepared = handler.prepare(record)
+    assert prepared is record
+    assert prepared.msg == "value %s" and prepared.args == ('x',)
@@ -0,0 +1,99 @@
+from decimal import Decimal
+import pytest
+from app.calculator_config import CalculatorConfig
+from app.calculator_pool import CalculatorPool
+from app.exceptions import ValidationError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def config(tmp_path):
+    return CalculatorConfig(base_dir=tmp_path, max_input_value=Decimal('1e9'), auto_save=False, wal_enabled=False)
+
+
+def test_calculators_are_created_per_tenant(config):
+    with CalculatorPool(config) as pool:
+        assert pool.calculate('alice', 'add', 2, 3) == Decimal('5')
+        assert pool.calculate('bob', 'multiply', 2, 3) == Decimal('6')
+        assert pool.get('alice') is not pool.get('bob')
+        assert len(pool.get('alice').history) == 1
+        assert pool.get('alice').config.history_file.parent.parent == config.base_dir / 'tenants' / 'alice'
+
+
+def test_least_recently_used_is_evicted_and_saved(config):
+    pool = CalculatorPool(config, max_calculators=2)
+    pool.calculate('a', 'add', 1, 1)
+    pool.calculate('b', 'add', 2, 2)
+    pool.get('a')
+    pool.calculate('c', 'add', 3, 3)
+    assert pool.tenants() == ['a', 'c']
+    assert 'b' not in pool
+    assert (config.base_dir / 'tenants/b/history/calculator_history.csv').exists()
+    # Reopened from its saved history
+    assert pool.get('b').history[0].result == Decimal('4')
+    assert pool.stats()['evicted'] == 2
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_idle_calculators_are_evicted(config):
+    clock = FakeClock()
+    pool = CalculatorPool(config, idle_seconds=10, clock=clock)
+    pool.calculate('a', 'add', 1, 1)
+    clock.now = 5
+    pool.calculate('b', 'add', 1, 1)
+    clock.now = 12
+    assert pool.evict_idle() == 1
+    assert pool.tenants() == ['b']
+    clock.now = 20
+    pool.get('c')
+    assert pool.tenants() == ['c']
+    pool.close()
+
+
+def test_result_cache_is_shared(config):
+    with CalculatorPool(config) as pool:
+        pool.calculate('a', 'divide', 22, 7)
+        pool.calculate('b', 'divide', 22, 7)
+        stats = pool.stats()
+        assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+        assert pool.operation('Divide') is pool.operation('divide')
+
+
+def test_result_cache_can_be_disabled(config):
+    with CalculatorPool(config, result_cache_size=0) as pool:
+        pool.calculate('a', 'add', 1, 2)
+        assert pool.result_cache is None
+        assert pool.get('a').result_cache is None
+
+
+def test_setup_is_called_for_new_calculators(config):
+    seen = []
+    with CalculatorPool(config, setup=lambda tenant, calc: seen.append(tenant)) as pool:
+        pool.get('a')
+        pool.get('a')
+        pool.get('b')
+    assert seen == ['a', 'b']
+
+
+@pytest.mark.parametrize('tenant', ['', '.', '..', '../x', 'a/b', '-a', 'a b'])
+def test_invalid_tenant_ids_are_rejected(config, tenant):
+    with pytest.raises(ValidationError, match="Invalid tenant id"):
+        CalculatorPool(config).get(tenant)
+
+
+def test_save_failure_still_closes(config, caplog):
+    pool = CalculatorPool(config)
+    calc = pool.get('a')
+    calc.save_history = lambda: (_ for _ in ()).throw(OSError("disk full"))
+    assert pool.evict('a') is True
+    assert 'a' not in pool
+    assert "Could not save history of tenant a" in caplog.text
+    assert pool.evict('a') is False
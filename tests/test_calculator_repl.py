@@ -1,6 +1,18 @@
 import pytest
 from io import StringIO
-from app.calculator_repl import calculator_repl  
+from unittest.mock import Mock
+from app.calculator_config import PATH_VARIABLES
+from app.calculator_repl import calculator_repl
+from app.history_verifier import BackgroundVerification
+
+
+@pytest.fixture(autouse=True)
+def isolated_paths(monkeypatch, tmp_path):
+    """Keep the history, logs and locks the REPL writes under tmp_path"""
+    for name in PATH_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('CALCULATOR_BASE_DIR', str(tmp_path))
+    monkeypatch.chdir(tmp_path)  # Calculator() keeps its files under the working directory
 
 
 def run_repl_with_inputs(monkeypatch, inputs):
@@ -61,6 +73,78 @@ def test_add_operation(monkeypatch, capsys):
     assert "5" in captured.out
 
 
+def test_modpow_prompts_for_third_number(monkeypatch, capsys):
+    """modpow takes a modulus as a third number."""
+    inputs = ["modpow", "4", "13", "497", "modpow", "4", "13", "cancel", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "Result: 445" in captured.out
+    assert "Operation cancelled" in captured.out
+
+
+def test_reduction_reads_a_list_of_numbers(monkeypatch, capsys):
+    """sum, product, min, max and mean take all their numbers on one line."""
+    inputs = ["mean", "1, 2 3 4", "max", "cancel", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "Result: 2.5" in captured.out
+    assert "Operation cancelled" in captured.out
+
+
+def test_summary_command(monkeypatch, capsys):
+    """summary reports statistics of the results seen so far."""
+    inputs = ["summary", "add", "2", "3", "multiply", "2", "5", "summary", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "No calculations yet" in captured.out
+    assert "Calculations: 2" in captured.out
+    assert "Min: 5  Max: 10" in captured.out
+
+
+def test_aggregate_command(monkeypatch, capsys):
+    """aggregate totals results by operation."""
+    inputs = ["aggregate", "divide", "1", "4", "divide", "3", "4", "add", "1", "1",
+              "aggregate divide today", "aggregate", "aggregate a b", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "No matching calculations" in captured.out
+    assert "divide: count=2 total=1.00 mean=0.50 min=0.25 max=0.75" in captured.out
+    assert "add: count=1 total=2" in captured.out
+    assert "Usage: aggregate" in captured.out
+
+
+def test_ans_and_pipelines(monkeypatch, capsys):
+    """Operations chain from the previous result."""
+    inputs = ["ans", "add 2 3 | multiply 4", "ans", "subtract", "ans", "5", "add 1 | frobnicate", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "No previous result" in captured.out
+    assert "Result: 20" in captured.out
+    assert "ans = 20" in captured.out
+    assert "Result: 15" in captured.out
+    assert "Unknown operation: frobnicate" in captured.out
+
+
 def test_cancel_operation(monkeypatch, capsys):
     """Simulate cancelling an operation."""
     inputs = [
@@ -83,8 +167,11 @@ def fake_calc_ex(monkeypatch):
     """Fake calculator that can raise errors for coverage."""
     class FakeCalc:
         def __init__(self):
-            class Cfg: auto_save = True
+            class Cfg:
+                auto_save = True
+                verify_on_startup = False
             self.config = Cfg()
+            self.history = []
         def add_observer(self, o): pass
         def show_history(self): return []
         def clear_history(self): pass
@@ -94,10 +181,10 @@ def fake_calc_ex(monkeypatch):
         def load_history(self): raise Exception("load failed")
         def set_operation(self, op): pass
         def perform_operation(self, a, b): raise ValueError("bad op")
+        def close(self): pass
+        def flush_observers(self): return True
     monkeypatch.setattr("app.calculator_repl.Calculator", lambda: FakeCalc())
-    monkeypatch.setattr("app.calculator_repl.OperationFactory",
-                        type("F", (), {"create_operation": staticmethod(lambda x: x)}))
-    monkeypatch.setattr("app.calculator_repl.LoggingObserver", lambda *a, **k: None)
+    monkeypatch.setattr("app.calculator_repl.LoggingObserver", lambda *a, **k: Mock())
     monkeypatch.setattr("app.calculator_repl.AutoSaveObserver", lambda *a, **k: None)
     return FakeCalc()
 
@@ -108,6 +195,7 @@ def fake_calc(monkeypatch):
         def __init__(self):
             class Config:
                 auto_save = True
+                verify_on_startup = False
             self.config = Config()
             self.history = []
             self.undo_called = False
@@ -126,11 +214,11 @@ def fake_calc(monkeypatch):
         def load_history(self): print("History loaded successfully")
         def set_operation(self, op): pass
         def perform_operation(self, a, b): return 42  # mock result
+        def close(self): pass
+        def flush_observers(self): return True
 
     monkeypatch.setattr("app.calculator_repl.Calculator", lambda: FakeCalc())
-    monkeypatch.setattr("app.calculator_repl.OperationFactory",
-                        type("FakeFactory", (), {"create_operation": staticmethod(lambda x: x)}))
-    monkeypatch.setattr("app.calculator_repl.LoggingObserver", lambda *a, **k: None)
+    monkeypatch.setattr("app.calculator_repl.LoggingObserver", lambda *a, **k: Mock())
     monkeypatch.setattr("app.calculator_repl.AutoSaveObserver", lambda *a, **k: None)
     return FakeCalc()
 
@@ -205,3 +293,128 @@ def test_add_operation_cancel(monkeypatch, capsys, fake_calc):
     run_inputs(monkeypatch, ["add", "cancel", "exit"])
     out = capsys.readouterr().out
     assert "Operation cancelled" in out
+
+
+def test_compact_command(monkeypatch, capsys, fake_calc):
+    monkeypatch.setattr(type(fake_calc), "compact_history", lambda self: 3, raising=False)
+    run_inputs(monkeypatch, ["compact", "exit"])
+    out = capsys.readouterr().out
+    assert "3 archived calculations" in out
+
+
+def test_compact_command_error(monkeypatch, capsys, fake_calc_ex):
+    run_inputs(monkeypatch, ["compact", "exit"])
+    out = capsys.readouterr().out
+    assert "Error compacting history" in out
+
+
+def test_versions_and_goto_commands(monkeypatch, capsys):
+    inputs = ["add", "2", "3", "versions", "goto 0", "goto x", "goto 999", "exit"]
+    run_inputs(monkeypatch, inputs)
+    out = capsys.readouterr().out
+    assert "History Versions" in out
+    assert "Jumped to version 0" in out
+    assert "Usage: goto <version>" in out
+    assert "Unknown history version" in out
+
+
+def test_stats_commands(monkeypatch, capsys, tmp_path):
+    target = tmp_path / "metrics.json"
+    inputs = ["stats", "stats on", "add", "2", "3", "stats", f"stats json {target}",
+              "stats reset", "stats off", "stats bogus", "exit"]
+    run_inputs(monkeypatch, inputs)
+    out = capsys.readouterr().out
+    assert "Metrics are disabled" in out
+    assert "Metrics enabled" in out
+    assert "operations.add: 1" in out
+    assert target.exists()
+    assert "Metrics reset" in out
+    assert "Metrics disabled" in out
+    assert "Usage: stats" in out
+
+
+def test_stats_json_keeps_path_case(monkeypatch, capsys, tmp_path):
+    target = tmp_path / "Metrics.JSON"
+    run_inputs(monkeypatch, [f"STATS json {target}", "exit"])
+    assert target.exists()
+
+
+def test_profile_commands(monkeypatch, capsys, tmp_path):
+    target = tmp_path / "Profile.txt"
+    inputs = ["profile", "profile on", "add", "2", "3", "profile dump", f"profile dump {target}",
+              "profile off", "profile bogus", "exit"]
+    run_inputs(monkeypatch, inputs)
+    out = capsys.readouterr().out
+    assert "Profiling is off" in out
+    assert "Profiling enabled" in out
+    assert "cumulative" in out
+    assert target.exists()
+    assert "Profiling disabled" in out
+    assert "Usage: profile" in out
+
+
+def test_repl_logs_through_queue(monkeypatch, tmp_path):
+    import logging
+    log_file = tmp_path / "repl.log"
+    monkeypatch.setenv("CALCULATOR_LOG_FILE", str(log_file))
+    handlers = list(logging.getLogger().handlers)
+    run_inputs(monkeypatch, ["add", "2", "3", "exit"])
+    assert logging.getLogger().handlers == handlers
+    from app.calculator_config import CalculatorConfig
+    text = log_file.read_text(encoding=CalculatorConfig().default_encoding)
+    assert "Calculation performed: add (2, 3) = 5" in text
+
+
+def test_aliases_and_abbreviations(monkeypatch, capsys):
+    """Commands run by alias or unique prefix; ambiguous prefixes list the candidates."""
+    inputs = ["? ", "+ 2 3", "mult", "ans", "3", "hist", "pro", "quit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "Available commands" in captured.out
+    assert "Result: 5" in captured.out
+    assert "Result: 15" in captured.out
+    assert "multiply(5, 3) = 15" in captured.out
+    assert "Ambiguous command 'pro': product, profile" in captured.out
+    assert "Goodbye!" in captured.out
+
+
+def test_verify_command(monkeypatch, capsys):
+    """verify checks the saved history, in the foreground or the background."""
+    monkeypatch.setenv('CALCULATOR_VERIFY_WORKERS', '1')
+    inputs = ["verify status", "add 2 3", "save", "verify", "verify background", "verify status",
+              "verify frobnicate", "exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+    monkeypatch.setattr("app.history_verifier.BackgroundVerification.done", property(
+        lambda self: self.future.result(timeout=30) is not None))
+
+    calculator_repl()
+    captured = capsys.readouterr()
+
+    assert "No verification started" in captured.out
+    assert "Verified 1 rows in 1 files" in captured.out
+    assert "Verification started" in captured.out
+    assert captured.out.count(": no mismatches") == 2
+    assert "Usage: verify [background|status]" in captured.out
+
+
+def test_verify_on_startup(monkeypatch, capsys):
+    """The saved history is verified in the background when the REPL starts."""
+    monkeypatch.setenv('CALCULATOR_VERIFY_WORKERS', '1')
+    monkeypatch.setenv('CALCULATOR_VERIFY_ON_STARTUP', 'true')
+    started = []
+    original = BackgroundVerification.for_config
+    monkeypatch.setattr("app.calculator_repl.BackgroundVerification.for_config",
+                        lambda config: started.append(original(config)) or started[-1])
+    inputs = ["exit"]
+    input_iter = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iter))
+
+    calculator_repl()
+
+    assert len(started) == 1
+    assert started[0].result(timeout=30).ok
@@ -139,3 +139,178 @@ def test_history_file_property():
     config = CalculatorConfig(base_dir=Path('/new_base_dir'))
     assert config.history_file == Path('/new_base_dir/history/calculator_history.csv').resolve()
 
+
+def test_segment_configuration():
+    config = CalculatorConfig(segment_max_bytes=10, segment_max_age_hours=2, history_compression='xz')
+    assert config.segment_max_bytes == 10
+    assert config.segment_max_age_hours == 2
+    assert config.history_compression == 'xz'
+    config.validate()
+
+def test_invalid_segment_configuration():
+    with pytest.raises(ConfigurationError, match="segment_max_bytes"):
+        CalculatorConfig(segment_max_bytes=-1).validate()
+    with pytest.raises(ConfigurationError, match="segment_max_age_hours"):
+        CalculatorConfig(segment_max_age_hours=-1).validate()
+    with pytest.raises(ConfigurationError, match="history_compression"):
+        CalculatorConfig(history_compression='zip').validate()
+
+def test_undo_configuration():
+    config = CalculatorConfig(max_undo_depth=5, persist_undo=False)
+    assert config.max_undo_depth == 5
+    assert config.persist_undo is False
+    with pytest.raises(ConfigurationError, match="max_undo_depth"):
+        config.max_undo_depth = 0
+        config.validate()
+
+def test_max_versions_configuration():
+    config = CalculatorConfig(max_versions=7)
+    assert config.max_versions == 7
+    with pytest.raises(ConfigurationError, match="max_versions"):
+        config.max_versions = 0
+        config.validate()
+
+def test_metrics_configuration():
+    assert CalculatorConfig(metrics_enabled=True).metrics_enabled is True
+    os.environ['CALCULATOR_METRICS_ENABLED'] = '1'
+    assert CalculatorConfig().metrics_enabled is True
+    os.environ.pop('CALCULATOR_METRICS_ENABLED')
+    assert CalculatorConfig().metrics_enabled is False
+
+def test_logging_configuration():
+    config = CalculatorConfig(log_level='debug', log_max_bytes=0, log_backup_count=1, log_batch_size=10)
+    assert config.log_level == 'DEBUG'
+    assert config.log_max_bytes == 0
+    assert config.log_backup_count == 1
+    assert config.log_batch_size == 10
+    config.validate()
+
+def test_invalid_logging_configuration():
+    with pytest.raises(ConfigurationError, match="log_level"):
+        CalculatorConfig(log_level='loud').validate()
+    with pytest.raises(ConfigurationError, match="log_max_bytes"):
+        CalculatorConfig(log_max_bytes=-1).validate()
+    with pytest.raises(ConfigurationError, match="log_backup_count"):
+        CalculatorConfig(log_backup_count=-1).validate()
+    config = CalculatorConfig()
+    config.log_batch_size = 0
+    with pytest.raises(ConfigurationError, match="log_batch_size"):
+        config.validate()
+
+def test_observer_dispatch_configuration():
+    config = CalculatorConfig(async_observers=False, observer_queue_size=5,
+                              observer_batch_size=2, observer_backpressure='drop_oldest')
+    assert config.async_observers is False
+    assert (config.observer_queue_size, config.observer_batch_size) == (5, 2)
+    config.validate()
+    with pytest.raises(ConfigurationError, match="observer_backpressure"):
+        CalculatorConfig(observer_backpressure='spill').validate()
+    config.observer_queue_size = 0
+    with pytest.raises(ConfigurationError, match="observer_queue_size"):
+        config.validate()
+    config.observer_queue_size = 5
+    config.observer_batch_size = 0
+    with pytest.raises(ConfigurationError, match="observer_batch_size"):
+        config.validate()
+
+def test_paths_are_resolved_once(monkeypatch):
+    clear_env_vars('CALCULATOR_HISTORY_FILE', 'CALCULATOR_HISTORY_DIR')
+    config = CalculatorConfig(base_dir=Path('/snapshot_base'))
+    assert config.history_file == Path('/snapshot_base/history/calculator_history.csv').resolve()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("configuration read again")
+    monkeypatch.setattr(os, 'getenv', fail)
+    monkeypatch.setattr(Path, 'resolve', fail)
+    assert config.history_file == Path('/snapshot_base/history/calculator_history.csv')
+    assert config.history_dir == Path('/snapshot_base/history')
+
+def test_paths_snapshot_is_immutable():
+    import dataclasses
+    config = CalculatorConfig(base_dir=Path('/snapshot_base'))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.paths.history_file = Path('/elsewhere.csv')
+
+def test_reload_picks_up_environment_changes(monkeypatch):
+    clear_env_vars('CALCULATOR_HISTORY_FILE', 'CALCULATOR_HISTORY_DIR')
+    config = CalculatorConfig(base_dir=Path('/snapshot_base'))
+    before = config.history_file
+    monkeypatch.setenv('CALCULATOR_HISTORY_FILE', '/elsewhere/history.csv')
+    assert config.history_file == before
+    assert config.reload().history_file == Path('/elsewhere/history.csv').resolve()
+    assert config.history_file == Path('/elsewhere/history.csv').resolve()
+
+def test_changing_base_dir_resolves_again():
+    clear_env_vars('CALCULATOR_LOG_DIR', 'CALCULATOR_LOG_FILE')
+    config = CalculatorConfig(base_dir=Path('/snapshot_base'))
+    assert config.log_file == Path('/snapshot_base/logs/calculator.log').resolve()
+    config.base_dir = Path('/other_base')
+    assert config.log_file == Path('/other_base/logs/calculator.log').resolve()
+
+def test_decimal_context_configuration(monkeypatch):
+    monkeypatch.setenv('CALCULATOR_DECIMAL_TRAPS', 'Overflow, Inexact')
+    config = CalculatorConfig(decimal_precision=12, decimal_rounding='round_half_up')
+    assert config.decimal_precision == 12
+    assert config.decimal_rounding == 'ROUND_HALF_UP'
+    assert config.decimal_traps == ['Overflow', 'Inexact']
+    config.validate()
+
+def test_invalid_decimal_context_configuration():
+    with pytest.raises(ConfigurationError, match="decimal_rounding"):
+        CalculatorConfig(decimal_rounding='round_sideways').validate()
+    with pytest.raises(ConfigurationError, match="Unknown decimal trap: Oops"):
+        CalculatorConfig(decimal_traps=['Oops']).validate()
+    config = CalculatorConfig()
+    config.decimal_precision = 0
+    with pytest.raises(ConfigurationError, match="decimal_precision"):
+        config.validate()
+
+def test_exact_mode_configuration(monkeypatch):
+    assert CalculatorConfig().exact_mode is False
+    monkeypatch.setenv('CALCULATOR_EXACT_MODE', 'true')
+    assert CalculatorConfig().exact_mode is True
+    assert CalculatorConfig(exact_mode=False).exact_mode is False
+
+def test_aggregate_bucket_configuration(monkeypatch):
+    assert CalculatorConfig().aggregate_bucket_minutes == 60
+    monkeypatch.setenv('CALCULATOR_AGGREGATE_BUCKET_MINUTES', '15')
+    assert CalculatorConfig().aggregate_bucket_minutes == 15
+    with pytest.raises(ConfigurationError, match="aggregate_bucket_minutes"):
+        CalculatorConfig(aggregate_bucket_minutes=7).validate()
+
+
+def test_verify_configuration(monkeypatch):
+    config = CalculatorConfig()
+    assert (config.verify_workers, config.verify_chunk_rows, config.verify_on_startup) == (0, 10000, False)
+    monkeypatch.setenv('CALCULATOR_VERIFY_WORKERS', '4')
+    monkeypatch.setenv('CALCULATOR_VERIFY_ON_STARTUP', 'true')
+    config = CalculatorConfig()
+    assert (config.verify_workers, config.verify_on_startup) == (4, True)
+    with pytest.raises(ConfigurationError, match="verify_workers"):
+        CalculatorConfig(verify_workers=-1).validate()
+    with pytest.raises(ConfigurationError, match="verify_chunk_rows"):
+        CalculatorConfig(verify_chunk_rows=-5).validate()
+
+def test_pool_configuration(monkeypatch):
+    config = CalculatorConfig()
+    assert (config.pool_max_calculators, config.pool_idle_seconds, config.result_cache_size) == (100, 0, 10000)
+    monkeypatch.setenv('CALCULATOR_POOL_MAX_CALCULATORS', '5')
+    monkeypatch.setenv('CALCULATOR_POOL_IDLE_SECONDS', '30')
+    monkeypatch.setenv('CALCULATOR_RESULT_CACHE_SIZE', '0')
+    config = CalculatorConfig()
+    assert (config.pool_max_calculators, config.pool_idle_seconds, config.result_cache_size) == (5, 30, 0)
+    with pytest.raises(ConfigurationError, match="pool_max_calculators"):
+        CalculatorConfig(pool_max_calculators=-1).validate()
+    with pytest.raises(ConfigurationError, match="pool_idle_seconds"):
+        CalculatorConfig(pool_idle_seconds=-1).validate()
+    with pytest.raises(ConfigurationError, match="result_cache_size"):
+        CalculatorConfig(result_cache_size=-1).validate()
+
+def test_relocated_keeps_files_under_new_base_dir(tmp_path):
+    config = CalculatorConfig(base_dir=tmp_path, precision=12)
+    tenant = config.relocated(tmp_path / 'tenants' / 'a')
+    assert tenant.precision == 12
+    assert tenant.history_file == (tmp_path / 'tenants/a/history/calculator_history.csv').resolve()
+    assert tenant.log_dir.parent == tenant.base_dir
+    tenant.decimal_traps.append('Inexact')
+    assert 'Inexact' not in config.decimal_traps
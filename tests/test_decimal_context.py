@@ -0,0 +1,75 @@
+import decimal
+from decimal import Decimal
+import threading
+
+import pytest
+
+from app.decimal_context import CalculatorContext, format_decimal, quantizer
+
+
+def test_quantizers_are_reused():
+    assert quantizer(2) == Decimal('0.01')
+    assert quantizer(0) == Decimal('1')
+    assert quantizer(2) is quantizer(2)
+    assert quantizer(40) == Decimal('1e-40')
+    assert quantizer(40) is quantizer(40)
+
+
+@pytest.mark.parametrize("value, places, expected", [
+    (Decimal('1') / Decimal('3'), 2, '0.33'),
+    (Decimal('2.500'), 10, '2.5'),
+    (Decimal('0.125'), 2, '0.12'),
+    (Decimal('7'), 0, '7'),
+    (Decimal('1e40'), 10, '1E+40'),
+])
+def test_format_decimal(value, places, expected):
+    assert format_decimal(value, places) == expected
+
+
+def test_context_is_installed_and_restored():
+    before = decimal.getcontext()
+    context = CalculatorContext(precision=5, rounding='ROUND_DOWN')
+    with context as active:
+        assert decimal.getcontext() is active
+        assert Decimal(2) / Decimal(3) == Decimal('0.66666')
+        with CalculatorContext(precision=3):
+            assert Decimal(2) / Decimal(3) == Decimal('0.667')
+        assert decimal.getcontext() is active
+    assert decimal.getcontext() is before
+
+
+def test_context_traps():
+    with CalculatorContext(traps=['Inexact']):
+        with pytest.raises(decimal.Inexact):
+            Decimal(1) / Decimal(3)
+    with CalculatorContext(traps=[]):
+        assert (Decimal(1) / Decimal(0)).is_infinite()
+
+
+def test_threads_restore_their_own_context():
+    shared = CalculatorContext(precision=5)
+    entered, inside, left = threading.Event(), threading.Event(), threading.Event()
+    restored = {}
+
+    def first():
+        before = decimal.getcontext()
+        with shared:
+            entered.set()
+            inside.wait()
+        restored['first'] = decimal.getcontext() is before
+        left.set()
+
+    def second():
+        entered.wait()
+        before = decimal.getcontext()
+        with shared:
+            inside.set()  # The first thread leaves while this one is inside
+            left.wait()
+        restored['second'] = decimal.getcontext() is before
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert restored == {'first': True, 'second': True}
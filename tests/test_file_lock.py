@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.file_lock import FileLock
+
+
+def test_lock_creates_sidecar_file(tmp_path):
+    target = tmp_path / "history.csv"
+    with FileLock(target) as lock:
+        assert lock.lock_path == tmp_path / "history.csv.lock"
+        assert lock.lock_path.exists()
+    assert lock._fd is None
+
+def test_release_without_acquire_is_noop(tmp_path):
+    FileLock(tmp_path / "history.csv").release()
+
+def test_shared_locks_can_be_held_together(tmp_path):
+    target = tmp_path / "history.csv"
+    with FileLock(target, shared=True), FileLock(target, shared=True):
+        pass
+
+
+def _append_calculations(history_file: str, count: int) -> None:
+    os.environ['CALCULATOR_HISTORY_FILE'] = history_file
+    os.environ['CALCULATOR_HISTORY_DIR'] = str(Path(history_file).parent)
+    from app.calculator import Calculator
+    from app.calculator_config import CalculatorConfig
+    from app.history import AutoSaveObserver
+    from app.operations import OperationFactory
+
+    calc = Calculator(CalculatorConfig(base_dir=Path(history_file).parent, auto_save=True))
+    calc.add_observer(AutoSaveObserver(calc))
+    calc.set_operation(OperationFactory.create_operation('add'))
+    for i in range(count):
+        calc.perform_operation(i, os.getpid())
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork")
+def test_concurrent_processes_do_not_lose_rows(tmp_path):
+    history_file = str(tmp_path / "history.csv")
+    ctx = multiprocessing.get_context('fork')
+    workers = [ctx.Process(target=_append_calculations, args=(history_file, 20)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert len(pd.read_csv(history_file)) == 80
+
+def test_non_blocking_lock_fails_while_held(tmp_path):
+    target = tmp_path / "history.csv"
+    with FileLock(target):
+        other = FileLock(target, blocking=False)
+        assert other.acquire() is False
+        assert not other.held
+    assert other.acquire() is True
+    other.release()
@@ -1,6 +1,6 @@
 import pytest
 import logging
-from app.history import LoggingObserver, AutoSaveObserver
+from app.history import LoggingObserver, AutoSaveObserver, StatisticsObserver
 
 class DummyCalc:
     def __init__(self, auto_save=True):
@@ -34,3 +34,46 @@ def test_autosaveobserver_no_autosave(monkeypatch):
     monkeypatch.setattr(logging, "info", lambda msg: None)
     obs.update("whatever")
     assert not dummy.save_history_called
+
+def make_calculation():
+    from decimal import Decimal
+    from app.calculation import Calculation
+    return Calculation(operation="add", operand1=Decimal("2"), operand2=Decimal("3"))
+
+def test_loggingobserver_logs_lazily(caplog):
+    obs = LoggingObserver()
+    with caplog.at_level(logging.INFO):
+        obs.update(make_calculation())
+    assert caplog.records[0].args[0] == "add"
+    assert "Calculation performed: add (2, 3) = 5" in caplog.text
+
+def test_loggingobserver_skips_disabled_level(caplog):
+    obs = LoggingObserver(batch_size=2)
+    with caplog.at_level(logging.WARNING):
+        obs.update(make_calculation())
+    assert obs._pending == []
+    assert caplog.records == []
+
+def test_loggingobserver_batches(caplog):
+    obs = LoggingObserver(batch_size=2)
+    with caplog.at_level(logging.INFO):
+        obs.update(make_calculation())
+        assert caplog.records == []
+        obs.update(make_calculation())
+        obs.update(make_calculation())
+        obs.flush()
+        obs.flush()
+    assert len(caplog.records) == 2
+    assert caplog.records[0].getMessage() == (
+        "Calculations performed: add (2, 3) = 5; add (2, 3) = 5"
+    )
+
+def test_statisticsobserver_tracks_results():
+    obs = StatisticsObserver()
+    with pytest.raises(AttributeError):
+        obs.update(None)
+    obs.update_batch([make_calculation(), make_calculation()])
+    summary = obs.statistics.summary()
+    assert summary['count'] == 2
+    assert summary['mean'] == 5
+    assert summary['operations'] == {'add': 2}
@@ -0,0 +1,132 @@
+import gzip
+import json
+import logging
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history_generator import HistoryGenerator, Magnitudes, main, parse_mix
+from app.history_segments import HISTORY_COLUMNS, read_rows
+
+
+def load(base_dir: Path, rows: int) -> Calculator:
+    return Calculator(CalculatorConfig(base_dir=base_dir, max_history_size=rows, wal_enabled=False, auto_save=False))
+
+
+def test_same_seed_same_history():
+    first = [calc.to_dict() for calc in HistoryGenerator(seed=7).calculations(200)]
+    again = [calc.to_dict() for calc in HistoryGenerator(seed=7).calculations(200)]
+    other = [calc.to_dict() for calc in HistoryGenerator(seed=8).calculations(200)]
+    assert first == again
+    assert first != other
+
+
+def test_mix_and_magnitudes():
+    generator = HistoryGenerator({'add': 3, 'multiply': 1, 'sum': 0}, Magnitudes(2, 3, 1, negative_share=0))
+    calculations = list(generator.calculations(2000))
+    counts = {name: sum(calc.operation == name for calc in calculations) for name in ('add', 'multiply', 'sum')}
+    assert counts['sum'] == 0
+    assert 2.5 < counts['add'] / counts['multiply'] < 3.5
+    for calc in calculations:
+        for operand in calc.operands:
+            assert Decimal('10.0') <= operand < Decimal('1000.0')
+            assert operand.as_tuple().exponent == -1
+
+
+def test_results_verify(caplog):
+    """Every operation's results match what loading recomputes"""
+    with caplog.at_level(logging.WARNING):
+        for calc in HistoryGenerator().calculations(1000):
+            Calculation.from_dict(calc.to_dict())
+    assert "differs" not in caplog.text
+
+
+@pytest.mark.parametrize("args, message", [
+    ({'mix': {'add': 0}}, "not all zero"),
+    ({'mix': {'frobnicate': 1}}, "Unknown operation"),
+    ({'magnitudes': Magnitudes(3, 2)}, "Invalid operand magnitudes"),
+    ({'max_operands': 1}, "max_operands"),
+])
+def test_invalid_settings(args, message):
+    with pytest.raises(ValueError, match=message):
+        HistoryGenerator(**args)
+
+
+def test_parse_mix():
+    assert parse_mix("add=3, Divide=0.5,sum") == {'add': 3.0, 'divide': 0.5, 'sum': 1.0}
+    with pytest.raises(ValueError, match="Invalid weight for add"):
+        parse_mix("add=x")
+
+
+def test_write_csv_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.history_generator.CHUNK_ROWS', 7)
+    history_file = tmp_path / 'history' / 'calculator_history.csv'
+    assert HistoryGenerator().write(history_file, 100) == [history_file]
+    rows = read_rows(history_file)
+    assert len(rows) == 100
+    assert rows == [calc.to_dict() for calc in HistoryGenerator().calculations(100)]
+    assert len(load(tmp_path, 100).history) == 100
+
+
+def test_write_empty(tmp_path):
+    history_file = tmp_path / 'empty.csv'
+    HistoryGenerator().write(history_file, 0)
+    assert history_file.read_text().strip() == ','.join(HISTORY_COLUMNS)
+
+
+def test_write_legacy(tmp_path):
+    history_file = tmp_path / 'history' / 'calculator_history.csv'
+    with pytest.raises(ValueError, match="legacy format"):
+        HistoryGenerator().write(history_file, 10, 'legacy')
+    HistoryGenerator({'add': 1, 'root': 1}).write(history_file, 50, 'legacy')
+    assert history_file.read_text().splitlines()[0] == ','.join(HISTORY_COLUMNS[:-1])
+    assert len(load(tmp_path, 50).history) == 50
+
+
+def test_write_segments(tmp_path):
+    history_file = tmp_path / 'history' / 'calculator_history.csv'
+    paths = HistoryGenerator().write(history_file, 250, 'segments', 'gzip', segment_rows=100)
+    assert [path.name for path in paths] == [
+        'calculator_history.000001.csv.gz', 'calculator_history.000002.csv.gz', 'calculator_history.csv'
+    ]
+    manifest = json.loads((tmp_path / 'history' / 'calculator_history.csv.manifest.json').read_text())
+    assert [segment['rows'] for segment in manifest['segments']] == [100, 100]
+    assert manifest['segments'][1]['first'] > manifest['segments'][0]['last']
+    with gzip.open(paths[0], 'rt') as f:
+        assert f.readline().strip() == ','.join(HISTORY_COLUMNS)
+    assert len(read_rows(history_file)) == 50
+
+    history = load(tmp_path, 250).history
+    assert len(history) == 250
+    assert history == list(HistoryGenerator().calculations(250))
+
+
+@pytest.mark.parametrize('format', ['csv', 'segments'])
+def test_write_refuses_an_existing_history(tmp_path, format):
+    history_file = tmp_path / 'history' / 'calculator_history.csv'
+    HistoryGenerator().write(history_file, 250, 'segments', segment_rows=100)
+    before = sorted(p.name for p in history_file.parent.iterdir())
+    with pytest.raises(FileExistsError, match="already holds a history"):
+        HistoryGenerator(seed=2).write(history_file, 10, format)
+    history_file.unlink()
+    with pytest.raises(FileExistsError):
+        HistoryGenerator(seed=2).write(history_file, 10, format)  # The manifest is still there
+    assert sorted(p.name for p in history_file.parent.iterdir()) == sorted(set(before) - {history_file.name})
+
+
+def test_write_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unknown history format"):
+        HistoryGenerator().write(tmp_path / 'h.csv', 1, 'parquet')
+
+
+def test_main(tmp_path, capsys):
+    history_file = tmp_path / 'h.csv'
+    main([str(history_file), '--rows', '30', '--mix', 'divide=1', '--digits', '1', '2', '--places', '0', '--seed', '3'])
+    assert capsys.readouterr().out.strip() == str(history_file)
+    rows = read_rows(history_file)
+    assert len(rows) == 30
+    assert {row['operation'] for row in rows} == {'divide'}
@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.exceptions import ConfigurationError
+from app.history_segments import HistorySegments, merge_rows, read_rows, row_key, write_rows
+
+
+def make_rows(count, start=0, day=datetime(2025, 1, 1)):
+    return [{
+        'operation': 'add',
+        'operand1': str(i),
+        'operand2': '1',
+        'result': str(i + 1),
+        'timestamp': (day + timedelta(seconds=i)).isoformat()
+    } for i in range(start, start + count)]
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    return tmp_path / "calculator_history.csv"
+
+
+def test_merge_rows_drops_duplicates_and_sorts():
+    rows = make_rows(3)
+    merged = merge_rows(rows[2:], rows, rows[:1])
+    assert merged == rows
+
+def test_read_rows_missing_and_empty(history_file):
+    assert read_rows(history_file) == []
+    history_file.write_text("\n")
+    assert read_rows(history_file) == []
+
+def test_invalid_compression(history_file):
+    with pytest.raises(ConfigurationError):
+        HistorySegments(history_file, compression='zip')
+
+def test_should_rotate_by_size(history_file):
+    segments = HistorySegments(history_file, max_bytes=100)
+    assert not segments.should_rotate()
+    write_rows(history_file, make_rows(1))
+    assert not segments.should_rotate()
+    write_rows(history_file, make_rows(10))
+    assert segments.should_rotate()
+
+def test_should_rotate_by_age(history_file):
+    segments = HistorySegments(history_file, max_age_hours=1)
+    write_rows(history_file, make_rows(1, day=datetime.now()))
+    assert not segments.should_rotate()
+    write_rows(history_file, make_rows(1, day=datetime.now() - timedelta(hours=2)))
+    assert segments.should_rotate()
+
+@pytest.mark.parametrize("compression, suffix", [('gzip', '.gz'), ('bz2', '.bz2'), ('xz', '.xz'), ('none', '')])
+def test_rotate_compresses_segment(history_file, compression, suffix):
+    segments = HistorySegments(history_file, compression=compression)
+    rows = make_rows(5)
+    write_rows(history_file, rows)
+
+    path = segments.rotate()
+
+    assert path.name == f"calculator_history.000001.csv{suffix}"
+    assert not history_file.exists()
+    assert read_rows(path) == rows
+    manifest = json.loads(segments.manifest_path.read_text())
+    assert manifest['segments'][0]['rows'] == 5
+    assert segments.rotate() is None
+
+def test_paths_for_selects_newest_segments(history_file):
+    segments = HistorySegments(history_file)
+    for start in (0, 10, 20):
+        write_rows(history_file, make_rows(10, start))
+        segments.rotate()
+    write_rows(history_file, make_rows(5, 30))
+
+    assert [p.name for p in segments.paths_for(5)] == []
+    assert [p.name for p in segments.paths_for(12)] == ["calculator_history.000003.csv.gz"]
+    assert len(segments.paths_for(25)) == 2
+    assert len(segments.paths_for(None)) == 3
+
+def test_manifest_reloaded_when_changed_by_other_process(history_file):
+    segments = HistorySegments(history_file)
+    other = HistorySegments(history_file)
+    write_rows(history_file, make_rows(2))
+    other.rotate()
+    assert len(segments.segment_paths()) == 1
+
+def test_remove_rows_rewrites_archived_segments(history_file):
+    segments = HistorySegments(history_file)
+    first, second = make_rows(2), make_rows(2, 2)
+    write_rows(history_file, first)
+    segments.rotate()
+    write_rows(history_file, second)
+    segments.rotate()
+
+    segments.remove_rows({row_key(first[0])} | {row_key(row) for row in second})
+
+    assert len(segments.segment_paths()) == 1
+    assert read_rows(segments.segment_paths()[0]) == first[1:]
+    assert segments.manifest['segments'][0]['rows'] == 1
+
+def test_clear_deletes_every_segment(history_file):
+    segments = HistorySegments(history_file)
+    assert segments.clear() == 0
+    for start in (0, 2):
+        write_rows(history_file, make_rows(2, start))
+        segments.rotate()
+    paths = segments.segment_paths()
+
+    assert segments.clear() == 2
+    assert not any(path.exists() for path in paths)
+    assert json.loads(segments.manifest_path.read_text()) == {'next_sequence': 3, 'segments': []}
+
+def test_compact_merges_segments(history_file):
+    segments = HistorySegments(history_file)
+    assert segments.compact() == 0
+    rows = make_rows(6)
+    for chunk in (rows[:3], rows[2:]):
+        write_rows(history_file, chunk)
+        segments.rotate()
+
+    assert segments.compact() == 6
+    paths = segments.segment_paths()
+    assert [p.name for p in paths] == ["calculator_history.000003.csv.gz"]
+    assert read_rows(paths[0]) == rows
+    assert segments.compact() == 6
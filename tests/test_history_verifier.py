@@ -0,0 +1,131 @@
+import gzip
+import logging
+
+import pytest
+
+from app import history_verifier
+from app.calculator_config import CalculatorConfig
+from app.history_generator import HistoryGenerator
+from app.history_segments import HistorySegments
+from app.history_verifier import (
+    BackgroundVerification, Mismatch, context_settings, history_files, main, verify_history
+)
+
+
+def corrupt_line(path, line_number, opener=open):
+    """Replace the result of one data row (1-based) with 42"""
+    with opener(path, 'rt', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    fields = lines[line_number].split(',')
+    fields[3] = '42'
+    lines[line_number] = ','.join(fields)
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    path = tmp_path / 'history' / 'calculator_history.csv'
+    HistoryGenerator({'add': 1, 'divide': 1, 'sum': 1}).write(path, 250, 'segments', segment_rows=100)
+    return path
+
+
+def test_clean_history(history_file):
+    report = verify_history(history_file, workers=1, chunk_rows=30)
+    assert report.ok
+    assert (report.files, report.rows) == (3, 250)
+    assert report.lines()[0].startswith("Verified 250 rows in 3 files in ")
+    assert report.lines()[0].endswith(": no mismatches")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_mismatches_reported_with_row_numbers(history_file, workers):
+    segment = history_file.with_name('calculator_history.000002.csv.gz')
+    corrupt_line(segment, 17, gzip.open)
+    corrupt_line(history_file, 3)
+    corrupt_line(history_file, 48)
+    with open(history_file, 'a') as f:
+        f.write('frobnicate,1,2,3,2024-01-01T00:00:00,\n')
+
+    report = verify_history(history_file, workers=workers, chunk_rows=10)
+    assert report.rows == 251
+    assert [(m.file, m.row, m.saved) for m in report.mismatches] == [
+        (segment.name, 17, '42'),
+        (history_file.name, 3, '42'),
+        (history_file.name, 48, '42'),
+        (history_file.name, 51, '3'),
+    ]
+    assert report.mismatches[-1].computed == "error: Unknown operation: frobnicate"
+
+    lines = report.lines(limit=2)
+    assert lines[0].endswith(": 4 mismatches")
+    assert lines[1].startswith("  calculator_history.000002.csv.gz row 17: ")
+    assert lines[-1] == "  ... and 2 more"
+
+
+def test_missing_and_empty_files(tmp_path):
+    history_file = tmp_path / 'calculator_history.csv'
+    assert history_files(history_file) == []
+    assert verify_history(history_file).rows == 0
+    history_file.write_text('')
+    report = verify_history(history_file, workers=1)
+    assert (report.files, report.rows, report.ok) == (1, 0, True)
+
+
+def test_history_archived_during_verification(history_file, monkeypatch):
+    check_chunk = history_verifier.check_chunk
+
+    def check_then_compact(chunk, settings):
+        # A save from another process archives the history mid-verification
+        if chunk[1] == 1 and chunk[0].endswith('000001.csv.gz'):
+            assert HistorySegments(history_file).compact() == 200
+        return check_chunk(chunk, settings)
+
+    monkeypatch.setattr(history_verifier, 'check_chunk', check_then_compact)
+    report = verify_history(history_file, workers=1, chunk_rows=30)
+    assert report.ok
+    assert (report.files, report.rows) == (3, 250)
+
+
+def test_context_settings():
+    config = CalculatorConfig(decimal_precision=12, decimal_rounding='ROUND_DOWN', decimal_traps=['Overflow'])
+    assert context_settings(config) == (12, 'ROUND_DOWN', ('Overflow',))
+
+
+def test_background_verification(history_file, caplog):
+    corrupt_line(history_file, 5)
+    with caplog.at_level(logging.INFO):
+        verification = BackgroundVerification(history_file, (28, 'ROUND_HALF_EVEN', ()), workers=1)
+        report = verification.result(timeout=30)
+    assert verification.done
+    assert report.mismatches == [Mismatch(history_file.name, 5, report.mismatches[0].operation, '42',
+                                          report.mismatches[0].computed)]
+    assert verification.status().endswith(": 1 mismatches")
+    assert "calculator_history.csv row 5" in caplog.text
+
+
+def test_background_verification_failure(tmp_path, caplog):
+    history_file = tmp_path / 'calculator_history.csv'
+    history_file.write_text('operation,operand1\nadd,1\n')
+    with caplog.at_level(logging.ERROR):
+        verification = BackgroundVerification(history_file, (28, 'NOT_A_ROUNDING', ()), workers=1)
+        with pytest.raises(AttributeError):
+            verification.result(timeout=30)
+    assert verification.status().startswith("Verification failed")
+    assert "History verification of" in caplog.text
+
+
+def test_background_verification_for_config(tmp_path):
+    config = CalculatorConfig(base_dir=tmp_path, verify_workers=1, verify_chunk_rows=5)
+    HistoryGenerator().write(config.history_file, 20)
+    verification = BackgroundVerification.for_config(config)
+    assert verification.result(timeout=30).rows == 20
+
+
+def test_main(history_file, capsys):
+    assert main([str(history_file), '--workers', '1']) == 0
+    corrupt_line(history_file, 1)
+    assert main([str(history_file), '--workers', '1', '--limit', '0']) == 1
+    out = capsys.readouterr().out
+    assert ": 1 mismatches" in out
+    assert "... and 1 more" in out
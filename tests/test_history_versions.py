@@ -0,0 +1,97 @@
+import pytest
+
+from app.calculation import Calculation
+from app.exceptions import OperationError
+from app.history_versions import HistoryView, HistoryVersions, prefix, shared_prefix
+
+
+def make_calcs(count):
+    return [Calculation(operation="add", operand1=i, operand2=1, result=i + 1) for i in range(count)]
+
+
+def test_record_numbers_versions():
+    versions = HistoryVersions()
+    history = []
+    assert versions.record(history) == 0
+    history.extend(make_calcs(2))
+    assert versions.record(history) == 1
+    assert versions.current == 1
+    assert len(versions) == 2
+
+def test_history_at_shares_latest_list():
+    versions = HistoryVersions()
+    history = make_calcs(3)
+    versions.record(history[:0], source=history)
+    versions.record(history)
+    assert versions.history_at(1) is history
+    assert versions.history_at(0) == []
+    assert not versions.history_at(0)
+    assert versions.get(1).last is history[-1]
+    assert versions.get(0).last is None
+
+def test_old_versions_survive_appends():
+    versions = HistoryVersions()
+    history = make_calcs(2)
+    versions.record(history)
+    history.extend(make_calcs(1))
+    versions.record(history)
+    assert len(versions.history_at(0)) == 2
+    assert versions.history_at(1) is history
+
+def test_unknown_version():
+    versions = HistoryVersions()
+    versions.record([])
+    with pytest.raises(OperationError, match="Unknown history version"):
+        versions.get(1)
+    with pytest.raises(OperationError):
+        versions.get(-1)
+
+def test_oldest_versions_are_dropped():
+    versions = HistoryVersions(max_versions=2)
+    for _ in range(4):
+        versions.record([])
+    assert len(versions) == 2
+    assert [v.number for v in versions.latest(5)] == [2, 3]
+    with pytest.raises(OperationError):
+        versions.get(1)
+    assert versions.latest(0) == []
+
+def test_history_at_shares_storage_of_earlier_versions():
+    versions = HistoryVersions()
+    history = make_calcs(5)
+    versions.record(history[:2], source=history)
+    versions.record(history)
+    earlier = versions.history_at(0)
+    assert isinstance(earlier, HistoryView)
+    assert earlier == history[:2]
+    assert earlier[-1] is history[1]
+    assert shared_prefix(earlier, history) == 2
+
+def test_view_appends_without_touching_shared_lists():
+    history = make_calcs(4)
+    view = prefix(history, 2)
+    extra = make_calcs(3)
+    view.append(extra[0])
+    view.append(extra[1])
+    assert len(history) == 4
+    assert list(view) == history[:2] + extra[:2]
+    assert view[2] is extra[0] and view[-1] is extra[1]
+    assert view[1:3] == [history[1], extra[0]]
+    assert view[::-1] == [extra[1], extra[0], history[1], history[0]]
+
+    # A view ending at the end of its list grows it in place; earlier holders keep their length
+    branch = prefix(view, 3)
+    branch.append(extra[2])
+    assert list(view) == history[:2] + extra[:2]
+    assert list(branch) == history[:2] + [extra[0], extra[2]]
+    assert shared_prefix(branch, view) == 3
+    with pytest.raises(IndexError):
+        branch[4]
+
+def test_prefix_with_tail():
+    history = make_calcs(3)
+    tail = make_calcs(1)
+    restored = prefix(history, 1, tail)
+    assert list(restored) == [history[0], tail[0]]
+    assert prefix(history, 3) is history
+    assert prefix(restored, 0) == []
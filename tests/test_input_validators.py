@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+from app.input_validators import InputValidator
+
+
+@pytest.fixture
+def config():
+    return CalculatorConfig(max_input_value=Decimal('1000.5'))
+
+
+@pytest.mark.parametrize("value, expected", [
+    (Decimal('2.50'), Decimal('2.50')),
+    (7, Decimal('7')),
+    (-1000, Decimal('-1000')),
+    (0.1, Decimal('0.1')),
+    (' 3.5 ', Decimal('3.5')),
+    ('1e3', Decimal('1000')),
+    (np.int64(12), Decimal('12')),
+    (np.float32(0.5), Decimal('0.5')),
+])
+def test_validate_number_types(config, value, expected):
+    result = InputValidator.validate_number(value, config)
+    assert isinstance(result, Decimal)
+    assert result == expected
+
+
+@pytest.mark.parametrize("value", [True, 'abc', '', float('nan'), 'NaN', Decimal('sNaN'), None, object()])
+def test_invalid_numbers(config, value):
+    with pytest.raises(ValidationError, match="Invalid number"):
+        InputValidator.validate_number(value, config)
+
+
+@pytest.mark.parametrize("value", [1001, -1001, 1000.6, '-1000.51', Decimal('1e4'), float('inf'), 'Infinity'])
+def test_values_over_the_limit(config, value):
+    with pytest.raises(ValidationError, match="exceeds maximum 1000.5"):
+        InputValidator.validate_number(value, config)
+
+
+def test_limit_is_inclusive(config):
+    assert InputValidator.validate_number('1000.5', config) == Decimal('1000.5')
+    assert InputValidator.validate_number(1000, config) == Decimal('1000')
+
+
+def test_validate_many_sequence(config):
+    assert InputValidator.validate_many([1, '2.5', Decimal('3'), 0.25], config) == [
+        Decimal('1'), Decimal('2.5'), Decimal('3'), Decimal('0.25')
+    ]
+    with pytest.raises(ValidationError):
+        InputValidator.validate_many([1, 'x'], config)
+
+
+@pytest.mark.parametrize("dtype", [np.int8, np.int64, np.uint64])
+def test_validate_many_integer_arrays(config, dtype):
+    values = np.arange(0, 100, dtype=dtype).reshape(10, 10)
+    assert InputValidator.validate_many(values, config) == [Decimal(i) for i in range(100)]
+
+
+def test_validate_many_integer_array_over_limit(config):
+    with pytest.raises(ValidationError, match="Value -2000 exceeds"):
+        InputValidator.validate_many(np.array([5, -2000, 3000]), config)
+    with pytest.raises(ValidationError, match="Value 2000 exceeds"):
+        InputValidator.validate_many(np.array([5, 2000], dtype=np.uint16), config)
+
+
+def test_validate_many_float_arrays(config):
+    values = np.array([0.1, -2.5, 1000.5])
+    assert InputValidator.validate_many(values, config) == [Decimal('0.1'), Decimal('-2.5'), Decimal('1000.5')]
+    with pytest.raises(ValidationError, match="exceeds"):
+        InputValidator.validate_many(np.array([1.0, 1000.6]), config)
+    with pytest.raises(ValidationError, match="exceeds"):
+        InputValidator.validate_many(np.array([np.inf]), config)
+    with pytest.raises(ValidationError, match="Invalid number"):
+        InputValidator.validate_many(np.array([1.0, np.nan]), config)
+
+
+def test_validate_many_float_array_at_a_rounded_limit():
+    # float('0.1') is just above Decimal('0.1'), so the float bound is not exact
+    config = CalculatorConfig(max_input_value=Decimal('0.1'))
+    assert InputValidator.validate_many(np.array([0.1, -0.1]), config) == [Decimal('0.1'), Decimal('-0.1')]
+
+
+def test_validate_many_object_array(config):
+    assert InputValidator.validate_many(np.array(['1', Decimal('2')], dtype=object), config) == [
+        Decimal('1'), Decimal('2')
+    ]
+
+
+def test_unbounded_limit():
+    config = CalculatorConfig(max_input_value=Decimal('Infinity'))
+    assert InputValidator.validate_number(10 ** 5000, config) == Decimal(10 ** 5000)
+    assert InputValidator.validate_many(np.array([2 ** 62]), config) == [Decimal(2 ** 62)]
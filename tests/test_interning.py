@@ -0,0 +1,33 @@
+from decimal import Decimal
+from app.interning import InternTable
+
+def test_equal_values_share_one_instance():
+    table = InternTable()
+    first = table.decimal(Decimal('2.5'))
+    assert table.decimal(Decimal('2.5')) is first
+    assert table.parse('2.5') is first
+
+def test_differently_written_values_stay_distinct():
+    table = InternTable()
+    one = table.decimal(Decimal('1'))
+    assert str(table.decimal(Decimal('1.0'))) == '1.0'
+    assert str(table.parse('-0')) == '-0'
+    assert table.parse('1') is one
+
+def test_table_is_bounded():
+    table = InternTable(max_entries=3)
+    for i in range(10):
+        table.parse(str(i))
+    assert len(table) <= 3
+
+def test_disabled_table_returns_values_unchanged():
+    table = InternTable(max_entries=0)
+    value = Decimal('7')
+    assert table.decimal(value) is value
+    assert table.parse('7') is not table.parse('7')
+    assert len(table) == 0
+
+def test_parse_accepts_non_text():
+    table = InternTable()
+    assert table.parse(3) == Decimal('3')
+    assert len(table) == 0
@@ -26,3 +26,60 @@ def test_memento_empty_history_to_dict():
     data = memento.to_dict()
     assert data["history"] == []
     assert "timestamp" in data
+
+
+from app.calculator_memento import DeltaMemento, UndoStore, memento_from_dict
+
+
+def make_calcs(count):
+    return [Calculation(operation="add", operand1=i, operand2=1, result=i + 1) for i in range(count)]
+
+def test_full_memento_restore_returns_copy():
+    calcs = make_calcs(2)
+    memento = CalculatorMemento(history=calcs)
+    restored = memento.restore([])
+    assert restored == calcs and restored is not calcs
+
+def test_delta_memento_restore():
+    calcs = make_calcs(3)
+    memento = DeltaMemento(prefix_length=1, tail=[calcs[2]])
+    assert memento.restore(calcs[:2]) == [calcs[0], calcs[2]]
+
+def test_delta_memento_between_finds_shared_prefix():
+    calcs = make_calcs(4)
+    memento = DeltaMemento.between(calcs[:2] + [calcs[3]], calcs[:3])
+    assert memento.prefix_length == 2
+    assert memento.tail == [calcs[3]]
+    assert DeltaMemento.between(calcs, [], prefix_length=0).tail == calcs
+
+def test_delta_memento_round_trip():
+    memento = DeltaMemento(prefix_length=4, tail=make_calcs(1))
+    restored = memento_from_dict(memento.to_dict())
+    assert isinstance(restored, DeltaMemento)
+    assert restored.prefix_length == 4
+    assert restored.tail == memento.tail
+    assert isinstance(memento_from_dict(CalculatorMemento(history=[]).to_dict()), CalculatorMemento)
+
+def test_undo_store_round_trip(tmp_path):
+    store = UndoStore.for_history(tmp_path / "history.csv")
+    history = make_calcs(3)
+    undo = [DeltaMemento(0), DeltaMemento(1), DeltaMemento(2)]
+    redo = [DeltaMemento(3, make_calcs(1))]
+    store.save(history, undo, redo, depth=2)
+
+    restored_undo, restored_redo = store.load(history)
+    assert [m.prefix_length for m in restored_undo] == [1, 2]
+    assert restored_redo[0].tail == redo[0].tail
+
+def test_undo_store_rejects_other_history(tmp_path):
+    store = UndoStore.for_history(tmp_path / "history.csv")
+    assert store.load([]) is None
+    store.save(make_calcs(2), [DeltaMemento(1)], [], depth=10)
+    assert store.load(make_calcs(1)) is None
+
+def test_undo_store_stops_below_full_snapshot(tmp_path):
+    store = UndoStore.for_history(tmp_path / "history.csv")
+    undo = [DeltaMemento(0), CalculatorMemento(history=[]), DeltaMemento(0)]
+    store.save([], undo, [], depth=10)
+    restored_undo, _ = store.load([])
+    assert len(restored_undo) == 1
@@ -0,0 +1,52 @@
+import json
+
+from app.metrics import LatencyHistogram, Metrics
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram()
+    for ns in (1, 100, 1000, 1000, 50_000):
+        histogram.record(ns)
+    assert histogram.count == 5
+    assert histogram.min == 1 and histogram.max == 50_000
+    assert histogram.mean == (1 + 100 + 2000 + 50_000) / 5
+    assert 1000 <= histogram.percentile(50) <= 1250
+    assert histogram.percentile(100) == 50_000
+    assert sum(histogram.buckets.values()) == 5
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0
+    assert histogram.mean == 0.0
+    assert histogram.to_dict()['count'] == 0
+
+def test_metrics_snapshot_and_json():
+    metrics = Metrics(enabled=True)
+    metrics.increment("operations.add")
+    metrics.increment("operations.add")
+    metrics.observe("operation.add", 2000)
+    start = metrics.lap("validate", 0)
+    assert start > 0
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {"operations.add": 2}
+    assert snapshot['throughput_ops_per_s'] > 0
+    assert set(snapshot['histograms']) == {"operation.add", "stage.validate"}
+    assert json.loads(metrics.to_json())['counters'] == {"operations.add": 2}
+
+def test_metrics_dump_and_reset(tmp_path):
+    metrics = Metrics(enabled=True)
+    metrics.observe("stage.execute", 10)
+    path = metrics.dump(tmp_path / "out" / "metrics.json")
+    assert json.loads(path.read_text())['histograms']['stage.execute']['count'] == 1
+    metrics.reset()
+    assert metrics.snapshot()['histograms'] == {}
+
+def test_metrics_report():
+    metrics = Metrics()
+    metrics.increment("operations.add")
+    metrics.observe("stage.execute", 1500)
+    lines = metrics.report()
+    assert lines[0].startswith("Throughput")
+    assert "operations.add: 1" in lines
+    assert any(line.startswith("stage.execute: n=1") for line in lines)
@@ -0,0 +1,112 @@
+from decimal import Decimal
+import threading
+
+import pytest
+
+from app.calculation import Calculation
+from app.history import HistoryObserver
+from app.observer_dispatcher import ObserverDispatcher
+
+
+class RecordingObserver(HistoryObserver):
+    asynchronous = True
+
+    def __init__(self, gate: threading.Event = None):
+        self.gate = gate
+        self.batches = []
+
+    def update(self, calculation):
+        self.update_batch([calculation])
+
+    def update_batch(self, calculations):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(calculations))
+
+    @property
+    def received(self):
+        return [c for batch in self.batches for c in batch]
+
+
+class FailingObserver(HistoryObserver):
+    def update(self, calculation):
+        raise RuntimeError("observer broke")
+
+
+def calculations(count):
+    return [Calculation("add", Decimal(i), Decimal(1)) for i in range(count)]
+
+
+def test_delivers_in_order_in_batches():
+    observer = RecordingObserver(threading.Event())
+    dispatcher = ObserverDispatcher(observer, batch_size=3)
+    calcs = calculations(7)
+    for calc in calcs:
+        dispatcher.submit(calc)
+    observer.gate.set()
+    assert dispatcher.flush(5)
+    assert observer.received == calcs
+    assert all(len(batch) <= 3 for batch in observer.batches)
+    dispatcher.close()
+
+
+def test_slow_observer_does_not_stall_submit():
+    observer = RecordingObserver(threading.Event())
+    dispatcher = ObserverDispatcher(observer)
+    for calc in calculations(50):
+        dispatcher.submit(calc)
+    assert not dispatcher.flush(0.01)
+    observer.gate.set()
+    dispatcher.close()
+    assert len(observer.received) == 50
+
+
+def test_block_policy_waits_for_room():
+    observer = RecordingObserver(threading.Event())
+    dispatcher = ObserverDispatcher(observer, max_queue=2, batch_size=1)
+    submitter = threading.Thread(target=lambda: [dispatcher.submit(c) for c in calculations(6)])
+    submitter.start()
+    submitter.join(0.1)
+    assert submitter.is_alive()
+    observer.gate.set()
+    submitter.join(5)
+    dispatcher.close()
+    assert len(observer.received) == 6
+    assert dispatcher.dropped == 0
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [0, 3, 4]), ("drop_newest", [0, 1, 2])])
+def test_drop_policies(policy, kept):
+    observer = RecordingObserver(threading.Event())
+    dispatcher = ObserverDispatcher(observer, max_queue=2, batch_size=1, policy=policy)
+    calcs = calculations(5)
+    dispatcher.submit(calcs[0])
+    while not dispatcher._busy:  # Wait for the worker to take the first one
+        pass
+    for calc in calcs[1:]:
+        dispatcher.submit(calc)
+    observer.gate.set()
+    dispatcher.close()
+    assert observer.received == [calcs[i] for i in kept]
+    assert dispatcher.dropped == 2
+
+
+def test_observer_errors_are_contained():
+    dispatcher = ObserverDispatcher(FailingObserver())
+    dispatcher.submit(calculations(1)[0])
+    dispatcher.close()
+    assert dispatcher.errors == 1
+
+
+def test_submit_after_close_is_synchronous():
+    observer = RecordingObserver()
+    dispatcher = ObserverDispatcher(observer)
+    dispatcher.close()
+    calc = calculations(1)[0]
+    dispatcher.submit(calc)
+    assert observer.received == [calc]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError, match="Unknown backpressure policy"):
+        ObserverDispatcher(RecordingObserver(), policy="drop_everything")
@@ -1,9 +1,14 @@
 import pytest
 from decimal import Decimal
+from fractions import Fraction
 from app.operations import OperationFactory
 from app.exceptions import OperationError
 from app.operations import (
+    MAX_POWER_DIGITS,
+    ModPowOperation,
+    PowerOperation,
     RootOperation,
+    pairwise,
     ModulusOperation,
     IntegerDivisionOperation,
     PercentageOperation,
@@ -71,4 +76,149 @@ def test_absolute_difference_positive_result():
 def test_absolute_difference_negative_result():
     op = AbsoluteDifferenceOperation()
     result = op.execute(Decimal('3'), Decimal('7'))
-    assert result == Decimal('4')
\ No newline at end of file
+    assert result == Decimal('4')
+@pytest.mark.parametrize("name, a, b, expected", [
+    ("add", 1, Fraction(1, 3), Fraction(4, 3)),
+    ("subtract", Fraction(1, 2), Fraction(1, 3), Fraction(1, 6)),
+    ("multiply", 3, Fraction(1, 3), 1),
+    ("divide", 1, 3, Fraction(1, 3)),
+    ("integerdivision", 7, 2, 3),
+    ("integerdivision", -7, 2, -4),
+    ("percentage", 1, 3, Fraction(100, 3)),
+    ("modulus", -7, 2, 1),
+    ("modulus", Fraction(7, 2), 1, Fraction(1, 2)),
+    ("absolutedifference", Fraction(1, 3), 1, Fraction(2, 3)),
+    ("power", Fraction(2, 3), 3, Fraction(8, 27)),
+    ("root", Fraction(8, 27), 3, Fraction(2, 3)),
+    ("root", 10 ** 40, 2, 10 ** 20),
+])
+def test_exact_execution(name, a, b, expected):
+    result = OperationFactory.create_operation(name).execute_exact(a, b)
+    assert result == expected
+    assert isinstance(result, (int, Fraction))
+
+def test_exact_execution_falls_back_to_decimal():
+    assert round(RootOperation().execute_exact(2, 2), 5) == Decimal('1.41421')
+    assert OperationFactory.create_operation('power').execute_exact(4, Fraction(1, 2)) == Decimal('2')
+
+@pytest.mark.parametrize("name, a, b, message", [
+    ("divide", 1, 0, "Division by zero"),
+    ("integerdivision", 1, 0, "Division by zero"),
+    ("percentage", 1, 0, "Division by zero"),
+    ("modulus", 1, 0, "Division by zero"),
+    ("power", 2, -1, "Negative exponents"),
+    ("power", 2, 10 ** 7, "too large"),
+    ("root", -8, 3, "negative number"),
+    ("root", 8, 0, "Zero root"),
+])
+def test_exact_execution_errors(name, a, b, message):
+    with pytest.raises(OperationError, match=message):
+        OperationFactory.create_operation(name).execute_exact(a, b)
+
+@pytest.mark.parametrize("a, b, quotient, remainder", [
+    ('7', '2', '3', '1'),
+    ('-7', '2', '-4', '1'),
+    ('7', '-2', '-4', '-1'),
+    ('-7', '-2', '3', '-1'),
+    ('7.5', '2', '3', '1.5'),
+    ('-7.5', '2', '-4', '0.5'),
+    ('7.5', '-0.5', '-15', '0'),
+    ('1E+3', '7', '142', '6'),
+])
+def test_floor_division_and_modulus(a, b, quotient, remainder):
+    assert IntegerDivisionOperation().execute(Decimal(a), Decimal(b)) == Decimal(quotient)
+    assert ModulusOperation().execute(Decimal(a), Decimal(b)) == Decimal(remainder)
+
+def test_integer_division_and_modulus_are_exact_for_huge_integers():
+    a, b = 10 ** 500 + 12345, 10 ** 200 + 7
+    quotient = IntegerDivisionOperation().execute(Decimal(a), Decimal(b))
+    remainder = ModulusOperation().execute(Decimal(a), Decimal(b))
+    assert int(quotient) == a // b
+    assert int(remainder) == a % b
+
+def test_integer_division_of_infinity():
+    op = IntegerDivisionOperation()
+    assert op.execute(Decimal('Infinity'), Decimal('2')) == Decimal('Infinity')
+
+def test_integer_power_is_exact():
+    op = PowerOperation()
+    assert op.execute(Decimal(3), Decimal(50)) == Decimal(3 ** 50)
+    assert op.execute(Decimal(-2), Decimal('3.0')) == Decimal(-8)
+    assert op.execute(Decimal(7), Decimal(1000)) == Decimal(7 ** 1000)
+    assert op.execute(Decimal(1), Decimal(10) ** 100) == Decimal(1)
+
+def test_power_with_decimal_base_or_fractional_exponent():
+    op = PowerOperation()
+    assert op.execute(Decimal('1.1'), Decimal(2)) == Decimal('1.21')
+    assert op.execute(Decimal(4), Decimal('0.5')) == Decimal(2)
+    # float overflows here; Decimal arithmetic does not
+    assert op.execute(Decimal(10), Decimal('400.5')) > Decimal('1e400')
+
+def test_integer_power_result_size_guard():
+    with pytest.raises(OperationError, match="Result too large"):
+        PowerOperation().execute(Decimal(10), Decimal(MAX_POWER_DIGITS + 1))
+    with pytest.raises(OperationError, match="Result too large"):
+        PowerOperation().execute(Decimal(3), Decimal('1e999'))
+
+@pytest.mark.parametrize("a, expected", [(1, 1), (0, 0), (-1, -1), (Fraction(1), 1)])
+def test_exact_power_of_zero_and_one_skips_size_guard(a, expected):
+    assert PowerOperation().execute_exact(a, 10 ** 7 + 1) == expected
+
+@pytest.mark.parametrize("a, b, m, expected", [
+    ('4', '13', '497', '445'),
+    ('2', str(10 ** 100), '1000000007', str(pow(2, 10 ** 100, 1000000007))),
+    ('3', '-1', '7', '5'),
+    ('-2', '3', '5', '2'),
+])
+def test_modpow(a, b, m, expected):
+    op = OperationFactory.create_operation('modpow')
+    assert op.arity == 3
+    assert op.execute(Decimal(a), Decimal(b), Decimal(m)) == Decimal(expected)
+    assert op.execute_exact(int(a), int(b), int(m)) == int(expected)
+
+@pytest.mark.parametrize("a, b, m, message", [
+    ('2.5', '2', '7', "requires integers"),
+    ('2', '2', '0', "must not be zero"),
+    ('2', '-1', '4', "no inverse"),
+])
+def test_modpow_errors(a, b, m, message):
+    with pytest.raises(OperationError, match=message):
+        ModPowOperation().execute(Decimal(a), Decimal(b), Decimal(m))
+
+def test_pairwise_combines_neighbours():
+    assert pairwise([1], lambda a, b: a + b) == 1
+    assert pairwise(['a', 'b', 'c', 'd', 'e'], lambda a, b: f"({a}{b})") == "(((ab)(cd))e)"
+
+@pytest.mark.parametrize("name, values, expected", [
+    ("sum", ['1', '2.5', '-0.5'], '3'),
+    ("product", ['2', '3', '0.5', '4'], '12'),
+    ("min", ['3', '-1', '2'], '-1'),
+    ("max", ['3', '-1', '2'], '3'),
+    ("mean", ['1', '2', '3', '4'], '2.5'),
+])
+def test_reductions(name, values, expected):
+    op = OperationFactory.create_operation(name)
+    assert op.arity is None
+    assert op.execute(*map(Decimal, values)) == Decimal(expected)
+
+def test_reductions_exact():
+    assert OperationFactory.create_operation('sum').execute_exact(Fraction(1, 3), Fraction(2, 3), 1) == 2
+    assert OperationFactory.create_operation('mean').execute_exact(1, 2) == Fraction(3, 2)
+    assert OperationFactory.create_operation('product').execute_exact(Fraction(1, 3), 3, 5) == 5
+
+def test_sum_rounding_error_grows_with_tree_depth():
+    import decimal
+    values = [Decimal(1)] + [Decimal('0.0001')] * 1000
+    with decimal.localcontext() as context:
+        context.prec = 4
+        sequential = values[0]
+        for value in values[1:]:
+            sequential += value
+        tree = OperationFactory.create_operation('sum').execute(*values)
+    assert sequential == Decimal(1)
+    assert tree == Decimal('1.100')
+
+def test_operation_names_are_computed_once_and_shared():
+    assert str(OperationFactory.create_operation('integerdivision')) == 'integerdivision'
+    assert str(OperationFactory.create_operation('add')) is str(OperationFactory.create_operation('add'))
+    assert ModPowOperation.name == 'modpow'
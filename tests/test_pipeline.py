@@ -0,0 +1,68 @@
+from decimal import Decimal
+from fractions import Fraction
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.input_validators import InputValidator
+from app.pipeline import ANS, parse_pipeline, run_pipeline
+
+
+@pytest.fixture
+def calculator():
+    with TemporaryDirectory() as temp_dir:
+        yield Calculator(CalculatorConfig(base_dir=Path(temp_dir), auto_save=False, wal_enabled=False))
+
+
+def test_parse_pipeline():
+    stages = parse_pipeline("add 5 | Multiply 3, ANS | sum 1 2")
+    assert [str(stage.operation) for stage in stages] == ['add', 'multiply', 'sum']
+    assert [stage.operands for stage in stages] == [['5'], ['3', ANS], ['1', '2']]
+
+@pytest.mark.parametrize("text, message", [
+    ("add 1 2 | ", "Empty pipeline stage"),
+    ("add 1 2 | frobnicate 3", "Unknown operation"),
+])
+def test_parse_pipeline_errors(text, message):
+    with pytest.raises(OperationError, match=message):
+        parse_pipeline(text)
+
+def test_run_pipeline_chains_previous_results(calculator):
+    result = run_pipeline(calculator, parse_pipeline("add 2 3 | multiply 4 | root 2 | subtract 10 ans"))
+    assert result == Decimal(10) - calculator.history[2].result
+    assert [c.operation for c in calculator.history] == ['add', 'multiply', 'root', 'subtract']
+    assert calculator.history[1].operands == (Decimal(5), Decimal(4))
+    assert run_pipeline(calculator, parse_pipeline("add 5")) == calculator.history[-2].result + 5
+    assert run_pipeline(calculator, parse_pipeline("sum 1 2 | sum 10 20 | modpow 2 7")) == Decimal(33 ** 2 % 7)
+    assert calculator.history[-2].operands == (Decimal(3), Decimal(10), Decimal(20))
+
+def test_run_pipeline_skips_validation_of_previous_result(calculator):
+    run_pipeline(calculator, parse_pipeline("add 1 2"))
+    with patch.object(InputValidator, 'validate_number', wraps=InputValidator.validate_number) as validate:
+        run_pipeline(calculator, parse_pipeline("multiply 3 | add 4"))
+    assert [call.args[0] for call in validate.call_args_list] == ['3', '4']
+
+def test_run_pipeline_beyond_input_limit(calculator):
+    calculator.config.max_input_value = Decimal(100)
+    assert run_pipeline(calculator, parse_pipeline("multiply 50 50 | add 1")) == Decimal(2501)
+    with pytest.raises(ValidationError):
+        run_pipeline(calculator, parse_pipeline("add 2501 1"))
+
+def test_run_pipeline_errors(calculator):
+    with pytest.raises(OperationError, match="No previous result"):
+        run_pipeline(calculator, parse_pipeline("add 1"))
+    with pytest.raises(OperationError, match="takes 2 operands"):
+        run_pipeline(calculator, parse_pipeline("add 1 2 3"))
+    with pytest.raises(OperationError, match="at least 2 operands"):
+        run_pipeline(calculator, parse_pipeline("sum 1"))
+
+def test_exact_mode_chains_exact_results(calculator):
+    calculator.config.exact_mode = True
+    assert run_pipeline(calculator, parse_pipeline("divide 1 3 | multiply 3")) == Decimal(1)
+    assert calculator.history[0].result == Fraction(1, 3)
+    assert calculator.history[1].operand1 == Fraction(1, 3)
@@ -0,0 +1,117 @@
+from pathlib import Path
+import pstats
+import tracemalloc
+from tempfile import TemporaryDirectory
+from unittest.mock import patch, PropertyMock
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.operations import OperationFactory
+from app.profiling import Profiler
+
+
+@pytest.fixture
+def calculator():
+    with TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        config = CalculatorConfig(base_dir=temp_path)
+        with patch.object(CalculatorConfig, 'history_dir', new_callable=PropertyMock) as mock_history_dir, \
+             patch.object(CalculatorConfig, 'history_file', new_callable=PropertyMock) as mock_history_file:
+            mock_history_dir.return_value = temp_path / "history"
+            mock_history_file.return_value = temp_path / "history/calculator_history.csv"
+            calculator = Calculator(config=config)
+            calculator.set_operation(OperationFactory.create_operation('multiply'))
+            yield calculator
+
+
+def test_profiles_operations_and_saves(calculator):
+    profiler = Profiler(calculator)
+    profiler.start()
+    assert profiler.active
+    calculator.perform_operation(2, 3)
+    calculator.save_history()
+    profiler.stop()
+
+    assert len(profiler.allocations) == 2
+    assert calculator._hooks == {}
+    assert not tracemalloc.is_tracing()
+    functions = {name for _, _, name in pstats.Stats(profiler.profile).stats}
+    assert {'validate_number', 'execute', 'notify_observers', '_append_rows'} <= functions
+    assert "Memory: 2 spans" in profiler.report()
+
+
+def test_profiling_restarts_after_stop(calculator):
+    profiler = Profiler(calculator)
+    profiler.start()
+    calculator.perform_operation(2, 3)
+    profiler.stop()
+    assert not profiler.active
+    assert "Memory: 1 spans" in profiler.report()
+
+    profiler.start()
+    assert profiler.active
+    assert calculator._hooks
+    calculator.perform_operation(4, 5)
+    calculator.perform_operation(6, 7)
+    report = profiler.report()
+    profiler.stop()
+    assert "Memory: 2 spans" in report
+    assert 'execute' in {name for _, _, name in pstats.Stats(profiler.profile).stats}
+
+
+def test_auto_save_inside_an_operation_keeps_one_span(calculator):
+    from app.history import AutoSaveObserver, HistoryObserver
+
+    class AfterSaveObserver(HistoryObserver):
+        def update(self, calculation):
+            self.observed_after_save(calculation)
+
+        def observed_after_save(self, calculation):
+            return calculation
+
+    calculator.config.auto_save = True
+    calculator.add_observer(AutoSaveObserver(calculator))
+    calculator.add_observer(AfterSaveObserver())
+    profiler = Profiler(calculator)
+    profiler.start()
+    calculator.perform_operation(2, 3)
+    calculator.perform_operation(4, 5)
+    profiler.stop()
+
+    # The save nested in each operation neither ended its span early nor counted as one
+    assert len(profiler.allocations) == 2
+    functions = {name for _, _, name in pstats.Stats(profiler.profile).stats}
+    assert {'save_history', 'observed_after_save'} <= functions
+
+
+def test_error_ends_the_profiled_span(calculator):
+    profiler = Profiler(calculator)
+    profiler.start()
+    calculator.set_operation(OperationFactory.create_operation('divide'))
+    with pytest.raises(Exception):
+        calculator.perform_operation(1, 0)
+    assert profiler.allocations and profiler._span_memory is None
+    profiler.stop()
+
+
+def test_report_without_operations(calculator):
+    profiler = Profiler(calculator)
+    assert profiler.report() == "No profile collected"
+    profiler.start()
+    assert "No operations profiled" in profiler.report()
+    profiler.stop()
+
+
+def test_dump_writes_report_or_raw_profile(calculator, tmp_path):
+    profiler = Profiler(calculator)
+    profiler.start()
+    calculator.perform_operation(2, 3)
+    profiler.stop()
+
+    text = tmp_path / "profile.txt"
+    raw = tmp_path / "profile.prof"
+    assert profiler.dump(text) == text.read_text()
+    profiler.dump(raw)
+    assert pstats.Stats(str(raw)).total_calls > 0
@@ -0,0 +1,37 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.exceptions import OperationError
+from app.rational import from_exact, integer_root, to_decimal, to_exact
+
+
+def test_to_exact():
+    assert to_exact(Decimal('12')) == 12 and type(to_exact(Decimal('12'))) is int
+    assert to_exact(Decimal('1.2E+3')) == 1200
+    assert to_exact(Decimal('0.125')) == Fraction(1, 8)
+    with pytest.raises(OperationError, match="No exact value"):
+        to_exact(Decimal('Infinity'))
+
+
+def test_from_exact():
+    assert from_exact(5) == Decimal(5) and isinstance(from_exact(5), Decimal)
+    assert isinstance(from_exact(Fraction(6, 3)), Decimal)
+    assert from_exact(Fraction(1, 3)) == Fraction(1, 3)
+    assert from_exact(Decimal('1.5')) == Decimal('1.5')
+
+
+def test_to_decimal():
+    assert to_decimal(Fraction(1, 4)) == Decimal('0.25')
+    assert str(to_decimal(Fraction(1, 3))) == '0.' + '3' * 28
+    assert to_decimal(7) == Decimal(7)
+    assert to_decimal(Decimal('2.5')) == Decimal('2.5')
+
+
+@pytest.mark.parametrize("n, k, expected", [
+    (0, 3, 0), (1, 5, 1), (16, 2, 4), (17, 2, None), (27, 3, 3), (26, 3, None),
+    (10 ** 60, 3, 10 ** 20), (10 ** 60 + 1, 3, None), (2 ** 100, 100, 2),
+])
+def test_integer_root(n, k, expected):
+    assert integer_root(n, k) == expected
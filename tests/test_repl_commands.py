@@ -0,0 +1,120 @@
+from decimal import Decimal
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.operations import AddOperation, OperationFactory
+from app.repl_commands import CommandRegistry, ReplSession, default_registry
+
+
+@pytest.fixture
+def registry():
+    return default_registry()
+
+
+@pytest.fixture
+def session(registry):
+    with TemporaryDirectory() as temp_dir:
+        calc = Calculator(CalculatorConfig(base_dir=Path(temp_dir), auto_save=False, wal_enabled=False))
+        yield ReplSession(calc, registry)
+        calc.close()
+
+
+@pytest.mark.parametrize("word, name", [
+    ("history", "history"),
+    ("HIST", "history"),
+    ("quit", "exit"),
+    ("?", "help"),
+    ("+", "add"),
+    ("//", "integerdivision"),
+    ("mod", "modulus"),
+    ("modp", "modpow"),
+    ("sum", "sum"),
+    ("summ", "summary"),
+])
+def test_resolve(registry, word, name):
+    assert registry.resolve(word).name == name
+
+
+def test_ambiguous_and_unknown(registry, session, capsys):
+    assert {command.name for command in registry.matches("p")} == {"power", "percentage", "product", "profile"}
+    assert registry.resolve("p") is None
+    assert registry.resolve("frobnicate") is None
+    registry.dispatch(session, "pro")
+    registry.dispatch(session, "frobnicate 1")
+    out = capsys.readouterr().out
+    assert "Ambiguous command 'pro': product, profile" in out
+    assert "Unknown command: 'frobnicate 1'" in out
+
+
+def test_dispatch_inline_and_aliased_pipeline(registry, session, capsys):
+    registry.dispatch(session, "+ 2 3|* 4 | subt 5")
+    assert "Result: 15" in capsys.readouterr().out
+    assert [calc.operation for calc in session.calculator.history] == ["add", "multiply", "subtract"]
+
+
+def test_exit_stops_session(registry, session):
+    registry.dispatch(session, "q")
+    assert not session.running
+
+
+def test_register_plugin_command(registry, session, capsys):
+    @registry.command("double", "Double the previous result", aliases=("dbl",))
+    def double(session, args):
+        print(f"{session.calculator.ans * 2}")
+
+    registry.dispatch(session, "add 2 3")
+    registry.dispatch(session, "dbl")
+    assert capsys.readouterr().out.endswith("10\n")
+    assert registry.resolve("dou").name == "double"
+    assert "  double (dbl) - Double the previous result" in registry.help_lines()
+
+    registry.unregister("double")
+    assert registry.resolve("dbl") is None
+    assert registry.resolve("dou") is None
+
+
+def test_register_duplicate(registry):
+    with pytest.raises(ValueError, match="Command already registered: q"):
+        registry.register("quiet", lambda session, args: None, "Be quiet", aliases=("q",))
+    assert registry.resolve("quiet") is None
+
+
+def test_register_operation():
+    class TwiceOperation(AddOperation):
+        def execute(self, a: Decimal, b: Decimal) -> Decimal:
+            return 2 * (a + b)
+
+    with patch.dict(OperationFactory._operations, {"twice": TwiceOperation}):
+        registry = default_registry()
+    assert registry.resolve("twi").is_operation
+    assert registry.operation_name("twi") == "twice"
+    assert registry.operation_name("history") == "history"
+
+
+def test_help_lines_group_operations(registry):
+    lines = registry.help_lines()
+    assert lines[0].startswith("  add, subtract, multiply, divide, power, root")
+    assert "  sum, product, min, max, mean - Reduce a list of numbers to one result" in lines
+    assert "  goto <version> - Jump to a history version" in lines
+    assert "  exit (quit, q) - Exit the calculator" in lines
+
+
+def test_completions(registry):
+    assert registry.completions("hi") == ["history"]
+    assert registry.completions("m") == ["max", "mean", "min", "mod", "modpow", "modulus", "multiply"]
+    assert registry.completions("p", "add 2 3 | ") == ["percentage", "percentcalculation", "power", "product"]
+    assert registry.completions("", "add ") == []
+    assert CommandRegistry().completions("a") == []
+
+
+def test_complete_for_readline(registry):
+    with patch("readline.get_line_buffer", return_value="undo | su"), \
+            patch("readline.get_begidx", return_value=7):
+        assert registry.complete("su", 0) == "subtract"
+        assert registry.complete("su", 1) == "sum"
+        assert registry.complete("su", 2) is None
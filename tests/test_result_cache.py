@@ -0,0 +1,27 @@
+from decimal import Decimal
+from app.result_cache import ResultCache
+
+def test_get_counts_hits_and_misses():
+    cache = ResultCache()
+    assert cache.get('a') is None
+    cache.put('a', Decimal('1'))
+    assert cache.get('a') == Decimal('1')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+def test_clear():
+    cache = ResultCache()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
@@ -0,0 +1,63 @@
+from decimal import Decimal
+import random
+import statistics
+
+import pytest
+
+from app.streaming_stats import QuantileSketch, RunningStats, StreamingStatistics
+
+
+def test_running_stats_match_two_pass_statistics():
+    rng = random.Random(7)
+    values = [Decimal(rng.randrange(-10 ** 6, 10 ** 6)).scaleb(-3) for _ in range(1000)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == 1000
+    assert stats.min == min(values)
+    assert stats.max == max(values)
+    assert abs(stats.mean - statistics.mean(values)) < Decimal('1e-20')
+    assert abs(stats.variance - statistics.variance(values)) < Decimal('1e-15')
+
+def test_running_stats_counts_infinite_values_apart():
+    stats = RunningStats()
+    for value in ('1', 'Infinity', '3', '-Infinity'):
+        stats.add(Decimal(value))
+    assert (stats.count, stats.non_finite) == (2, 2)
+    assert stats.mean == 2
+    assert stats.stdev == Decimal(2).sqrt()
+
+@pytest.mark.parametrize("q", [0.01, 0.5, 0.9, 0.99])
+def test_quantile_sketch_relative_error(q):
+    rng = random.Random(3)
+    values = sorted(rng.lognormvariate(0, 3) * rng.choice((-1, 1)) for _ in range(20000))
+    sketch = QuantileSketch(bits=7)
+    for value in values:
+        sketch.add(Decimal(value))
+    exact = values[int(q * len(values)) - 1]
+    assert sketch.quantile(q) == pytest.approx(exact, rel=2 ** -7)
+    assert len(sketch.buckets) < 5000
+
+def test_quantile_sketch_memory_does_not_grow_with_count():
+    sketch = QuantileSketch(bits=4)
+    for i in range(10000):
+        sketch.add(Decimal(i % 100))
+    assert sketch.count == 10000
+    assert len(sketch.buckets) < 100
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_streaming_statistics_summary_and_report():
+    stats = StreamingStatistics()
+    assert stats.report() == ["No calculations yet"]
+    stats.add(Decimal(1), 'add')
+    stats.add(Decimal(3), 'multiply')
+    stats.add_many([Decimal(5), Decimal('Infinity')])
+    summary = stats.summary()
+    assert summary['count'] == 4
+    assert summary['mean'] == 3
+    assert summary['operations'] == {'add': 1, 'multiply': 1}
+    report = "\n".join(stats.report())
+    assert "Calculations: 4" in report
+    assert "Infinite results: 1" in report
+    assert "Min: 1  Max: 5" in report
+    assert "add=1, multiply=1" in report
@@ -0,0 +1,61 @@
+import json
+
+from app.file_lock import FileLock
+from app.write_ahead_log import WriteAheadLog
+
+
+def test_append_and_read(tmp_path):
+    wal = WriteAheadLog(tmp_path / "history.csv.1.wal", fsync=False)
+    wal.append({'type': 'undo'})
+    wal.append({'type': 'redo'})
+    assert WriteAheadLog.read(wal.path) == [{'type': 'undo'}, {'type': 'redo'}]
+    wal.close()
+
+def test_read_missing_log(tmp_path):
+    assert WriteAheadLog.read(tmp_path / "missing.wal") == []
+
+def test_read_ignores_torn_record(tmp_path):
+    path = tmp_path / "history.csv.1.wal"
+    path.write_text(json.dumps({'type': 'undo'}) + '\n{"type": "re')
+    assert WriteAheadLog.read(path) == [{'type': 'undo'}]
+
+def test_checkpoint_empties_log(tmp_path):
+    wal = WriteAheadLog(tmp_path / "history.csv.1.wal")
+    wal.checkpoint()  # nothing opened yet
+    wal.append({'type': 'clear'})
+    wal.checkpoint()
+    assert WriteAheadLog.read(wal.path) == []
+    wal.append({'type': 'undo'})
+    assert WriteAheadLog.read(wal.path) == [{'type': 'undo'}]
+    wal.close()
+
+def test_close_removes_log_and_lock(tmp_path):
+    wal = WriteAheadLog.for_session(tmp_path / "history.csv")
+    wal.append({'type': 'clear'})
+    wal.close()
+    assert list(tmp_path.iterdir()) == []
+
+def test_orphans_skip_live_sessions(tmp_path):
+    history_file = tmp_path / "history.csv"
+    live = WriteAheadLog.for_session(history_file)
+    live.append({'type': 'clear'})
+    dead = history_file.with_name("history.csv.dead.wal")
+    dead.write_text("")
+
+    orphans = list(WriteAheadLog.orphans(history_file))
+
+    assert [path for path, _ in orphans] == [dead]
+    for _, lock in orphans:
+        lock.release()
+    live.close()
+
+def test_open_fails_when_log_in_use(tmp_path):
+    path = tmp_path / "history.csv.1.wal"
+    with FileLock(path):
+        wal = WriteAheadLog(path)
+        try:
+            wal.append({'type': 'clear'})
+        except OSError as e:
+            assert "in use" in str(e)
+        else:
+            raise AssertionError("expected OSError")